@@ -26,13 +26,22 @@ else:
 DB_NAME = "main.db"
 DB_JOURNAL_MODE = "WAL"  # Write-Ahead Logging for better concurrency
 DB_SYNCHRONOUS = "NORMAL"  # Balance between safety and speed
-DB_CACHE_SIZE = 10000  # Number of pages to cache
+DB_CACHE_SIZE = -65536  # Page cache per connection; negative = KiB (64 MiB, independent of page size)
 DB_TEMP_STORE = "MEMORY"  # Store temp tables in memory
+DB_MMAP_SIZE = 268435456  # Memory-map up to 256MB of the database file (OS page cache, shared by all connections)
+DB_READ_POOL_SIZE = 4  # Read-only connections for concurrent queries (WAL)
+DB_READ_POOL_TIMEOUT = 5.0  # Seconds to wait for a free reader before giving up
+DB_BUSY_TIMEOUT_MS = 30000  # Wait up to 30 seconds for locks instead of failing with SQLITE_BUSY
+DB_WAL_AUTOCHECKPOINT = 1000  # Checkpoint the WAL back into the database every 1000 pages
 
 # Directory Names (relative to workspace root)
 DIR_DATABASE = "database"
 DIR_PDFS = "pdfs"
 DIR_EXPORTS = "exports"
+DIR_CACHE = ".cache"
+
+# Per-device caches (never synced with the workspace), one subdirectory per workspace
+LOCAL_CACHE_DIR = Path.home() / ".pdf_research_cache"
 SYNC_FILE = ".pdfsync"
 
 # UI Settings
@@ -66,12 +75,16 @@ RECOMMENDATION_TOP_K = 20
 RECOMMENDATION_MIN_SCORE = 0.3
 RECOMMENDATION_CACHE_DAYS = 7
 RECOMMENDATION_MAX_FEATURES = 5000  # For TF-IDF
+RECOMMENDATION_MIN_DF = 2  # Ignore terms found in fewer user documents (TF-IDF)
+VECTORIZER_CACHE_FILE = "vectorizer.npz"  # Fitted TF-IDF arrays + user profile (under local_cache_dir)
 
 # Journal API Settings
 CROSSREF_API_URL = "https://api.crossref.org/works"
 CROSSREF_RATE_LIMIT = 50  # requests per second
+CROSSREF_MAILTO = "research@example.com"  # Contact for Crossref's "polite" pool
 JOURNAL_FETCH_DAYS = 30  # Fetch articles from last N days
 JOURNAL_FETCH_MAX = 100  # Maximum articles to fetch per request
+JOURNAL_FETCH_CONCURRENCY = 4  # Concurrent journal requests (polite to Crossref)
 
 # Logging Settings
 LOG_LEVEL = "INFO"
@@ -98,6 +98,10 @@ class AnnotationManager:
         """문서의 모든 메모 조회"""
         return self.annotation_dao.get_by_document(doc_id)
 
+    def get_annotations_for_documents(self, doc_ids: List[int]) -> Dict[int, List[Dict]]:
+        """여러 문서의 메모 조회 (doc_id -> 메모 목록)"""
+        return self.annotation_dao.get_by_documents(doc_ids)
+
     def get_page_annotations(self, doc_id: int, page_number: int) -> List[Dict]:
         """특정 페이지의 메모 조회"""
         return self.annotation_dao.get_by_page(doc_id, page_number)
@@ -147,6 +151,7 @@ class AnnotationManager:
             VALUES ('annotation', ?, ?, ?, NULL)
         """, (content, doc_id, annotation_id))
 
+        db.bump_library_version(conn)
         conn.commit()
         logger.debug(f"Updated FTS index for annotation {annotation_id}")
 
@@ -161,6 +166,7 @@ class AnnotationManager:
             VALUES ('tag', ?, ?, ?, NULL)
         """, (tag_name, doc_id, annotation_id))
 
+        db.bump_library_version(conn)
         conn.commit()
 
     def _remove_from_search_index(self, annotation_id: int):
@@ -173,6 +179,7 @@ class AnnotationManager:
             DELETE FROM search_index WHERE annotation_id = ?
         """, (annotation_id,))
 
+        db.bump_library_version(conn)
         conn.commit()
         logger.debug(f"Removed annotation {annotation_id} from FTS index")
 
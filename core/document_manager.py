@@ -2,8 +2,6 @@
 Document 관리 비즈니스 로직
 """
 import logging
-import hashlib
-import shutil
 from pathlib import Path
 from typing import List, Dict, Optional
 
@@ -40,17 +38,17 @@ class DocumentManager:
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
-        # Compute file hash
-        file_hash = self._compute_file_hash(pdf_path)
+        # Copy PDF to workspace, hashing it in the same pass
+        staged_path, file_hash = self.workspace.stage_pdf(pdf_path)
 
-        # Check for duplicates
+        # Check for duplicates before the copy gets its real name
         existing = self.document_dao.get_by_hash(file_hash)
         if existing:
+            staged_path.unlink()
             logger.warning(f"Duplicate PDF detected: {existing['title']}")
             raise ValueError(f"This PDF already exists: {existing['title']}")
 
-        # Copy PDF to workspace
-        dest_path = self._copy_to_workspace(pdf_path)
+        dest_path = self.workspace.place_staged_pdf(staged_path, pdf_path.name)
 
         # Get relative path
         relative_path = self.workspace.get_relative_path(dest_path)
@@ -127,6 +125,8 @@ class DocumentManager:
         if delete_file:
             pdf_path = self.workspace.get_absolute_path(doc['file_path'])
             if pdf_path.exists():
+                # Release the cached handle first (Windows cannot delete open files)
+                self.pdf_handler.close_pdf(pdf_path)
                 pdf_path.unlink()
                 logger.info(f"Deleted file: {pdf_path}")
 
@@ -147,13 +147,7 @@ class DocumentManager:
         tag_manager = TagManager(self.workspace)
         doc_ids = tag_manager.get_documents_by_tag(tag_id)
 
-        documents = []
-        for doc_id in doc_ids:
-            doc = self.document_dao.get_by_id(doc_id)
-            if doc:
-                documents.append(doc)
-
-        return documents
+        return self.document_dao.get_many(doc_ids)
 
     def get_user_corpus(self) -> List[Dict]:
         """
@@ -169,16 +163,20 @@ class DocumentManager:
         tag_manager = TagManager(self.workspace)
 
         documents = self.get_all_documents()
+        doc_ids = [doc['doc_id'] for doc in documents]
+
+        # Tags and annotations for all documents in one query each
+        tags_by_doc = tag_manager.get_tags_for_documents(doc_ids)
+        annotations_by_doc = annotation_manager.get_annotations_for_documents(doc_ids)
+
         corpus = []
 
         for doc in documents:
             # Get tags
-            tags = tag_manager.get_document_tags(doc['doc_id'])
-            tag_names = [tag['tag_name'] for tag in tags]
+            tag_names = [tag['tag_name'] for tag in tags_by_doc[doc['doc_id']]]
 
             # Get annotations
-            annotations = annotation_manager.get_document_annotations(doc['doc_id'])
-            annotation_texts = [ann['content'] for ann in annotations]
+            annotation_texts = [ann['content'] for ann in annotations_by_doc[doc['doc_id']]]
 
             corpus.append({
                 'doc_id': doc['doc_id'],
@@ -193,30 +191,6 @@ class DocumentManager:
         logger.debug(f"Generated corpus with {len(corpus)} documents")
         return corpus
 
-    def _copy_to_workspace(self, pdf_path: Path) -> Path:
-        """PDF를 workspace로 복사"""
-        dest_path = self.workspace.pdf_dir / pdf_path.name
-
-        # Handle duplicate filenames
-        counter = 1
-        while dest_path.exists():
-            dest_path = self.workspace.pdf_dir / f"{pdf_path.stem}_{counter}{pdf_path.suffix}"
-            counter += 1
-
-        shutil.copy2(pdf_path, dest_path)
-        logger.debug(f"Copied PDF to: {dest_path}")
-
-        return dest_path
-
-    @staticmethod
-    def _compute_file_hash(file_path: Path) -> str:
-        """파일 해시 계산"""
-        sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
-
     def _update_search_index(self, doc_id: int, metadata: dict):
         """검색 인덱스 업데이트"""
         db = self.workspace.get_database()
@@ -243,6 +217,7 @@ class DocumentManager:
                 VALUES ('abstract', ?, ?, NULL, NULL)
             """, (metadata['abstract'], doc_id))
 
+        db.bump_library_version(conn)
         conn.commit()
         logger.debug(f"Updated search index for document {doc_id}")
 
@@ -253,6 +228,7 @@ class DocumentManager:
         cursor = conn.cursor()
 
         cursor.execute("DELETE FROM search_index WHERE doc_id = ?", (doc_id,))
+        db.bump_library_version(conn)
         conn.commit()
 
         logger.debug(f"Removed document {doc_id} from search index")
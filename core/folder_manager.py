@@ -83,12 +83,7 @@ class FolderManager:
             ORDER BY order_index ASC
         """)
 
-        columns = [desc[0] for desc in cursor.description]
-        folders = []
-
-        for row in cursor.fetchall():
-            folder = dict(zip(columns, row))
-            folders.append(folder)
+        folders = [dict(row) for row in cursor.fetchall()]
 
         return folders
 
@@ -107,8 +102,7 @@ class FolderManager:
 
         row = cursor.fetchone()
         if row:
-            columns = [desc[0] for desc in cursor.description]
-            return dict(zip(columns, row))
+            return dict(row)
         return None
 
     def get_root_folders(self) -> List[Dict]:
@@ -125,12 +119,7 @@ class FolderManager:
             ORDER BY order_index ASC
         """)
 
-        columns = [desc[0] for desc in cursor.description]
-        folders = []
-
-        for row in cursor.fetchall():
-            folder = dict(zip(columns, row))
-            folders.append(folder)
+        folders = [dict(row) for row in cursor.fetchall()]
 
         return folders
 
@@ -148,12 +137,7 @@ class FolderManager:
             ORDER BY order_index ASC
         """, (parent_id,))
 
-        columns = [desc[0] for desc in cursor.description]
-        folders = []
-
-        for row in cursor.fetchall():
-            folder = dict(zip(columns, row))
-            folders.append(folder)
+        folders = [dict(row) for row in cursor.fetchall()]
 
         return folders
 
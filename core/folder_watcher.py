@@ -3,11 +3,12 @@ Folder Watcher
 Monitors folders for new PDF files and auto-imports them
 """
 import logging
-import hashlib
 from pathlib import Path
 from typing import List, Dict, Optional, Callable
 from datetime import datetime
 
+from core.workspace import compute_file_hash
+
 logger = logging.getLogger(__name__)
 
 
@@ -216,11 +217,7 @@ class FolderWatcher:
 
     def _compute_hash(self, file_path: Path) -> str:
         """Compute SHA256 hash of file"""
-        sha256 = hashlib.sha256()
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(8192), b''):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+        return compute_file_hash(file_path)
 
     def _import_pdf(
         self,
@@ -304,6 +301,8 @@ class FolderWatcher:
                         VALUES ('abstract', ?, ?)
                     """, (metadata['abstract'], doc_id))
 
+                db.bump_library_version(conn)
+
             return doc_id
 
         except Exception as e:
@@ -2,17 +2,27 @@
 Auto Recommendation Manager
 Automatically monitors target journals and recommends relevant papers
 """
+import ast
+import json
 import logging
+from bisect import bisect_right
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from pathlib import Path
 
 from core.recommendation.vectorizer import DocumentVectorizer
 from core.recommendation.journal_fetcher import JournalFetcher
-from core.recommendation.keyword_synonyms import match_keywords_in_text, expand_keywords, should_exclude_paper
+from core.recommendation.keyword_synonyms import (
+    match_keywords_batch, expand_keywords, should_exclude_paper, is_excluded
+)
+from config import VECTORIZER_CACHE_FILE
 
 logger = logging.getLogger(__name__)
 
+# Score thresholds (ascending) and the category each band maps to
+_CATEGORY_THRESHOLDS = (0.5, 0.7)
+_CATEGORY_NAMES = ('moderately_relevant', 'relevant', 'highly_relevant')
+
 
 class AutoRecommendationManager:
     """Manages automatic paper recommendations from target journals"""
@@ -20,8 +30,8 @@ class AutoRecommendationManager:
     def __init__(self, workspace):
         self.workspace = workspace
         self.db = workspace.get_database()
-        self.vectorizer = DocumentVectorizer()
-        self.journal_fetcher = JournalFetcher()
+        self.vectorizer = DocumentVectorizer(cache_path=workspace.local_cache_dir / VECTORIZER_CACHE_FILE)
+        self.journal_fetcher = JournalFetcher(cache_dir=workspace.local_cache_dir / 'crossref')
         self._user_corpus = None
 
     def add_target_journal(
@@ -72,13 +82,8 @@ class AutoRecommendationManager:
         query += " ORDER BY journal_name"
 
         cursor.execute(query)
-        columns = [desc[0] for desc in cursor.description]
-
-        journals = []
-        for row in cursor.fetchall():
-            journals.append(dict(zip(columns, row)))
 
-        return journals
+        return [dict(row) for row in cursor.fetchall()]
 
     def remove_target_journal(self, journal_id: int):
         """Remove a journal from target list"""
@@ -150,17 +155,21 @@ class AutoRecommendationManager:
         conn = self.db.connect()
         cursor = conn.cursor()
 
+        # Fetch recent articles for all journals concurrently
+        fetched_articles = self.journal_fetcher.fetch_recent_articles_many(
+            [(journal['journal_name'], journal.get('issn')) for journal in journals],
+            days_back=days_back
+        )
+
         # Process each journal
-        for journal in journals:
+        for journal, articles in zip(journals, fetched_articles):
             journal_id = journal['journal_id']
             journal_name = journal['journal_name']
             issn = journal.get('issn')
 
             logger.info(f"Processing journal: {journal_name} (ISSN: {issn})")
 
-            # Fetch recent articles
             try:
-                articles = self.journal_fetcher.fetch_recent_articles(journal_name, issn=issn, days_back=days_back)
                 total_fetched += len(articles)
 
                 if not articles:
@@ -171,24 +180,32 @@ class AutoRecommendationManager:
                 journal_keywords = journal.get('keywords', '')
                 keywords_list = [kw.strip() for kw in journal_keywords.split(',') if kw.strip()]
 
-                # Filter articles by keywords (including synonyms) and exclusion keywords
-                relevant_articles = []
+                # Filter articles by exclusion keywords first (catalyst, metal-related)
+                candidates = []
                 excluded_count = 0
                 for idx, article in enumerate(articles):
-                    article_text = f"{article.get('title', '')} {article.get('abstract', '')}"
+                    # Lowercase once; reused by the exclusion and inclusion passes
+                    article_text = f"{article.get('title', '')} {article.get('abstract', '')}".lower()
 
-                    # First, check exclusion keywords (catalyst, metal-related)
-                    should_exclude, exclusion_matches = should_exclude_paper(article_text)
-                    if should_exclude:
+                    if is_excluded(article_text, lowered=True):
                         excluded_count += 1
-                        logger.debug(f"Excluded paper '{article.get('title', '')[:50]}...' due to: {exclusion_matches[:3]}")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            _, exclusion_matches = should_exclude_paper(article_text, lowered=True)
+                            logger.debug(f"Excluded paper '{article.get('title', '')[:50]}...' due to: {exclusion_matches[:3]}")
                         continue
 
-                    # Use synonym matching for inclusion keywords
-                    match_result = match_keywords_in_text(article_text, keywords_list)
+                    candidates.append((idx, article_text))
 
+                # Match inclusion keywords (including synonyms) over the whole batch
+                match_results = match_keywords_batch(
+                    [text for _, text in candidates], keywords_list, lowered=True
+                )
+
+                relevant_articles = []
+                for (idx, _), match_result in zip(candidates, match_results):
                     if match_result['match_count'] > 0:
                         # Store matched info with article
+                        article = articles[idx]
                         article['_match_info'] = match_result
                         relevant_articles.append((idx, article))
 
@@ -210,6 +227,7 @@ class AutoRecommendationManager:
                     similarities.append((idx, keyword_score))
 
                 # Save recommendations
+                rows = []
                 for idx, score in similarities:
                     # Very low threshold since keywords already filtered
                     # Articles that match keywords should be recommended
@@ -218,15 +236,6 @@ class AutoRecommendationManager:
 
                     article = articles[idx]
 
-                    # Check if already exists
-                    cursor.execute("""
-                        SELECT cache_id FROM recommendation_cache
-                        WHERE article_doi = ? AND journal_id = ?
-                    """, (article.get('doi', ''), journal_id))
-
-                    if cursor.fetchone():
-                        continue  # Already recommended
-
                     # Determine category
                     category = self._categorize_recommendation(score)
 
@@ -235,24 +244,17 @@ class AutoRecommendationManager:
                     matched_terms = match_info.get('matched_terms', [])
 
                     # Format: "keyword (via synonym)"
-                    keywords_str = ', '.join([f"{orig} (via {syn})" if orig.lower() != syn else orig
-                                               for orig, syn in matched_terms[:5]])
+                    keywords_str = ', '.join(orig if orig.lower() == syn else f"{orig} (via {syn})"
+                                             for orig, syn in matched_terms[:5])
 
                     # Generate reason with matched keywords
                     reason = self._generate_reason_with_keywords(score, matched_terms)
 
-                    # Insert recommendation
-                    cursor.execute("""
-                        INSERT INTO recommendation_cache (
-                            journal_id, article_title, article_abstract, article_authors,
-                            article_year, article_doi, similarity_score, reason,
-                            category, common_keywords, status
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'unread')
-                    """, (
+                    rows.append((
                         journal_id,
                         article.get('title', 'Untitled'),
                         article.get('abstract', ''),
-                        str(article.get('authors', [])),
+                        json.dumps(article.get('authors', []) or [], ensure_ascii=False, separators=(',', ':')),
                         article.get('year'),
                         article.get('doi', ''),
                         score,
@@ -261,7 +263,17 @@ class AutoRecommendationManager:
                         keywords_str
                     ))
 
-                    total_recommended += 1
+                # Insert recommendations (already-recommended DOIs are skipped by
+                # the unique (journal_id, article_doi) index)
+                if rows:
+                    cursor.executemany("""
+                        INSERT OR IGNORE INTO recommendation_cache (
+                            journal_id, article_title, article_abstract, article_authors,
+                            article_year, article_doi, similarity_score, reason,
+                            category, common_keywords, status
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'unread')
+                    """, rows)
+                    total_recommended += cursor.rowcount
 
                 # Update last_fetched
                 cursor.execute("""
@@ -327,16 +339,16 @@ class AutoRecommendationManager:
             params.append(limit)
 
         cursor.execute(query, params)
-        columns = [desc[0] for desc in cursor.description]
 
         recommendations = []
         for row in cursor.fetchall():
-            rec = dict(zip(columns, row))
+            rec = dict(row)
             # Parse keywords
             if rec.get('common_keywords'):
                 rec['keywords_list'] = rec['common_keywords'].split(',')
             else:
                 rec['keywords_list'] = []
+            rec['authors_list'] = self._parse_authors(rec.get('article_authors'))
             recommendations.append(rec)
 
         return recommendations
@@ -380,32 +392,20 @@ class AutoRecommendationManager:
         conn = self.db.connect()
         cursor = conn.cursor()
 
-        stats = {}
-
-        # Count by status
-        cursor.execute("""
-            SELECT status, COUNT(*) as count
-            FROM recommendation_cache
-            GROUP BY status
-        """)
-        stats['by_status'] = {row[0]: row[1] for row in cursor.fetchall()}
-
-        # Count by category
+        # Single grouped scan; totals and per-status/category counts are reduced here
         cursor.execute("""
-            SELECT category, COUNT(*) as count
+            SELECT status, category, COUNT(*) as count
             FROM recommendation_cache
-            WHERE status = 'unread'
-            GROUP BY category
+            GROUP BY status, category
         """)
-        stats['by_category'] = {row[0]: row[1] for row in cursor.fetchall()}
 
-        # Total count
-        cursor.execute("SELECT COUNT(*) FROM recommendation_cache")
-        stats['total'] = cursor.fetchone()[0]
-
-        # Unread count
-        cursor.execute("SELECT COUNT(*) FROM recommendation_cache WHERE status = 'unread'")
-        stats['unread'] = cursor.fetchone()[0]
+        stats = {'by_status': {}, 'by_category': {}, 'total': 0, 'unread': 0}
+        for status, category, count in cursor.fetchall():
+            stats['by_status'][status] = stats['by_status'].get(status, 0) + count
+            stats['total'] += count
+            if status == 'unread':
+                stats['by_category'][category] = stats['by_category'].get(category, 0) + count
+                stats['unread'] += count
 
         return stats
 
@@ -415,14 +415,22 @@ class AutoRecommendationManager:
         doc_manager = DocumentManager(self.workspace)
         return doc_manager.get_user_corpus()
 
+    @staticmethod
+    def _parse_authors(value: Optional[str]) -> List[str]:
+        """Parse stored authors (JSON, or Python list repr for legacy rows)"""
+        if not value:
+            return []
+        try:
+            return json.loads(value)
+        except ValueError:
+            try:
+                return list(ast.literal_eval(value))
+            except (ValueError, SyntaxError):
+                return []
+
     def _categorize_recommendation(self, score: float) -> str:
         """Categorize recommendation by score"""
-        if score >= 0.7:
-            return 'highly_relevant'
-        elif score >= 0.5:
-            return 'relevant'
-        else:
-            return 'moderately_relevant'
+        return _CATEGORY_NAMES[bisect_right(_CATEGORY_THRESHOLDS, score)]
 
     def _generate_reason_with_keywords(self, score: float, matched_terms: List[tuple]) -> str:
         """Generate recommendation reason with matched keywords"""
@@ -7,7 +7,7 @@ from dataclasses import dataclass
 
 from core.recommendation.vectorizer import DocumentVectorizer
 from core.recommendation.journal_fetcher import JournalFetcher
-from config import RECOMMENDATION_TOP_K, RECOMMENDATION_MIN_SCORE
+from config import RECOMMENDATION_TOP_K, RECOMMENDATION_MIN_SCORE, VECTORIZER_CACHE_FILE
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +31,8 @@ class RecommendationEngine:
 
     def __init__(self, workspace):
         self.workspace = workspace
-        self.vectorizer = DocumentVectorizer()
-        self.journal_fetcher = JournalFetcher()
+        self.vectorizer = DocumentVectorizer(cache_path=workspace.local_cache_dir / VECTORIZER_CACHE_FILE)
+        self.journal_fetcher = JournalFetcher(cache_dir=workspace.local_cache_dir / 'crossref')
         self._user_corpus = None
 
     def generate_recommendations(
@@ -83,7 +83,7 @@ class RecommendationEngine:
         # Step 3: Compute similarities
         logger.info("Computing similarities...")
         try:
-            similarities = self.vectorizer.compute_similarities(articles)
+            similarities = self.vectorizer.compute_top_k(articles, top_k)
         except Exception as e:
             logger.error(f"Failed to compute similarities: {e}")
             return []
@@ -91,7 +91,7 @@ class RecommendationEngine:
         # Step 4: Generate recommendations
         recommendations = []
 
-        for idx, score in similarities[:top_k]:
+        for idx, score in similarities:
             if score < RECOMMENDATION_MIN_SCORE:
                 logger.debug(f"Skipping article {idx} with score {score:.4f} (below threshold)")
                 continue
@@ -1,17 +1,44 @@
 """
 학술 저널 논문 수집 (Crossref API 사용)
 """
+import hashlib
+import json
 import logging
 import requests
 import re
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import quote
+from xml.etree import ElementTree
 
-from config import CROSSREF_API_URL, CROSSREF_RATE_LIMIT, JOURNAL_FETCH_DAYS, JOURNAL_FETCH_MAX
+try:
+    import ijson  # Optional: streaming JSON parsing
+except ImportError:
+    ijson = None
+
+from config import (
+    CROSSREF_API_URL, CROSSREF_RATE_LIMIT, CROSSREF_MAILTO, JOURNAL_FETCH_DAYS, JOURNAL_FETCH_MAX,
+    JOURNAL_FETCH_CONCURRENCY
+)
 
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns for clean_jats_tags
+_JATS_SUB_RE = re.compile(r'<jats:sub>(\d+)</jats:sub>')
+_JATS_SUP_RE = re.compile(r'<jats:sup>(\d+)</jats:sup>')
+_ALL_TAGS_RE = re.compile(r'</?jats:[^>]+>|<[^>]+>')
+
+# Date bounds in a Crossref filter; left out of response cache keys so a
+# window that moves with the current date still revalidates the same entry
+_DATE_FILTER_RE = re.compile(r'(?:^|,)(?:from|until)-pub-date:[^,]*')
+
+# Fields read by JournalFetcher._parse_crossref_item
+CROSSREF_SELECT_FIELDS = ['title', 'abstract', 'author', 'published', 'DOI', 'container-title']
+
 
 def clean_jats_tags(text: str) -> str:
     """
@@ -28,19 +55,14 @@ def clean_jats_tags(text: str) -> str:
 
     # Remove JATS tags like <jats:p>, <jats:title>, <jats:sub>, etc.
     # Replace <jats:sub> and <jats:sup> with subscript/superscript symbols when possible
-    text = re.sub(r'<jats:sub>(\d+)</jats:sub>', r'�\1', text)  # subscript numbers
-    text = re.sub(r'<jats:sup>(\d+)</jats:sup>', r'^\1', text)  # superscript as ^N
-
-    # Remove all other JATS tags
-    text = re.sub(r'<jats:[^>]+>', '', text)
-    text = re.sub(r'</jats:[^>]+>', '', text)
+    text = _JATS_SUB_RE.sub(r'�\1', text)  # subscript numbers
+    text = _JATS_SUP_RE.sub(r'^\1', text)  # superscript as ^N
 
-    # Remove any remaining XML/HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
+    # Remove all other JATS tags and any remaining XML/HTML tags in one pass
+    text = _ALL_TAGS_RE.sub('', text)
 
-    # Clean up extra whitespace
-    text = re.sub(r'\s+', ' ', text)
-    text = text.strip()
+    # Clean up extra whitespace (collapse runs and strip in one C-level pass)
+    text = ' '.join(text.split())
 
     return text
 
@@ -48,20 +70,126 @@ def clean_jats_tags(text: str) -> str:
 class JournalFetcher:
     """학술 저널에서 최근 논문 수집"""
 
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[Path] = None):
         self.api_url = CROSSREF_API_URL
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         self.rate_limit = CROSSREF_RATE_LIMIT
+        self.mailto = CROSSREF_MAILTO
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'PDFResearchApp/0.2 (mailto:research@example.com)'
+            'User-Agent': f'PDFResearchApp/0.2 (mailto:{self.mailto})'
         })
 
+        # Keep-alive connection pool with retries on rate limiting / transient errors
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=['GET'],
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _get_json(self, url: str, params: Optional[Dict] = None, timeout: int = 30) -> Dict:
+        """
+        GET a Crossref endpoint and decode JSON, revalidating cached responses
+
+        Raises:
+            requests.RequestException on network/HTTP errors
+        """
+        return self._conditional_get(url, params, timeout, 'json', lambda response: response.json())
+
+    def _get_articles(self, url: str, params: Optional[Dict] = None, timeout: int = 30) -> List[Dict]:
+        """
+        GET a Crossref /works listing and return the parsed articles
+
+        Items are parsed one at a time as they are decoded, so the raw response
+        never has to be held in memory as a whole (streamed with ijson when
+        installed).
+
+        Raises:
+            requests.RequestException on network/HTTP errors
+        """
+        return self._conditional_get(url, params, timeout, 'articles', self._decode_articles, stream=True)
+
+    def _decode_articles(self, response: requests.Response) -> List[Dict]:
+        """Parse message.items of a /works response into article dicts"""
+        if ijson is not None:
+            response.raw.decode_content = True  # Let urllib3 undo gzip
+            items = ijson.items(response.raw, 'message.items.item', use_float=True)
+        else:
+            items = response.json().get('message', {}).get('items', [])
+
+        articles = []
+        for item in items:
+            article = self._parse_crossref_item(item)
+            if article:
+                articles.append(article)
+        return articles
+
+    def _conditional_get(self, url: str, params: Optional[Dict], timeout: int, kind: str, decode, stream: bool = False):
+        """
+        GET url and decode the body, revalidating cached responses
+
+        When cache_dir is set, decoded payloads of responses carrying an
+        ETag/Last-Modified are kept on disk and later requests are sent
+        conditionally; a 304 reuses the cached payload without downloading or
+        parsing the body again. Entries are keyed without the date filter, so
+        there is one per query that is overwritten as the window moves.
+        """
+        cache_file = None
+        cached = None
+        headers = {}
+
+        if self.cache_dir is not None:
+            key_params = dict(params or {})
+            if 'filter' in key_params:
+                key_params['filter'] = _DATE_FILTER_RE.sub('', key_params['filter']).lstrip(',')
+            request_url = requests.Request('GET', url, params=key_params).prepare().url
+            cache_key = hashlib.sha1(f"{kind}:{request_url}".encode('utf-8')).hexdigest()
+            cache_file = self.cache_dir / f"{cache_key}.json"
+            try:
+                cached = json.loads(cache_file.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                cached = None
+
+            if cached:
+                if cached.get('etag'):
+                    headers['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    headers['If-Modified-Since'] = cached['last_modified']
+
+        with self.session.get(url, params=params, headers=headers, timeout=timeout, stream=stream) as response:
+            if response.status_code == 304 and cached:
+                logger.debug(f"Crossref response not modified, using cache: {url}")
+                return cached['data']
+
+            response.raise_for_status()
+            data = decode(response)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+        if cache_file is not None and (etag or last_modified):
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                cache_file.write_text(
+                    json.dumps({'etag': etag, 'last_modified': last_modified, 'data': data}),
+                    encoding='utf-8'
+                )
+            except OSError as e:
+                logger.warning(f"Failed to write Crossref cache: {e}")
+
+        return data
+
     def fetch_recent_articles(
         self,
         journal_name: str,
         issn: Optional[str] = None,
         days_back: int = JOURNAL_FETCH_DAYS,
-        max_results: int = JOURNAL_FETCH_MAX
+        max_results: int = JOURNAL_FETCH_MAX,
+        select_fields: Optional[List[str]] = None
     ) -> List[Dict]:
         """
         저널의 최근 논문 가져오기
@@ -71,6 +199,7 @@ class JournalFetcher:
             issn: 저널 ISSN (있으면 우선 사용)
             days_back: 최근 며칠 간의 논문
             max_results: 최대 결과 개수
+            select_fields: Crossref 필드 목록 (None이면 CROSSREF_SELECT_FIELDS)
 
         Returns:
             List of article dicts
@@ -96,40 +225,27 @@ class JournalFetcher:
         params = {
             'filter': ','.join(filter_parts),
             'rows': max_results,
-            'select': 'title,abstract,author,published,DOI,container-title,ISSN',
+            'select': ','.join(select_fields or CROSSREF_SELECT_FIELDS),
             'sort': 'published',
-            'order': 'desc'
+            'order': 'desc',
+            'mailto': self.mailto
         }
 
         try:
             logger.debug(f"Crossref API request params: {params}")
-            response = self.session.get(self.api_url, params=params, timeout=30)
-            response.raise_for_status()
+            articles = self._get_articles(self.api_url, params=params, timeout=30)
+            logger.info(f"Received {len(articles)} articles from Crossref")
 
-            data = response.json()
-
-            if 'message' not in data or 'items' not in data['message']:
-                logger.warning("Unexpected API response format")
-                return []
-
-            items = data['message']['items']
-            logger.info(f"Received {len(items)} articles from Crossref")
-
-            if len(items) == 0:
+            if len(articles) == 0:
                 logger.warning(f"No articles found for '{journal_name}'. Try different search parameters.")
                 # ISSN 없이 재시도
                 if issn and not journal_name.startswith("Unknown"):
                     logger.info("Retrying without ISSN...")
-                    return self.fetch_recent_articles(journal_name, issn=None, days_back=days_back, max_results=max_results)
+                    return self.fetch_recent_articles(
+                        journal_name, issn=None, days_back=days_back, max_results=max_results,
+                        select_fields=select_fields
+                    )
 
-            # Parse articles
-            articles = []
-            for item in items:
-                article = self._parse_crossref_item(item)
-                if article:
-                    articles.append(article)
-
-            logger.info(f"Successfully parsed {len(articles)} articles")
             return articles
 
         except requests.RequestException as e:
@@ -140,6 +256,51 @@ class JournalFetcher:
             logger.error(f"Unexpected error while fetching articles: {e}", exc_info=True)
             return []
 
+    def fetch_recent_articles_many(
+        self,
+        journals: List[Tuple[str, Optional[str]]],
+        days_back: int = JOURNAL_FETCH_DAYS,
+        max_results: int = JOURNAL_FETCH_MAX,
+        max_workers: int = JOURNAL_FETCH_CONCURRENCY,
+        select_fields: Optional[List[str]] = None
+    ) -> List[List[Dict]]:
+        """
+        여러 저널의 최근 논문을 동시에 가져오기
+
+        Requests share the keep-alive session; max_workers bounds the number of
+        in-flight Crossref calls to stay polite.
+
+        Args:
+            journals: List of (journal_name, issn) tuples
+            days_back: 최근 며칠 간의 논문
+            max_results: 저널당 최대 결과 개수
+            max_workers: 동시 요청 수
+            select_fields: Crossref 필드 목록 (None이면 CROSSREF_SELECT_FIELDS)
+
+        Returns:
+            List of article lists, in the same order as journals
+        """
+        if not journals:
+            return []
+
+        def fetch(journal: Tuple[str, Optional[str]]) -> List[Dict]:
+            journal_name, issn = journal
+            return self.fetch_recent_articles(
+                journal_name, issn=issn, days_back=days_back, max_results=max_results,
+                select_fields=select_fields
+            )
+
+        return self._map_concurrently(fetch, journals, max_workers)
+
+    @staticmethod
+    def _map_concurrently(func, items: List, max_workers: int) -> List:
+        """Apply func to items with at most max_workers requests in flight, keeping order"""
+        if len(items) <= 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+            return list(executor.map(func, items))
+
     def _parse_crossref_item(self, item: Dict) -> Optional[Dict]:
         """Crossref API 응답을 논문 dict로 변환"""
         try:
@@ -199,10 +360,7 @@ class JournalFetcher:
         url = f"https://api.crossref.org/journals/{issn}"
 
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-
-            data = response.json()
+            data = self._get_json(url, params={'mailto': self.mailto}, timeout=10)
 
             if 'message' in data:
                 journal_info = data['message']
@@ -222,10 +380,7 @@ class JournalFetcher:
         url = f"https://api.crossref.org/works/{quote(doi)}"
 
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-
-            data = response.json()
+            data = self._get_json(url, params={'mailto': self.mailto}, timeout=10)
 
             if 'message' in data:
                 return self._parse_crossref_item(data['message'])
@@ -235,6 +390,55 @@ class JournalFetcher:
 
         return None
 
+    def search_by_dois(
+        self,
+        dois: List[str],
+        batch_size: int = 50,
+        max_workers: int = JOURNAL_FETCH_CONCURRENCY
+    ) -> List[Dict]:
+        """
+        여러 DOI를 묶어서 조회 (배치당 요청 1회, 배치는 동시에 요청)
+
+        Args:
+            dois: DOI 목록
+            batch_size: 요청당 DOI 개수 (URI 길이 제한 시 자동으로 줄어듦)
+            max_workers: 동시 요청 수
+
+        Returns:
+            List of article dicts (DOIs not found are skipped)
+        """
+        batches = [dois[start:start + batch_size] for start in range(0, len(dois), batch_size)]
+
+        articles = []
+        for batch_articles in self._map_concurrently(self._search_doi_batch, batches, max_workers):
+            articles.extend(batch_articles)
+
+        return articles
+
+    def _search_doi_batch(self, dois: List[str]) -> List[Dict]:
+        """DOI 배치 하나 조회; 414 (URI too long) 시 반으로 나눠 재시도"""
+        if not dois:
+            return []
+
+        params = {
+            'filter': ','.join(f'doi:{doi}' for doi in dois),
+            'rows': len(dois),
+            'select': ','.join(CROSSREF_SELECT_FIELDS),
+            'mailto': self.mailto
+        }
+
+        try:
+            return self._get_articles(self.api_url, params=params, timeout=30)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 414 and len(dois) > 1:
+                middle = len(dois) // 2
+                return self._search_doi_batch(dois[:middle]) + self._search_doi_batch(dois[middle:])
+            logger.error(f"Failed to fetch articles by DOI batch: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Failed to fetch articles by DOI batch: {e}")
+            return []
+
 
 class ArxivFetcher:
     """
@@ -242,8 +446,21 @@ class ArxivFetcher:
     나중에 확장 가능
     """
 
+    ATOM_NS = '{http://www.w3.org/2005/Atom}'
+    ARXIV_NS = '{http://arxiv.org/schemas/atom}'
+
     def __init__(self):
         self.api_url = "http://export.arxiv.org/api/query"
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=Retry(
+            total=3,
+            backoff_factor=1.0,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=['GET'],
+            respect_retry_after_header=True
+        ))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def fetch_recent_articles(
         self,
@@ -271,15 +488,51 @@ class ArxivFetcher:
         }
 
         try:
-            response = requests.get(self.api_url, params=params, timeout=30)
-            response.raise_for_status()
-
-            # Parse XML response
-            # TODO: Implement XML parsing
-            # For now, return empty list
-            logger.warning("arXiv parsing not implemented yet")
-            return []
+            with self.session.get(self.api_url, params=params, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+
+                # Parse Atom entries incrementally, releasing each one once parsed
+                articles = []
+                for _, elem in ElementTree.iterparse(response.raw, events=('end',)):
+                    if elem.tag != f'{self.ATOM_NS}entry':
+                        continue
+                    article = self._parse_entry(elem)
+                    if article:
+                        articles.append(article)
+                    elem.clear()
+
+            logger.info(f"Parsed {len(articles)} articles from arXiv")
+            return articles
 
         except Exception as e:
             logger.error(f"Failed to fetch from arXiv: {e}")
             return []
+
+    def _parse_entry(self, entry) -> Optional[Dict]:
+        """Atom <entry> 요소를 논문 dict로 변환"""
+        title = ' '.join(entry.findtext(f'{self.ATOM_NS}title', '').split())
+        if not title:
+            return None
+
+        abstract = ' '.join(entry.findtext(f'{self.ATOM_NS}summary', '').split())
+
+        authors = []
+        for author in entry.iter(f'{self.ATOM_NS}author'):
+            name = author.findtext(f'{self.ATOM_NS}name', '').strip()
+            if name:
+                authors.append(name)
+
+        year = None
+        published = entry.findtext(f'{self.ATOM_NS}published', '')
+        if published[:4].isdigit():
+            year = int(published[:4])
+
+        return {
+            'title': title,
+            'abstract': abstract,
+            'authors': authors,
+            'year': year,
+            'doi': entry.findtext(f'{self.ARXIV_NS}doi', ''),
+            'journal': 'arXiv'
+        }
@@ -2,6 +2,13 @@
 Keyword Synonym System
 Maps keywords to their synonyms for better matching
 """
+from bisect import bisect_right
+from functools import lru_cache
+
+try:
+    import ahocorasick  # pyahocorasick (optional)
+except ImportError:
+    ahocorasick = None
 
 # Keyword synonym mapping
 # Format: primary_keyword -> [list of synonyms]
@@ -70,6 +77,30 @@ EXCLUSION_KEYWORDS = [
     "zeolite catalyst", "heterogeneous catalyst",
 ]
 
+
+def _build_exclusion_automaton():
+    """Build an Aho-Corasick automaton over EXCLUSION_KEYWORDS (None if unavailable)"""
+    if ahocorasick is None:
+        return None
+
+    automaton = ahocorasick.Automaton()
+    for index, keyword in enumerate(EXCLUSION_KEYWORDS):
+        automaton.add_word(keyword, (index, keyword))
+    automaton.make_automaton()
+    return automaton
+
+
+# Single-pass matcher for should_exclude_paper
+_EXCLUSION_AUTOMATON = _build_exclusion_automaton()
+
+# Exclusion keywords that do not contain another exclusion keyword; any text matching
+# EXCLUSION_KEYWORDS matches one of these (e.g. "pt catalyst" -> "catalyst").
+# Kept in list order, which puts the common catalysis terms first.
+_EXCLUSION_PROBES = tuple(
+    keyword for keyword in EXCLUSION_KEYWORDS
+    if not any(other != keyword and other in keyword for other in EXCLUSION_KEYWORDS)
+)
+
 # Build reverse mapping for faster lookup
 SYNONYM_TO_PRIMARY = {}
 for primary, synonyms in KEYWORD_SYNONYMS.items():
@@ -77,6 +108,54 @@ for primary, synonyms in KEYWORD_SYNONYMS.items():
     for synonym in synonyms:
         SYNONYM_TO_PRIMARY[synonym.lower()] = primary
 
+# Forms matched for a keyword: the keyword itself first, then its synonyms
+_MATCH_FORMS = {
+    primary: tuple(dict.fromkeys([primary] + [syn.lower() for syn in synonyms]))
+    for primary, synonyms in KEYWORD_SYNONYMS.items()
+}
+
+
+def _build_expanded_forms() -> dict:
+    """Map every known keyword/synonym to all of its variations"""
+    expanded_forms = {}
+
+    for keyword_lower in set(KEYWORD_SYNONYMS) | set(SYNONYM_TO_PRIMARY):
+        forms = set(_MATCH_FORMS.get(keyword_lower, (keyword_lower,)))
+
+        # Include the primary keyword (and its synonyms) if this is a synonym
+        primary = SYNONYM_TO_PRIMARY.get(keyword_lower)
+        if primary is not None:
+            forms.update(_MATCH_FORMS[primary])
+
+        expanded_forms[keyword_lower] = frozenset(forms)
+
+    return expanded_forms
+
+
+# Precomputed variations, used by expand_keywords/get_keyword_variations
+_EXPANDED_FORMS = _build_expanded_forms()
+
+
+def _keyword_forms(keyword_lower: str) -> tuple:
+    """Forms to search for when matching a (lowercased) keyword"""
+    return _MATCH_FORMS.get(keyword_lower, (keyword_lower,))
+
+
+@lru_cache(maxsize=64)
+def _build_matcher(keyword_lowers: tuple) -> tuple:
+    """
+    Precompute the search plan for a set of (lowercased) keywords
+
+    Returns:
+        (distinct forms to scan for, {keyword_lower: forms in match order})
+    """
+    keyword_forms = {keyword_lower: _keyword_forms(keyword_lower) for keyword_lower in keyword_lowers}
+
+    # Synonyms shared by several keywords (e.g. "process modelling") are scanned once
+    distinct_forms = tuple(dict.fromkeys(form for forms in keyword_forms.values() for form in forms))
+
+    return distinct_forms, keyword_forms
+
 
 def expand_keywords(keywords: list) -> set:
     """
@@ -92,62 +171,99 @@ def expand_keywords(keywords: list) -> set:
 
     for keyword in keywords:
         keyword_lower = keyword.strip().lower()
-        expanded.add(keyword_lower)
-
-        # Check if this keyword has synonyms
-        if keyword_lower in KEYWORD_SYNONYMS:
-            expanded.update(syn.lower() for syn in KEYWORD_SYNONYMS[keyword_lower])
-
-        # Check if this is a synonym of another keyword
-        if keyword_lower in SYNONYM_TO_PRIMARY:
-            primary = SYNONYM_TO_PRIMARY[keyword_lower]
-            expanded.add(primary)
-            if primary in KEYWORD_SYNONYMS:
-                expanded.update(syn.lower() for syn in KEYWORD_SYNONYMS[primary])
+        expanded.update(_EXPANDED_FORMS.get(keyword_lower, (keyword_lower,)))
 
     return expanded
 
 
-def match_keywords_in_text(text: str, keywords: list) -> dict:
+def match_keywords_in_text(text: str, keywords: list, lowered: bool = False) -> dict:
     """
     Match keywords (including synonyms) in text
 
     Args:
         text: Text to search in
         keywords: List of keywords to search for
+        lowered: True if text is already lowercased
 
     Returns:
         Dict with matched_keywords (set), match_count (int), matched_terms (list of tuples)
     """
-    text_lower = text.lower()
+    return match_keywords_batch([text], keywords, lowered=lowered)[0]
 
-    # Expand keywords to include synonyms
-    expanded_keywords = expand_keywords(keywords)
 
-    matched_keywords = set()
-    matched_terms = []  # (original_keyword, matched_synonym)
+def match_keywords_batch(texts: list, keywords: list, lowered: bool = False) -> list:
+    """
+    Match keywords (including synonyms) across many texts at once
 
-    for keyword in keywords:
-        keyword_lower = keyword.strip().lower()
+    The texts are joined into one buffer and each distinct keyword form is
+    located once with str.find over the whole batch, so the scanning happens in
+    C rather than in a Python loop per (text, form) pair. The search plan is
+    cached per keyword set. Results are identical to matching each text
+    separately.
 
-        # Get all possible forms of this keyword
-        possible_forms = {keyword_lower}
-        if keyword_lower in KEYWORD_SYNONYMS:
-            possible_forms.update(syn.lower() for syn in KEYWORD_SYNONYMS[keyword_lower])
+    Args:
+        texts: List of texts to search in
+        keywords: List of keywords to search for
+        lowered: True if texts are already lowercased
 
-        # Check if any form matches
-        for form in possible_forms:
-            if form in text_lower:
-                matched_keywords.add(keyword_lower)
-                matched_terms.append((keyword, form))
+    Returns:
+        List of match dicts (same shape as match_keywords_in_text), one per text
+    """
+    if not lowered:
+        texts = [text.lower() for text in texts]
+
+    results = [
+        {
+            'matched_keywords': set(),
+            'match_count': 0,
+            'matched_terms': [],  # (original_keyword, matched_synonym)
+            'total_keywords': len(keywords)
+        }
+        for _ in texts
+    ]
+    if not texts:
+        return results
+
+    keyword_lowers = [keyword.strip().lower() for keyword in keywords]
+    distinct_forms, keyword_forms = _build_matcher(tuple(sorted(set(keyword_lowers))))
+
+    # Start offset of each text inside the joined buffer (NUL never occurs in a form)
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + 1
+    joined = '\0'.join(texts)
+    text_count = len(texts)
+
+    # Texts containing each form
+    found_in = {}
+    for form in distinct_forms:
+        indices = []
+        pos = joined.find(form)
+        while pos != -1:
+            index = bisect_right(starts, pos) - 1
+            indices.append(index)
+            # Skip the rest of this text
+            if index + 1 >= text_count:
                 break
+            pos = joined.find(form, starts[index + 1])
+        found_in[form] = indices
 
-    return {
-        'matched_keywords': matched_keywords,
-        'match_count': len(matched_keywords),
-        'matched_terms': matched_terms,
-        'total_keywords': len(keywords)
-    }
+    for keyword, keyword_lower in zip(keywords, keyword_lowers):
+        matched_by = {}  # text index -> first matching form
+        for form in keyword_forms[keyword_lower]:
+            for index in found_in[form]:
+                matched_by.setdefault(index, form)
+
+        for index, form in matched_by.items():
+            results[index]['matched_keywords'].add(keyword_lower)
+            results[index]['matched_terms'].append((keyword, form))
+
+    for result in results:
+        result['match_count'] = len(result['matched_keywords'])
+
+    return results
 
 
 def get_keyword_variations(keyword: str) -> list:
@@ -161,36 +277,48 @@ def get_keyword_variations(keyword: str) -> list:
         List of all variations including the original
     """
     keyword_lower = keyword.strip().lower()
-    variations = {keyword_lower}
+    return list(_EXPANDED_FORMS.get(keyword_lower, (keyword_lower,)))
 
-    if keyword_lower in KEYWORD_SYNONYMS:
-        variations.update(syn.lower() for syn in KEYWORD_SYNONYMS[keyword_lower])
 
-    if keyword_lower in SYNONYM_TO_PRIMARY:
-        primary = SYNONYM_TO_PRIMARY[keyword_lower]
-        variations.add(primary)
-        if primary in KEYWORD_SYNONYMS:
-            variations.update(syn.lower() for syn in KEYWORD_SYNONYMS[primary])
+def is_excluded(text: str, lowered: bool = False) -> bool:
+    """
+    Check if paper should be excluded, stopping at the first exclusion keyword found
 
-    return list(variations)
+    Use should_exclude_paper when the list of matched keywords is needed.
 
+    Args:
+        text: Text to check (title + abstract)
+        lowered: True if text is already lowercased
 
-def should_exclude_paper(text: str) -> tuple[bool, list]:
+    Returns:
+        True if any exclusion keyword occurs in the text
+    """
+    text_lower = text if lowered else text.lower()
+    return any(keyword in text_lower for keyword in _EXCLUSION_PROBES)
+
+
+def should_exclude_paper(text: str, lowered: bool = False) -> tuple[bool, list]:
     """
     Check if paper should be excluded based on exclusion keywords
 
     Args:
         text: Text to check (title + abstract)
+        lowered: True if text is already lowercased
 
     Returns:
         Tuple of (should_exclude: bool, matched_exclusion_keywords: list)
     """
-    text_lower = text.lower()
-    matched_exclusions = []
-
-    for exclusion_keyword in EXCLUSION_KEYWORDS:
-        if exclusion_keyword in text_lower:
-            matched_exclusions.append(exclusion_keyword)
+    text_lower = text if lowered else text.lower()
+
+    if _EXCLUSION_AUTOMATON is not None:
+        # One scan over the text; report matches in EXCLUSION_KEYWORDS order
+        found = {value for _, value in _EXCLUSION_AUTOMATON.iter(text_lower)}
+        matched_exclusions = [keyword for _, keyword in sorted(found)]
+    else:
+        matched_exclusions = []
+        for exclusion_keyword in EXCLUSION_KEYWORDS:
+            if exclusion_keyword in text_lower:
+                matched_exclusions.append(exclusion_keyword)
 
     # Exclude if any exclusion keyword is found
     should_exclude = len(matched_exclusions) > 0
@@ -1,13 +1,17 @@
 """
 TF-IDF 벡터화 및 유사도 계산
 """
+import hashlib
+import json
 import logging
 import numpy as np
-from typing import List, Dict, Tuple
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional
+import sklearn
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
-from config import RECOMMENDATION_MAX_FEATURES
+from config import RECOMMENDATION_MAX_FEATURES, RECOMMENDATION_MIN_DF
 
 logger = logging.getLogger(__name__)
 
@@ -15,18 +19,85 @@ logger = logging.getLogger(__name__)
 class DocumentVectorizer:
     """문서 벡터화 및 유사도 계산"""
 
-    def __init__(self, max_features: int = RECOMMENDATION_MAX_FEATURES):
+    def __init__(self, max_features: int = RECOMMENDATION_MAX_FEATURES, cache_path: Optional[Path] = None):
         self.max_features = max_features
+        self.cache_path = Path(cache_path) if cache_path else None
         self.vectorizer = TfidfVectorizer(
             max_features=max_features,
             stop_words='english',
             ngram_range=(1, 2),  # unigram + bigram
             min_df=1,
-            lowercase=True,
-            sublinear_tf=True  # Use log(tf) + 1
+            lowercase=False,  # Texts are lowercased once before vectorizing
+            sublinear_tf=True,  # Use log(tf) + 1
+            norm='l2'  # Unit-length rows: cosine similarity is a plain dot product
         )
         self.user_vector = None
         self.user_text = None
+        self._corpus_hash = None
+        self._params_key = self._make_params_key()
+
+        self._load_cache()
+
+    def _make_params_key(self) -> str:
+        """
+        Key of everything besides the corpus that shapes the fitted vectorizer,
+        so a cache fitted with other settings (or another scikit-learn) is ignored
+        """
+        # min_df is chosen per fit from RECOMMENDATION_MIN_DF
+        params = {k: v for k, v in self.vectorizer.get_params().items() if k != 'min_df'}
+        payload = json.dumps([sklearn.__version__, RECOMMENDATION_MIN_DF, params], sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _load_cache(self):
+        """디스크에 저장된 vocabulary/idf와 사용자 프로필 불러오기"""
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+
+        try:
+            # Plain arrays only: nothing in the cache file is unpickled
+            with np.load(self.cache_path, allow_pickle=False) as cache:
+                if str(cache['params_key']) != self._params_key:
+                    logger.info(f"Ignoring vectorizer cache built with other settings: {self.cache_path}")
+                    return
+                terms = cache['terms'].tolist()
+                idf = cache['idf']
+                user_data = cache['user_data']
+                user_indices = cache['user_indices']
+                corpus_hash = str(cache['corpus_hash'])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable vectorizer cache {self.cache_path}: {e}")
+            return
+
+        self.vectorizer.vocabulary_ = {term: index for index, term in enumerate(terms)}
+        self.vectorizer.fixed_vocabulary_ = False
+        self.vectorizer.idf_ = idf
+        self.user_vector = sparse.csr_matrix(
+            (user_data, user_indices, [0, len(user_data)]), shape=(1, len(terms))
+        )
+        self._corpus_hash = corpus_hash
+        logger.info(f"Loaded cached user profile from {self.cache_path}")
+
+    def _save_cache(self):
+        """vocabulary/idf와 사용자 프로필을 디스크에 저장"""
+        if self.cache_path is None:
+            return
+
+        vocabulary = self.vectorizer.vocabulary_
+        user_vector = self.user_vector.tocsr()
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_path, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    params_key=np.array(self._params_key),
+                    corpus_hash=np.array(self._corpus_hash),
+                    terms=np.array(sorted(vocabulary, key=vocabulary.get), dtype=str),
+                    idf=self.vectorizer.idf_,
+                    user_data=user_vector.data,
+                    user_indices=user_vector.indices,
+                )
+        except Exception as e:
+            logger.warning(f"Failed to save vectorizer cache: {e}")
 
     def build_user_profile(self, corpus: List[Dict]) -> np.ndarray:
         """
@@ -66,32 +137,74 @@ class DocumentVectorizer:
                 annotations_text = ' '.join(doc['annotations'])
                 text_parts.append(annotations_text)
 
-            combined_texts.append(' '.join(text_parts))
+            combined_texts.append(' '.join(text_parts).lower())
 
         # Combine all documents into one profile
-        self.user_text = ' '.join(combined_texts)
+        user_text = ' '.join(combined_texts)
+
+        # Skip refitting when the corpus is unchanged since the last (cached) fit
+        corpus_hash = hashlib.blake2b(user_text.encode('utf-8'), digest_size=16).hexdigest()
+        if corpus_hash == self._corpus_hash and self.user_vector is not None:
+            logger.info("User corpus unchanged, reusing cached user profile")
+            return self.user_vector
+
+        self.user_text = user_text
 
         logger.info(f"Building user profile from {len(corpus)} documents")
         logger.debug(f"  Total text length: {len(self.user_text)} chars")
 
         # Fit vectorizer and transform
         try:
-            # Fit on user text + dummy to avoid single-sample issue
-            fit_texts = [self.user_text, "dummy document for fitting"]
-            self.vectorizer.fit(fit_texts)
-
-            # Transform only user text
+            # Fit on per-document texts so IDF reflects the user's corpus;
+            # drop one-off terms once there are enough documents to tell
+            min_df = RECOMMENDATION_MIN_DF if len(combined_texts) > RECOMMENDATION_MIN_DF else 1
+            self.vectorizer.set_params(min_df=min_df)
+            try:
+                self.vectorizer.fit(combined_texts)
+            except ValueError:
+                # No term shared by min_df documents
+                self.vectorizer.set_params(min_df=1)
+                self.vectorizer.fit(combined_texts)
+
+            # Transform the combined profile text
             self.user_vector = self.vectorizer.transform([self.user_text])
 
             logger.info(f"User profile vector shape: {self.user_vector.shape}")
             logger.info(f"Vocabulary size: {len(self.vectorizer.vocabulary_)}")
 
+            self._corpus_hash = corpus_hash
+            self._save_cache()
+
             return self.user_vector
 
         except Exception as e:
             logger.error(f"Failed to build user profile: {e}")
             raise
 
+    def _score_articles(self, articles: List[Dict]) -> np.ndarray:
+        """사용자 프로필과 각 논문 간의 코사인 유사도 배열"""
+        if self.user_vector is None:
+            raise ValueError("User profile not built yet. Call build_user_profile first.")
+
+        # Prepare article texts
+        article_texts = []
+        for article in articles:
+            text_parts = []
+
+            if article.get('title'):
+                text_parts.append(article['title'])
+
+            if article.get('abstract'):
+                text_parts.append(article['abstract'])
+
+            article_texts.append(' '.join(text_parts).lower())
+
+        # Vectorize articles
+        article_vectors = self.vectorizer.transform(article_texts)
+
+        # Compute cosine similarities (rows are already L2-normalized)
+        return article_vectors.dot(self.user_vector.T).toarray().ravel()
+
     def compute_similarities(self, articles: List[Dict]) -> List[Tuple[int, float]]:
         """
         사용자 프로필과 논문들 간의 유사도 계산
@@ -109,29 +222,12 @@ class DocumentVectorizer:
             logger.warning("No articles to compare")
             return []
 
-        # Prepare article texts
-        article_texts = []
-        for article in articles:
-            text_parts = []
-
-            if article.get('title'):
-                text_parts.append(article['title'])
-
-            if article.get('abstract'):
-                text_parts.append(article['abstract'])
-
-            article_texts.append(' '.join(text_parts))
-
-        # Vectorize articles
         try:
-            article_vectors = self.vectorizer.transform(article_texts)
-
-            # Compute cosine similarities
-            similarities = cosine_similarity(self.user_vector, article_vectors)[0]
+            similarities = self._score_articles(articles)
 
-            # Create (index, score) pairs and sort
-            scored_articles = [(i, score) for i, score in enumerate(similarities)]
-            scored_articles.sort(key=lambda x: x[1], reverse=True)
+            # Sort by score descending (stable, so ties keep article order)
+            order = np.argsort(-similarities, kind='stable')
+            scored_articles = [(int(i), float(similarities[i])) for i in order]
 
             logger.debug(f"Computed similarities for {len(articles)} articles")
             logger.debug(f"  Top score: {scored_articles[0][1]:.4f}")
@@ -143,6 +239,63 @@ class DocumentVectorizer:
             logger.error(f"Failed to compute similarities: {e}")
             raise
 
+    def compute_top_k(self, articles: List[Dict], k: int) -> List[Tuple[int, float]]:
+        """
+        유사도 상위 k개 논문만 계산 (전체 정렬 없이)
+
+        Args:
+            articles: List of dicts with 'title', 'abstract'
+            k: 상위 몇 개
+
+        Returns:
+            List of up to k (index, similarity_score) tuples, sorted by score descending
+        """
+        if self.user_vector is None:
+            raise ValueError("User profile not built yet. Call build_user_profile first.")
+
+        if not articles or k <= 0:
+            return []
+
+        try:
+            similarities = self._score_articles(articles)
+
+            if k < len(similarities):
+                # O(N) selection of the k best, then sort only those
+                top = np.argpartition(-similarities, k - 1)[:k]
+            else:
+                top = np.arange(len(similarities))
+            top = top[np.argsort(-similarities[top], kind='stable')]
+
+            return [(int(i), float(similarities[i])) for i in top]
+
+        except Exception as e:
+            logger.error(f"Failed to compute top-k similarities: {e}")
+            raise
+
+    @staticmethod
+    def _top_k_sparse(vector, k: int) -> List[Tuple[int, float]]:
+        """
+        1행 희소 벡터에서 값이 큰 상위 k개 (feature index, score)
+
+        Works on the CSR data/indices arrays directly instead of densifying the
+        whole max_features-long row.
+        """
+        row = vector.tocsr()
+        data, indices = row.data, row.indices
+        positive = data > 0
+        data, indices = data[positive], indices[positive]
+
+        if k <= 0 or len(data) == 0:
+            return []
+
+        if len(data) > k:
+            top = np.argpartition(-data, k - 1)[:k]
+        else:
+            top = np.arange(len(data))
+        top = top[np.argsort(-data[top], kind='stable')]
+
+        return [(int(indices[i]), float(data[i])) for i in top]
+
     def explain_similarity(self, article_text: str, top_k: int = 5) -> List[Tuple[str, float]]:
         """
         유사도의 근거가 되는 상위 키워드 추출
@@ -159,19 +312,13 @@ class DocumentVectorizer:
 
         try:
             # Vectorize article
-            article_vector = self.vectorizer.transform([article_text])
+            article_vector = self.vectorizer.transform([article_text.lower()])
 
             # Get feature names
             feature_names = self.vectorizer.get_feature_names_out()
 
-            # Get article's TF-IDF scores
-            article_scores = article_vector.toarray()[0]
-
-            # Get top keywords for article
-            top_indices = article_scores.argsort()[-top_k:][::-1]
-            top_keywords = [(feature_names[i], article_scores[i]) for i in top_indices if article_scores[i] > 0]
-
-            return top_keywords
+            # Get top keywords for article from its non-zero TF-IDF scores
+            return [(feature_names[i], score) for i, score in self._top_k_sparse(article_vector, top_k)]
 
         except Exception as e:
             logger.error(f"Failed to explain similarity: {e}")
@@ -188,7 +335,7 @@ class DocumentVectorizer:
         Returns:
             List of common keywords
         """
-        if self.user_vector is None or not self.user_text:
+        if self.user_vector is None:
             return []
 
         try:
@@ -197,10 +344,8 @@ class DocumentVectorizer:
             article_keyword_set = {kw for kw, _ in article_keywords}
 
             # Get user profile keywords
-            user_vector_dense = self.user_vector.toarray()[0]
             feature_names = self.vectorizer.get_feature_names_out()
-            top_user_indices = user_vector_dense.argsort()[-top_k * 2:][::-1]
-            user_keywords = {feature_names[i] for i in top_user_indices if user_vector_dense[i] > 0}
+            user_keywords = {feature_names[i] for i, _ in self._top_k_sparse(self.user_vector, top_k * 2)}
 
             # Find intersection
             common = list(article_keyword_set & user_keywords)[:top_k]
@@ -2,13 +2,82 @@
 통합 검색 엔진 (FTS5 기반)
 """
 import logging
-from typing import List, Dict, Optional
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Iterator
 from dataclasses import dataclass, field
 
+from data.database import SEARCH_INDEX_SCHEMA
+
 logger = logging.getLogger(__name__)
 
+# Separators for the unicode61 tokenizer: anything that is not a word character
+_FTS_TOKEN_SPLIT_RE = re.compile(r'\W+')
 
-@dataclass
+# MATCH expression that matches nothing
+EMPTY_FTS_QUERY = '""'
+
+# Tokens of matched context returned per hit (snippet() instead of full content)
+_SNIPPET_TOKENS = 16
+
+# search_documents_only: hits kept per document, and the token overlap
+# (Jaccard) above which a further hit counts as redundant
+_MAX_HITS_PER_DOC = 3
+_MAX_HIT_OVERLAP = 0.5
+
+# Result rows of recent searches kept in memory (repeated keystrokes, paging)
+_RESULT_CACHE_SIZE = 128
+
+# Compact, immutable result objects where supported (dataclass slots need 3.10+)
+_RESULT_DATACLASS_OPTIONS = {'frozen': True}
+if sys.version_info >= (3, 10):
+    _RESULT_DATACLASS_OPTIONS['slots'] = True
+
+
+def sanitize_fts_query(query: str) -> str:
+    """
+    사용자 입력을 안전한 FTS5 MATCH 식으로 변환
+
+    - "..."로 감싼 입력은 하나의 phrase로 검색
+    - 그 외에는 단어별로 나눠 각각 "..."로 감싸고 암묵적 AND로 연결
+      (-, :, (, * 등 FTS5 연산자 문자가 구문 오류를 내지 않음)
+    - 마지막 단어는 입력 중 검색을 위해 prefix 검색("word"*)
+    - 1글자 영문/숫자 토큰은 제외 (한글 등 비ASCII 1글자는 유지)
+
+    Returns:
+        MATCH 식, 검색할 단어가 없으면 EMPTY_FTS_QUERY
+    """
+    query = query.strip()
+
+    # Explicit phrase query
+    if len(query) >= 2 and query[0] == query[-1] == '"':
+        phrase = query[1:-1].strip()
+        if not phrase:
+            return EMPTY_FTS_QUERY
+        return '"' + phrase.replace('"', '""') + '"'
+
+    tokens = [
+        token for token in _FTS_TOKEN_SPLIT_RE.split(query.lower())
+        if len(token) > 1 or (token and not token.isascii())
+    ]
+    if not tokens:
+        return EMPTY_FTS_QUERY
+
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _jaccard(a: set, b: set) -> float:
+    """Jaccard similarity of two token sets"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass(**_RESULT_DATACLASS_OPTIONS)
 class SearchResult:
     """검색 결과 항목"""
     result_type: str  # 'title', 'abstract', 'annotation', 'tag'
@@ -44,10 +113,13 @@ class SearchEngine:
     def __init__(self, workspace):
         self.workspace = workspace
         self.db = workspace.get_database()
+        # (fts_query, content_types, limit, library_version) -> result rows, in LRU order
+        self._result_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
 
     def search(self, query: str, content_types: List[str] = None, limit: int = 100) -> SearchResults:
         """
-        통합 검색 수행
+        통합 검색 수행 (search_iter 결과를 모두 모은 편의 함수)
 
         Args:
             query: 검색 쿼리
@@ -64,94 +136,182 @@ class SearchEngine:
         query = query.strip()
         results = SearchResults(query=query, total_count=0)
 
-        conn = self.db.connect()
-        cursor = conn.cursor()
+        try:
+            for result in self.search_iter(query, content_types, limit):
+                results.add_result(result)
+
+            logger.info(f"Search '{query}' returned {results.total_count} results")
+
+        except Exception as e:
+            logger.error(f"Search failed: {e}", exc_info=True)
+
+        return results
+
+    def search_iter(self, query: str, content_types: List[str] = None, limit: int = 100) -> Iterator[SearchResult]:
+        """
+        통합 검색 결과를 rank 순으로 하나씩 생성
+
+        At most `limit` rows are read (and the pooled reader released) before
+        the first yield; SearchResult objects are built only as the caller
+        consumes them, so one that stops early skips building the rest.
+
+        Args:
+            query: 검색 쿼리
+            content_types: 검색 대상 타입 리스트 (None이면 전체)
+            limit: 최대 결과 개수
+
+        Yields:
+            SearchResult
+        """
+        if not query or not query.strip():
+            return
 
         # Build FTS5 query
-        fts_query = self._build_fts_query(query)
+        fts_query = self._build_fts_query(query.strip())
+        if fts_query == EMPTY_FTS_QUERY:
+            return
 
-        # Build WHERE clause for content types
-        where_conditions = ["search_index MATCH ?"]
-        params = [fts_query]
+        # Run MATCH on its own in a CTE so FTS5 produces the bm25-ranked top-k
+        # first; only those (narrow) rows are joined and get a text snippet.
+        # content_type is a search_index column, so the type filter belongs
+        # inside the CTE: filtering after LIMIT would drop lower-ranked types
+        type_filter = ""
+        type_params = []
 
         if content_types:
             placeholders = ','.join(['?' for _ in content_types])
-            where_conditions.append(f"content_type IN ({placeholders})")
-            params.extend(content_types)
-
-        where_clause = " AND ".join(where_conditions)
+            type_filter = f"AND content_type IN ({placeholders})"
+            type_params = list(content_types)
 
         # Execute search
         sql = f"""
+            WITH fts_matches AS (
+                SELECT rowid, content_type, doc_id, annotation_id, tag_id,
+                       bm25(search_index) AS score
+                FROM search_index
+                WHERE search_index MATCH ?
+                {type_filter}
+                ORDER BY score
+                LIMIT ?
+            ),
+            ranked AS (
+                SELECT
+                    m.rowid AS match_rowid,
+                    m.content_type,
+                    m.doc_id,
+                    m.annotation_id,
+                    m.tag_id,
+                    m.score,
+                    d.title,
+                    d.year,
+                    d.authors,
+                    a.page_number
+                FROM fts_matches m
+                JOIN documents d ON m.doc_id = d.doc_id
+                LEFT JOIN annotations a ON m.annotation_id = a.annotation_id
+            )
             SELECT
-                si.content_type,
-                si.content,
-                si.doc_id,
-                si.annotation_id,
-                si.tag_id,
-                si.rank,
-                d.title,
-                d.year,
-                d.authors,
-                a.page_number
-            FROM search_index si
-            JOIN documents d ON si.doc_id = d.doc_id
-            LEFT JOIN annotations a ON si.annotation_id = a.annotation_id
-            WHERE {where_clause}
-            ORDER BY si.rank
-            LIMIT ?
+                r.content_type,
+                snippet(search_index, 1, '', '', '…', {_SNIPPET_TOKENS}),
+                r.doc_id,
+                r.annotation_id,
+                r.tag_id,
+                r.score,
+                r.title,
+                r.year,
+                r.authors,
+                r.page_number
+            FROM ranked r
+            JOIN search_index ON search_index.rowid = r.match_rowid
+            WHERE search_index MATCH ?
+            ORDER BY r.score
         """
 
-        params.append(limit)
-
-        try:
-            rows = cursor.execute(sql, params).fetchall()
-
-            for row in rows:
-                result = SearchResult(
-                    result_type=row[0],
-                    matched_text=row[1],
-                    doc_id=row[2],
-                    annotation_id=row[3],
-                    tag_id=row[4],
-                    rank=row[5],
-                    title=row[6] or "Untitled",
-                    year=row[7],
-                    authors=row[8],
-                    page_number=row[9]
-                )
-                results.add_result(result)
-
-            logger.info(f"Search '{query}' returned {results.total_count} results")
-
-        except Exception as e:
-            logger.error(f"Search failed: {e}", exc_info=True)
-
-        return results
+        # snippet() needs a MATCH cursor, so the final rows are re-matched by
+        # rowid; only the returned rows get a snippet built
+        params = [fts_query] + type_params + [limit, fts_query]
+
+        # Identical queries (e.g. repeated keystrokes) are served from an
+        # in-process cache until the library changes; the version is read
+        # before the query, so a concurrent write can only make an entry miss.
+        # Never yield while holding the reader: an abandoned generator would
+        # keep it checked out of the pool
+        with self.db.acquire_reader() as conn:
+            library_version = self.db.get_library_version(conn)
+            cache_key = (fts_query, tuple(sorted(content_types or [])), limit, library_version)
+
+            rows = None
+            if library_version is not None:
+                with self._result_cache_lock:
+                    rows = self._result_cache.get(cache_key)
+                    if rows is not None:
+                        self._result_cache.move_to_end(cache_key)
+
+            if rows is None:
+                rows = tuple(tuple(row) for row in conn.execute(sql, params))
+                if library_version is not None:
+                    with self._result_cache_lock:
+                        self._result_cache[cache_key] = rows
+                        while len(self._result_cache) > _RESULT_CACHE_SIZE:
+                            self._result_cache.popitem(last=False)
+
+        for row in rows:
+            yield self._make_result(row)
+
+    @staticmethod
+    def _make_result(row) -> SearchResult:
+        """검색 쿼리 결과 행 -> SearchResult"""
+        return SearchResult(
+            result_type=row[0],
+            matched_text=row[1],
+            doc_id=row[2],
+            annotation_id=row[3],
+            tag_id=row[4],
+            rank=row[5],
+            title=row[6] or "Untitled",
+            year=row[7],
+            authors=row[8],
+            page_number=row[9]
+        )
 
     def search_documents_only(self, query: str, limit: int = 50) -> List[Dict]:
         """
         문서만 검색 (제목, 초록)
         간단한 인터페이스용
+
+        문서당 최대 3개 결과: 가장 순위가 높은 결과 + 내용이 충분히 다른 결과
         """
         results = self.search(query, content_types=['title', 'abstract'], limit=limit)
 
-        # Deduplicate by doc_id
-        seen_docs = set()
+        # Best-ranked hit first (bm25: lower is better)
+        ranked = sorted(
+            (result for result_list in results.results_by_type.values() for result in result_list),
+            key=lambda result: result.rank
+        )
+
+        # Diversify per document: besides its best hit, a document may add a
+        # few more hits whose text is clearly different from those already kept
+        kept_tokens: Dict[int, List[set]] = {}
         documents = []
 
-        for result_type, result_list in results.results_by_type.items():
-            for result in result_list:
-                if result.doc_id not in seen_docs:
-                    seen_docs.add(result.doc_id)
-                    documents.append({
-                        'doc_id': result.doc_id,
-                        'title': result.title,
-                        'year': result.year,
-                        'authors': result.authors,
-                        'matched_in': result_type,
-                        'matched_text': result.matched_text[:100]
-                    })
+        for result in ranked:
+            tokens = set(result.matched_text.lower().split())
+            previous = kept_tokens.setdefault(result.doc_id, [])
+
+            if len(previous) >= _MAX_HITS_PER_DOC:
+                continue
+            if any(_jaccard(tokens, other) >= _MAX_HIT_OVERLAP for other in previous):
+                continue
+
+            previous.append(tokens)
+            documents.append({
+                'doc_id': result.doc_id,
+                'title': result.title,
+                'year': result.year,
+                'authors': result.authors,
+                'matched_in': result.result_type,
+                'matched_text': result.matched_text
+            })
 
         return documents
 
@@ -180,43 +340,25 @@ class SearchEngine:
 
     def search_by_tag(self, tag_name: str) -> List[int]:
         """
-        태그로 문서 검색
+        태그로 문서 검색 (태그 이름 앞부분 일치, 대소문자 무시)
         Returns: doc_id 리스트
         """
-        conn = self.db.connect()
-        cursor = conn.cursor()
+        # Prefix pattern so the NOCASE tag_name index can be used
+        escaped = tag_name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
 
-        results = cursor.execute("""
-            SELECT DISTINCT dt.doc_id
-            FROM document_tags dt
-            JOIN tags t ON dt.tag_id = t.tag_id
-            WHERE t.tag_name LIKE ?
-        """, (f"%{tag_name}%",)).fetchall()
+        with self.db.acquire_reader() as conn:
+            results = conn.execute("""
+                SELECT DISTINCT dt.doc_id
+                FROM tags t
+                JOIN document_tags dt ON dt.tag_id = t.tag_id
+                WHERE t.tag_name LIKE ? ESCAPE '\\'
+            """, (f"{escaped}%",)).fetchall()
 
         return [row[0] for row in results]
 
     def _build_fts_query(self, query: str) -> str:
-        """
-        FTS5 쿼리 문자열 생성
-
-        간단한 버전: 각 단어를 OR로 연결
-        """
-        # Split query into words
-        words = query.split()
-
-        # Escape special characters
-        escaped_words = []
-        for word in words:
-            # Remove special FTS5 characters
-            word = word.replace('"', '')
-            if word:
-                escaped_words.append(word)
-
-        # Join with OR
-        if len(escaped_words) == 1:
-            return escaped_words[0]
-        else:
-            return ' OR '.join(escaped_words)
+        """FTS5 쿼리 문자열 생성 (sanitize_fts_query 참고)"""
+        return sanitize_fts_query(query)
 
     def rebuild_index(self):
         """
@@ -228,58 +370,67 @@ class SearchEngine:
 
         logger.info("Rebuilding search index...")
 
-        # Clear existing index
-        cursor.execute("DELETE FROM search_index")
+        # One write transaction for the whole rebuild: a single journal
+        # commit instead of one per inserted row
+        if conn.in_transaction:
+            conn.commit()
+        cursor.execute("BEGIN IMMEDIATE")
 
-        # Re-index documents
-        self._index_all_documents(cursor)
+        try:
+            # Recreate the index instead of DELETE-ing every row, which would
+            # only write tombstones into the existing FTS segments
+            cursor.execute("DROP TABLE IF EXISTS search_index")
+            cursor.execute(SEARCH_INDEX_SCHEMA.format(if_not_exists=""))
+            self.db.clear_cached_results(conn)
+            self.db.bump_library_version(conn)
 
-        # Re-index annotations
-        self._index_all_annotations(cursor)
+            # Re-index documents
+            self._index_all_documents(cursor)
 
-        # Re-index tags
-        self._index_all_tags(cursor)
+            # Re-index annotations
+            self._index_all_annotations(cursor)
+
+            # Re-index tags
+            self._index_all_tags(cursor)
+
+            # Merge the freshly written segments into one b-tree
+            cursor.execute("INSERT INTO search_index(search_index) VALUES('optimize')")
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
 
-        conn.commit()
         logger.info("Search index rebuilt successfully")
 
     def _index_all_documents(self, cursor):
         """문서 제목, 초록 인덱싱"""
         docs = cursor.execute("SELECT doc_id, title, abstract FROM documents").fetchall()
 
-        for doc in docs:
-            doc_id, title, abstract = doc
-
-            # Index title
-            if title:
-                cursor.execute("""
-                    INSERT INTO search_index (content_type, content, doc_id, annotation_id, tag_id)
-                    VALUES ('title', ?, ?, NULL, NULL)
-                """, (title, doc_id))
+        # Index titles
+        cursor.executemany("""
+            INSERT INTO search_index (content_type, content, doc_id, annotation_id, tag_id)
+            VALUES ('title', ?, ?, NULL, NULL)
+        """, ((title, doc_id) for doc_id, title, _ in docs if title))
 
-            # Index abstract
-            if abstract:
-                cursor.execute("""
-                    INSERT INTO search_index (content_type, content, doc_id, annotation_id, tag_id)
-                    VALUES ('abstract', ?, ?, NULL, NULL)
-                """, (abstract, doc_id))
+        # Index abstracts
+        cursor.executemany("""
+            INSERT INTO search_index (content_type, content, doc_id, annotation_id, tag_id)
+            VALUES ('abstract', ?, ?, NULL, NULL)
+        """, ((abstract, doc_id) for doc_id, _, abstract in docs if abstract))
 
         logger.debug(f"Indexed {len(docs)} documents")
 
     def _index_all_annotations(self, cursor):
         """모든 메모 인덱싱"""
-        annotations = cursor.execute("""
-            SELECT annotation_id, doc_id, content FROM annotations
-        """).fetchall()
-
-        for ann in annotations:
-            annotation_id, doc_id, content = ann
-            cursor.execute("""
-                INSERT INTO search_index (content_type, content, doc_id, annotation_id, tag_id)
-                VALUES ('annotation', ?, ?, ?, NULL)
-            """, (content, doc_id, annotation_id))
+        # Stream annotations straight into the index
+        cursor.execute("""
+            INSERT INTO search_index (content_type, content, doc_id, annotation_id, tag_id)
+            SELECT 'annotation', content, doc_id, annotation_id, NULL
+            FROM annotations
+        """)
 
-        logger.debug(f"Indexed {len(annotations)} annotations")
+        logger.debug(f"Indexed {cursor.rowcount} annotations")
 
     def _index_all_tags(self, cursor):
         """모든 태그 인덱싱"""
@@ -295,17 +446,15 @@ class SearchEngine:
 
     def get_index_stats(self) -> Dict:
         """인덱스 통계"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
         stats = {}
 
         # Count by type
-        results = cursor.execute("""
-            SELECT content_type, COUNT(*) as count
-            FROM search_index
-            GROUP BY content_type
-        """).fetchall()
+        with self.db.acquire_reader() as conn:
+            results = conn.execute("""
+                SELECT content_type, COUNT(*) as count
+                FROM search_index
+                GROUP BY content_type
+            """).fetchall()
 
         for row in results:
             stats[row[0]] = row[1]
@@ -2,13 +2,108 @@
 Duplicate Paper Detector
 Detects duplicate documents using various methods
 """
+import json
 import logging
+import os
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Tuple, Optional
 from difflib import SequenceMatcher
 import re
 
+try:
+    from rapidfuzz.fuzz import ratio as _fuzz_ratio
+except ImportError:  # Optional: fall back to difflib
+    _fuzz_ratio = None
+
 logger = logging.getLogger(__name__)
 
+# Runs of punctuation, replaced by a space when normalizing titles
+_PUNCT_RE = re.compile(r'[^\w\s]+')
+
+# Parallel scoring pays off only past this many candidate pairs: rapidfuzz
+# scores a pair in ~1 us, while starting a spawn pool (Windows/macOS) measured
+# ~0.23 s bare, and workers also re-import the app's __main__ (PySide6, fitz)
+_PARALLEL_MIN_PAIRS = 1_000_000
+
+# Shards per worker process, so uneven windows still spread over all cores
+_SHARDS_PER_WORKER = 4
+
+# Set once per worker process by _init_pair_worker
+_worker_strings: List[str] = []
+_worker_order: List[int] = []
+_worker_ends: List[int] = []
+
+
+def _init_pair_worker(strings: List[str], order: List[int], ends: List[int]):
+    """ProcessPoolExecutor initializer: ship the strings and their length windows once per worker"""
+    global _worker_strings, _worker_order, _worker_ends
+    _worker_strings, _worker_order, _worker_ends = strings, order, ends
+
+
+def _score_window_shard(start: int, stop: int, threshold: float) -> List[Tuple[int, int, float]]:
+    """Worker: _score_windows for one range of the length-sorted order"""
+    return _score_windows(_worker_strings, _worker_order, _worker_ends, start, stop, threshold)
+
+
+def _score_windows(strings: List[str], order: List[int], ends: List[int],
+                   start: int, stop: int, threshold: float) -> List[Tuple[int, int, float]]:
+    """
+    (i, j, similarity) reaching threshold for each string at order[start:stop]
+    against the rest of its length window, order[pos + 1:ends[pos]]
+
+    Candidate pairs are generated as they are scored, never collected.
+    """
+    scored = []
+    for pos in range(start, stop):
+        i = order[pos]
+        for j in order[pos + 1:ends[pos]]:
+            similarity = DuplicateDetector._similarity_at_least(strings[i], strings[j], threshold)
+            if similarity >= threshold:
+                scored.append((min(i, j), max(i, j), similarity))
+    return scored
+
+
+class _UnionFind:
+    """Disjoint sets of doc_ids (union by rank, path halving)"""
+
+    def __init__(self):
+        self._parent: Dict[int, int] = {}
+        self._rank: Dict[int, int] = {}
+
+    def __contains__(self, item: int) -> bool:
+        return item in self._parent
+
+    def __iter__(self):
+        return iter(self._parent)
+
+    def find(self, item: int) -> int:
+        parent = self._parent
+        if item not in parent:
+            parent[item] = item
+            self._rank[item] = 0
+            return item
+
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> int:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+
+        if self._rank[root_a] < self._rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        if self._rank[root_a] == self._rank[root_b]:
+            self._rank[root_a] += 1
+        return root_a
+
+    def connected(self, a: int, b: int) -> bool:
+        return a in self._parent and b in self._parent and self.find(a) == self.find(b)
+
 
 class DuplicateDetector:
     """Detects duplicate papers in the library"""
@@ -27,109 +122,138 @@ class DuplicateDetector:
             - 'confidence': Confidence score (0-1)
         """
         db = self.workspace.get_database()
-        conn = db.connect()
-        cursor = conn.cursor()
-
-        # Get all documents
-        docs = cursor.execute("SELECT * FROM documents").fetchall()
-        docs = [dict(doc) for doc in docs]
-
-        logger.info(f"Checking {len(docs)} documents for duplicates")
-
-        duplicate_groups = []
-
-        # 1. Check by file hash (exact duplicates)
-        hash_groups = self._group_by_hash(docs)
-        for group in hash_groups:
-            if len(group) > 1:
-                duplicate_groups.append({
-                    'docs': group,
-                    'reason': 'Identical file (same hash)',
-                    'confidence': 1.0
-                })
-
-        # 2. Check by DOI
-        doi_groups = self._group_by_doi(docs)
-        for group in doi_groups:
-            if len(group) > 1:
-                # Check if not already found by hash
-                if not self._already_grouped(group, duplicate_groups):
-                    duplicate_groups.append({
-                        'docs': group,
-                        'reason': 'Same DOI',
-                        'confidence': 1.0
-                    })
-
-        # 3. Check by title similarity
-        title_duplicates = self._find_similar_titles(docs)
-        for group_info in title_duplicates:
-            if not self._already_grouped(group_info['docs'], duplicate_groups):
-                duplicate_groups.append(group_info)
-
-        # 4. Check by title + authors
-        author_duplicates = self._find_similar_title_author(docs)
-        for group_info in author_duplicates:
-            if not self._already_grouped(group_info['docs'], duplicate_groups):
-                duplicate_groups.append(group_info)
+        cache_key = db.make_cache_key('duplicates')
+
+        with db.acquire_reader() as conn:
+            cursor = conn.cursor()
+
+            # The scan is stable until the library changes
+            library_version = db.get_library_version(conn)
+            if library_version is not None:
+                cached = db.get_cached_result(cache_key, library_version, conn)
+                if cached is not None:
+                    duplicate_groups = json.loads(cached)
+                    logger.info(f"Found {len(duplicate_groups)} duplicate groups (cached)")
+                    return duplicate_groups
+
+            doc_count = cursor.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            logger.info(f"Checking {doc_count} documents for duplicates")
+
+            # Every check links doc_ids into one disjoint set; each link is
+            # kept as evidence for the reason/confidence of its group
+            components = _UnionFind()
+            evidence = []
+
+            def link(group_docs: List[Dict], reason: str, confidence: float):
+                doc_ids = [doc['doc_id'] for doc in group_docs]
+                for doc_id in doc_ids[1:]:
+                    components.union(doc_ids[0], doc_id)
+                evidence.append((doc_ids, reason, confidence))
+
+            # 1. Check by file hash (exact duplicates)
+            for group in self._group_by_hash(cursor):
+                link(group, 'Identical file (same hash)', 1.0)
+
+            # 2. Check by DOI
+            for group in self._group_by_doi(cursor):
+                link(group, 'Same DOI', 1.0)
+
+            # Similarity passes only need titles and authors, and skip documents
+            # already matched exactly by hash/DOI
+            docs = [dict(row) for row in cursor.execute("""
+                SELECT doc_id, title, authors
+                FROM documents
+                WHERE title IS NOT NULL AND title <> ''
+                ORDER BY doc_id
+            """) if row['doc_id'] not in components]
+
+            # 3. Check by title similarity
+            for group_info in self._find_similar_titles(docs):
+                link(group_info['docs'], group_info['reason'], group_info['confidence'])
+
+            # 4. Check by title + authors
+            for group_info in self._find_similar_title_author(docs):
+                doc1, doc2 = group_info['docs']
+                if not components.connected(doc1['doc_id'], doc2['doc_id']):
+                    link(group_info['docs'], group_info['reason'], group_info['confidence'])
+
+            duplicate_groups = self._collect_groups(components, evidence)
+
+            # Load full rows only for documents that ended up in a group
+            self._hydrate_groups(cursor, duplicate_groups)
+
+        if library_version is not None:
+            db.put_cached_result(cache_key, library_version, json.dumps(duplicate_groups))
 
         logger.info(f"Found {len(duplicate_groups)} duplicate groups")
 
         return duplicate_groups
 
-    def _group_by_hash(self, docs: List[Dict]) -> List[List[Dict]]:
-        """Group documents by file hash"""
-        hash_map = {}
-
-        for doc in docs:
-            file_hash = doc.get('file_hash')
-            if file_hash:
-                if file_hash not in hash_map:
-                    hash_map[file_hash] = []
-                hash_map[file_hash].append(doc)
-
-        return [group for group in hash_map.values() if len(group) > 1]
-
-    def _group_by_doi(self, docs: List[Dict]) -> List[List[Dict]]:
-        """Group documents by DOI"""
-        doi_map = {}
-
-        for doc in docs:
-            doi = doc.get('doi')
-            if doi and doi.strip():
-                doi_normalized = self._normalize_doi(doi)
-                if doi_normalized not in doi_map:
-                    doi_map[doi_normalized] = []
-                doi_map[doi_normalized].append(doc)
+    @staticmethod
+    def _hydrate_groups(cursor, duplicate_groups: List[Dict]):
+        """Replace the doc stubs in each group with full document rows"""
+        doc_ids = sorted({doc['doc_id'] for group in duplicate_groups for doc in group['docs']})
+        if not doc_ids:
+            return
+
+        rows = cursor.execute(
+            "SELECT * FROM documents WHERE doc_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(doc_ids),)
+        ).fetchall()
+        full_docs = {row['doc_id']: dict(row) for row in rows}
+
+        for group in duplicate_groups:
+            group['docs'] = [full_docs.get(doc['doc_id'], doc) for doc in group['docs']]
+
+    @classmethod
+    def _group_by_hash(cls, cursor) -> List[List[Dict]]:
+        """Group documents by file hash (only hashes shared by several documents)"""
+        rows = cursor.execute("""
+            SELECT GROUP_CONCAT(doc_id)
+            FROM documents
+            WHERE file_hash IS NOT NULL AND file_hash <> ''
+            GROUP BY file_hash
+            HAVING COUNT(*) > 1
+        """).fetchall()
+
+        return cls._id_groups(rows)
+
+    @classmethod
+    def _group_by_doi(cls, cursor) -> List[List[Dict]]:
+        """Group documents by normalized DOI (only DOIs shared by several documents)"""
+        # Same normalization as _normalize_doi
+        rows = cursor.execute("""
+            SELECT GROUP_CONCAT(doc_id)
+            FROM documents
+            WHERE doi IS NOT NULL AND trim(doi) <> ''
+            GROUP BY trim(replace(replace(replace(lower(trim(doi)),
+                'https://doi.org/', ''), 'http://dx.doi.org/', ''), 'doi:', ''))
+            HAVING COUNT(*) > 1
+        """).fetchall()
+
+        return cls._id_groups(rows)
 
-        return [group for group in doi_map.values() if len(group) > 1]
+    @staticmethod
+    def _id_groups(rows) -> List[List[Dict]]:
+        """GROUP_CONCAT(doc_id) rows -> doc stub groups, ordered like the documents table"""
+        groups = [sorted(int(doc_id) for doc_id in row[0].split(',')) for row in rows]
+        groups.sort()
+        return [[{'doc_id': doc_id} for doc_id in group] for group in groups]
 
     def _find_similar_titles(self, docs: List[Dict], threshold: float = 0.9) -> List[Dict]:
         """Find documents with very similar titles"""
         duplicates = []
 
-        for i, doc1 in enumerate(docs):
-            title1 = doc1.get('title')
-            if not title1:
-                continue
-
-            title1_normalized = self._normalize_title(title1)
-
-            for doc2 in docs[i + 1:]:
-                title2 = doc2.get('title')
-                if not title2:
-                    continue
-
-                title2_normalized = self._normalize_title(title2)
+        # Normalize every title once
+        titled = [(i, self._normalize_title(doc['title'])) for i, doc in enumerate(docs) if doc.get('title')]
+        titles = [title for _, title in titled]
 
-                # Calculate similarity
-                similarity = self._string_similarity(title1_normalized, title2_normalized)
-
-                if similarity >= threshold:
-                    duplicates.append({
-                        'docs': [doc1, doc2],
-                        'reason': f'Very similar titles (similarity: {similarity:.2f})',
-                        'confidence': similarity
-                    })
+        for a, b, similarity in self._similar_pairs(titles, threshold):
+            duplicates.append({
+                'docs': [docs[titled[a][0]], docs[titled[b][0]]],
+                'reason': f'Very similar titles (similarity: {similarity:.2f})',
+                'confidence': similarity
+            })
 
         return duplicates
 
@@ -137,43 +261,107 @@ class DuplicateDetector:
         """Find documents with similar title AND same first author"""
         duplicates = []
 
-        for i, doc1 in enumerate(docs):
-            title1 = doc1.get('title')
-            authors1 = doc1.get('authors', '')
+        # Normalize titles and extract first authors once
+        entries = [
+            (i, self._normalize_title(doc['title']), self._get_first_author(doc['authors']))
+            for i, doc in enumerate(docs)
+            if doc.get('title') and doc.get('authors')
+        ]
+        titles = [title for _, title, _ in entries]
 
-            if not title1 or not authors1:
-                continue
+        # Both checks must pass, so pairs are blocked on title similarity first
+        for a, b, title_similarity in self._similar_pairs(titles, threshold):
+            first_author1, first_author2 = entries[a][2], entries[b][2]
 
-            title1_normalized = self._normalize_title(title1)
-            first_author1 = self._get_first_author(authors1)
+            # Check if same first author
+            if first_author1 and first_author2:
+                author_similarity = self._string_similarity(first_author1, first_author2)
 
-            for doc2 in docs[i + 1:]:
-                title2 = doc2.get('title')
-                authors2 = doc2.get('authors', '')
+                if author_similarity > 0.8:
+                    combined_confidence = (title_similarity + author_similarity) / 2
+                    duplicates.append({
+                        'docs': [docs[entries[a][0]], docs[entries[b][0]]],
+                        'reason': f'Similar title + same author (confidence: {combined_confidence:.2f})',
+                        'confidence': combined_confidence
+                    })
+
+        return duplicates
 
-                if not title2 or not authors2:
-                    continue
+    @classmethod
+    def _similar_pairs(cls, strings: List[str], threshold: float) -> List[Tuple[int, int, float]]:
+        """
+        All (i, j, similarity) pairs with i < j and similarity >= threshold
 
-                title2_normalized = self._normalize_title(title2)
-                first_author2 = self._get_first_author(authors2)
+        Similarity is 2*M / (len1 + len2), so with len1 <= len2 it can only
+        reach the threshold when len2 <= len1 * (2 - threshold) / threshold.
+        Strings are sorted by length and each one is compared only against
+        that length window instead of every other string.
+        """
+        if threshold <= 0:
+            max_growth = float('inf')
+        else:
+            max_growth = (2 - threshold) / threshold
+
+        order = sorted(range(len(strings)), key=lambda k: len(strings[k]))
+        lengths = [len(strings[k]) for k in order]
+        # End of each position's length window (exclusive)
+        ends = [bisect_right(lengths, length * max_growth, pos + 1) for pos, length in enumerate(lengths)]
+
+        # Window sizes are known up front, so the work is counted, not materialized
+        pair_counts = [end - pos - 1 for pos, end in enumerate(ends)]
+        if sum(pair_counts) >= _PARALLEL_MIN_PAIRS:
+            pairs = cls._score_windows_parallel(strings, order, ends, pair_counts, threshold)
+        else:
+            pairs = _score_windows(strings, order, ends, 0, len(order), threshold)
+
+        # Report pairs in document order, as the pairwise scan did
+        pairs.sort()
+        return pairs
+
+    @staticmethod
+    def _score_windows_parallel(strings: List[str], order: List[int], ends: List[int],
+                                pair_counts: List[int], threshold: float) -> List[Tuple[int, int, float]]:
+        """Score the length windows across CPU cores (string comparison holds the GIL)"""
+        workers = os.cpu_count() or 1
+        if workers < 2:
+            return _score_windows(strings, order, ends, 0, len(order), threshold)
+
+        # Contiguous ranges of the sorted order holding about the same number of pairs
+        shard_pairs = -(-sum(pair_counts) // (workers * _SHARDS_PER_WORKER))
+        shards = []
+        start = pairs_in_shard = 0
+        for pos, count in enumerate(pair_counts):
+            pairs_in_shard += count
+            if pairs_in_shard >= shard_pairs:
+                shards.append((start, pos + 1))
+                start, pairs_in_shard = pos + 1, 0
+        if start < len(order):
+            shards.append((start, len(order)))
 
-                # Check if same first author
-                if first_author1 and first_author2:
-                    author_similarity = self._string_similarity(first_author1, first_author2)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_pair_worker,
+                                     initargs=(strings, order, ends)) as executor:
+                futures = [executor.submit(_score_window_shard, start, stop, threshold)
+                           for start, stop in shards]
+                return [pair for future in futures for pair in future.result()]
+        except Exception as e:
+            logger.warning(f"Parallel duplicate scan failed, falling back to a single process: {e}")
+            return _score_windows(strings, order, ends, 0, len(order), threshold)
 
-                    if author_similarity > 0.8:
-                        # Calculate title similarity
-                        title_similarity = self._string_similarity(title1_normalized, title2_normalized)
+    @staticmethod
+    def _similarity_at_least(s1: str, s2: str, threshold: float) -> float:
+        """String similarity, or 0.0 as soon as it provably falls below threshold"""
+        if not s1 or not s2:
+            return 0.0
 
-                        if title_similarity >= threshold:
-                            combined_confidence = (title_similarity + author_similarity) / 2
-                            duplicates.append({
-                                'docs': [doc1, doc2],
-                                'reason': f'Similar title + same author (confidence: {combined_confidence:.2f})',
-                                'confidence': combined_confidence
-                            })
+        if _fuzz_ratio is not None:
+            return _fuzz_ratio(s1, s2, score_cutoff=threshold * 100) / 100
 
-        return duplicates
+        matcher = SequenceMatcher(None, s1, s2)
+        # Cheap upper bounds before the full Ratcliff/Obershelp match
+        if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+            return 0.0
+        return matcher.ratio()
 
     @staticmethod
     def _normalize_title(title: str) -> str:
@@ -181,13 +369,8 @@ class DuplicateDetector:
         # Lowercase
         title = title.lower()
 
-        # Remove punctuation
-        title = re.sub(r'[^\w\s]', ' ', title)
-
-        # Remove extra whitespace
-        title = ' '.join(title.split())
-
-        return title
+        # Remove punctuation, then collapse whitespace
+        return ' '.join(_PUNCT_RE.sub(' ', title).split())
 
     @staticmethod
     def _normalize_doi(doi: str) -> str:
@@ -224,21 +407,37 @@ class DuplicateDetector:
         if not s1 or not s2:
             return 0.0
 
+        if _fuzz_ratio is not None:
+            return _fuzz_ratio(s1, s2) / 100
+
         return SequenceMatcher(None, s1, s2).ratio()
 
     @staticmethod
-    def _already_grouped(docs: List[Dict], existing_groups: List[Dict]) -> bool:
-        """Check if these docs are already in a duplicate group"""
-        doc_ids = {doc['doc_id'] for doc in docs}
-
-        for group in existing_groups:
-            group_ids = {doc['doc_id'] for doc in group['docs']}
-
-            # If any overlap, consider already grouped
-            if doc_ids & group_ids:
-                return True
+    def _collect_groups(components: '_UnionFind', evidence: List[Tuple[List[int], str, float]]) -> List[Dict]:
+        """
+        One group per connected component, ordered by first detection
 
-        return False
+        The reason/confidence of a group is its strongest piece of evidence
+        (the earliest check wins ties: hash, DOI, title, title + author).
+        """
+        groups = {}
+        for doc_ids, reason, confidence in evidence:
+            root = components.find(doc_ids[0])
+            group = groups.get(root)
+            if group is None:
+                groups[root] = {'docs': [], 'reason': reason, 'confidence': confidence}
+            elif confidence > group['confidence']:
+                group['reason'], group['confidence'] = reason, confidence
+
+        for doc_id in components:
+            root = components.find(doc_id)
+            if root in groups:
+                groups[root]['docs'].append({'doc_id': doc_id})
+
+        for group in groups.values():
+            group['docs'].sort(key=lambda doc: doc['doc_id'])
+
+        return list(groups.values())
 
     def merge_duplicates(self, doc_ids_to_keep: List[int], doc_ids_to_remove: List[int]) -> bool:
         """
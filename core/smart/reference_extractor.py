@@ -9,6 +9,22 @@ import fitz  # PyMuPDF
 
 logger = logging.getLogger(__name__)
 
+# Reference section header / end-of-section headings
+_REF_HDR_RE = re.compile(r'(?i)\n\s*(?:References?|Bibliography|Literature Cited|Works Cited)\s*\n')
+_REF_END_RE = re.compile(r'(?i)\n\s*(?:Appendix|Supplementary|Acknowledgment|Author Contributions)')
+
+# Numbered reference markers: [1], 1. or (1)
+_REF_SPLIT_RE = re.compile(r'\n\s*(?:\[\d+\]|\d+\.|\(\d+\))\s+')
+
+# Reference field patterns
+_DOI_RE = re.compile(r'(?i)\b10\.\d{4,9}/[^\s,;]+')
+_YEAR_RE = re.compile(r'\((\d{4})\)|,\s*(\d{4})[,.]')
+_LEADING_NUMBER_RE = re.compile(r'^[\[\(]?\d+[\]\)]?\s*')
+_TITLE_Q_RE = re.compile(r'[""]([^""]+)[""]')
+_LEADING_PUNCT_RE = re.compile(r'^[,.\s]+')
+_FIRST_SENTENCE_RE = re.compile(r'^([^.]+\.)')
+_VOLUME_ISSUE_RE = re.compile(r'\d+\(\d+\)')
+
 
 class ReferenceExtractor:
     """Extracts and parses references from PDF documents"""
@@ -33,16 +49,23 @@ class ReferenceExtractor:
             # Open PDF
             doc = fitz.open(file_path)
 
-            # Extract text from all pages (focus on last pages where references usually are)
-            full_text = ""
+            # Extract plain text from the last pages, where references usually
+            # are. Walk backwards and stop at the page holding the references
+            # header; plain "text" extraction skips image decoding.
+            page_texts = []
             start_page = max(0, len(doc) - 10)  # Last 10 pages
+            text_flags = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_IMAGES
 
-            for page_num in range(start_page, len(doc)):
-                page = doc[page_num]
-                full_text += page.get_text()
+            for page_num in range(len(doc) - 1, start_page - 1, -1):
+                page_text = doc.load_page(page_num).get_text("text", flags=text_flags)
+                page_texts.append(page_text)
+                if self._find_references_start('\n' + page_text) is not None:
+                    break
 
             doc.close()
 
+            full_text = ''.join(reversed(page_texts))
+
             # Find references section
             references_text = self._find_references_section(full_text)
 
@@ -61,51 +84,29 @@ class ReferenceExtractor:
             logger.error(f"Failed to extract references from {file_path}: {e}", exc_info=True)
             return []
 
+    def _find_references_start(self, text: str) -> Optional[int]:
+        """Position right after the references/bibliography header, if any"""
+        match = _REF_HDR_RE.search(text)
+        return match.end() if match else None
+
     def _find_references_section(self, text: str) -> Optional[str]:
         """Find the references/bibliography section in text"""
-        # Common reference section headers
-        patterns = [
-            r'(?i)\n\s*References?\s*\n',
-            r'(?i)\n\s*Bibliography\s*\n',
-            r'(?i)\n\s*Literature Cited\s*\n',
-            r'(?i)\n\s*Works Cited\s*\n',
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                # Get text from this point onwards
-                start_pos = match.end()
-
-                # Try to find end of references (next section)
-                end_patterns = [
-                    r'(?i)\n\s*Appendix',
-                    r'(?i)\n\s*Supplementary',
-                    r'(?i)\n\s*Acknowledgment',
-                    r'(?i)\n\s*Author Contributions',
-                ]
-
-                end_pos = len(text)
-                for end_pattern in end_patterns:
-                    end_match = re.search(end_pattern, text[start_pos:])
-                    if end_match:
-                        end_pos = start_pos + end_match.start()
-                        break
-
-                return text[start_pos:end_pos]
-
-        return None
+        start_pos = self._find_references_start(text)
+        if start_pos is None:
+            return None
+
+        # Try to find end of references (next section)
+        end_match = _REF_END_RE.search(text, start_pos)
+        end_pos = end_match.start() if end_match else len(text)
+
+        return text[start_pos:end_pos]
 
     def _parse_references(self, references_text: str) -> List[Dict]:
         """Parse individual references from references section"""
         references = []
 
         # Split by numbered references [1], [2], etc. or by double newlines
-        # Pattern for numbered references: [1] or 1. or (1)
-        split_pattern = r'\n\s*(?:\[\d+\]|\d+\.|\(\d+\))\s+'
-
-        # Split the text
-        parts = re.split(split_pattern, references_text)
+        parts = _REF_SPLIT_RE.split(references_text)
 
         # Remove empty parts
         parts = [p.strip() for p in parts if p.strip()]
@@ -141,12 +142,12 @@ class ReferenceExtractor:
         }
 
         # Extract DOI
-        doi_match = re.search(r'(?i)doi:?\s*([^\s,]+)', ref_text)
+        doi_match = _DOI_RE.search(ref_text)
         if doi_match:
-            result['doi'] = doi_match.group(1).strip()
+            result['doi'] = doi_match.group(0).rstrip('.')
 
         # Extract year (4 digits in parentheses or standalone)
-        year_match = re.search(r'\((\d{4})\)|,\s*(\d{4})[,.]', ref_text)
+        year_match = _YEAR_RE.search(ref_text)
         if year_match:
             result['year'] = int(year_match.group(1) or year_match.group(2))
 
@@ -154,12 +155,12 @@ class ReferenceExtractor:
         if year_match:
             authors_text = ref_text[:year_match.start()].strip()
             # Remove leading numbers/brackets
-            authors_text = re.sub(r'^[\[\(]?\d+[\]\)]?\s*', '', authors_text)
+            authors_text = _LEADING_NUMBER_RE.sub('', authors_text)
             result['authors'] = authors_text[:200]  # Limit length
 
         # Extract title (text in quotes or after authors)
         # Look for text in quotes
-        title_match = re.search(r'[""]([^""]+)[""]', ref_text)
+        title_match = _TITLE_Q_RE.search(ref_text)
         if title_match:
             result['title'] = title_match.group(1).strip()
         elif year_match:
@@ -167,14 +168,14 @@ class ReferenceExtractor:
             title_start = year_match.end()
             remaining = ref_text[title_start:].strip()
             # Remove leading punctuation
-            remaining = re.sub(r'^[,.\s]+', '', remaining)
+            remaining = _LEADING_PUNCT_RE.sub('', remaining)
             # Get text until next period (but not DOI or URL)
-            title_match = re.search(r'^([^.]+\.)', remaining)
+            title_match = _FIRST_SENTENCE_RE.search(remaining)
             if title_match:
                 result['title'] = title_match.group(1).strip(' .')[:300]
 
         # Determine reference type (simple heuristic)
-        if 'journal' in ref_text.lower() or re.search(r'\d+\(\d+\)', ref_text):
+        if 'journal' in ref_text.lower() or _VOLUME_ISSUE_RE.search(ref_text):
             result['reference_type'] = 'article'
         elif 'proc.' in ref_text.lower() or 'conference' in ref_text.lower():
             result['reference_type'] = 'conference'
@@ -194,26 +195,28 @@ class ReferenceExtractor:
             with db.transaction() as conn:
                 cursor = conn.cursor()
 
+                # FK checks run once at commit instead of per inserted row
+                cursor.execute("PRAGMA defer_foreign_keys = ON")
+
                 # Delete existing references for this document
                 cursor.execute("DELETE FROM document_references WHERE doc_id = ?", (doc_id,))
 
                 # Insert new references
-                for ref in references:
-                    cursor.execute("""
-                        INSERT INTO document_references (
-                            doc_id, reference_text, title, authors, year, doi,
-                            reference_type, order_index
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        doc_id,
-                        ref['reference_text'],
-                        ref.get('title'),
-                        ref.get('authors'),
-                        ref.get('year'),
-                        ref.get('doi'),
-                        ref.get('reference_type', 'unknown'),
-                        ref.get('order_index', 0)
-                    ))
+                cursor.executemany("""
+                    INSERT INTO document_references (
+                        doc_id, reference_text, title, authors, year, doi,
+                        reference_type, order_index
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, ((
+                    doc_id,
+                    ref['reference_text'],
+                    ref.get('title'),
+                    ref.get('authors'),
+                    ref.get('year'),
+                    ref.get('doi'),
+                    ref.get('reference_type', 'unknown'),
+                    ref.get('order_index', 0)
+                ) for ref in references))
 
                 logger.info(f"Saved {len(references)} references for doc {doc_id}")
                 return True
@@ -225,14 +228,13 @@ class ReferenceExtractor:
     def get_references(self, doc_id: int) -> List[Dict]:
         """Get saved references for a document"""
         db = self.workspace.get_database()
-        conn = db.connect()
-        cursor = conn.cursor()
-
-        refs = cursor.execute("""
-            SELECT * FROM document_references
-            WHERE doc_id = ?
-            ORDER BY order_index
-        """, (doc_id,)).fetchall()
+
+        with db.acquire_reader() as conn:
+            refs = conn.execute("""
+                SELECT * FROM document_references
+                WHERE doc_id = ?
+                ORDER BY order_index
+            """, (doc_id,)).fetchall()
 
         return [dict(ref) for ref in refs]
 
@@ -2,14 +2,91 @@
 Smart Tag Suggester
 Suggests relevant tags based on document content
 """
+import functools
+import heapq
+import json
 import logging
+import os
 import re
-from typing import List, Dict, Set
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Set, Tuple, Optional
 from collections import Counter
 import fitz  # PyMuPDF
 
+try:
+    import ahocorasick  # pyahocorasick (optional)
+except ImportError:
+    ahocorasick = None
+
 logger = logging.getLogger(__name__)
 
+# Common stop words
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has',
+    'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may',
+    'might', 'can', 'this', 'that', 'these', 'those', 'we', 'our', 'they',
+    'their', 'it', 'its', 'from', 'by', 'as', 'which', 'who', 'when',
+    'where', 'how', 'why', 'what', 'such', 'both', 'each', 'few', 'more',
+    'most', 'other', 'some', 'also', 'than', 'then', 'so', 'if', 'about',
+    'into', 'through', 'during', 'before', 'after', 'above', 'below', 'up',
+    'down', 'out', 'over', 'under', 'again', 'further', 'once', 'here',
+    'there', 'all', 'any', 'no', 'nor', 'not', 'only', 'own', 'same', 'too',
+    'very'
+})
+
+# Terms too generic to be useful as tags
+_GENERIC_TERMS = frozenset({
+    'paper', 'study', 'research', 'method', 'result', 'conclusion',
+    'introduction', 'abstract', 'figure', 'table', 'show', 'propose',
+    'present', 'approach', 'problem', 'solution', 'system', 'based'
+})
+
+# Words never suggested as keyword tags
+_EXCLUDED_WORDS = _STOP_WORDS | _GENERIC_TERMS
+
+# Characters of PDF text sampled for suggestions
+_TEXT_SAMPLE_CHARS = 5000
+
+# Lowercase words of at least 4 characters
+_WORD_RE = re.compile(r'\b[a-z]{4,}\b')
+
+# Characters dropped from tag names (anything but word chars, whitespace, hyphen)
+_TAG_CLEAN_RE = re.compile(r'[^\w\s-]')
+
+# Fewest documents worth starting worker processes for in suggest_tags_batch
+_PARALLEL_MIN_DOCS = 8
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_text_sample(file_path: str, mtime_ns: int, max_pages: int) -> str:
+    """
+    Text of the first pages of a PDF, truncated to _TEXT_SAMPLE_CHARS
+
+    mtime_ns is part of the cache key only, so an edited file is re-read.
+    Failures raise and are therefore not cached.
+    """
+    doc = fitz.open(file_path)
+
+    try:
+        # Plain "text" extraction skips image decoding; stop reading pages
+        # once the sample is long enough
+        text_flags = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_IMAGES
+        parts = []
+        total = 0
+
+        for page_num in range(min(max_pages, doc.page_count)):
+            page_text = doc.load_page(page_num).get_text("text", flags=text_flags)
+            parts.append(page_text)
+            total += len(page_text)
+            if total >= _TEXT_SAMPLE_CHARS:
+                break
+    finally:
+        doc.close()
+
+    # Limit length
+    return ''.join(parts)[:_TEXT_SAMPLE_CHARS]
+
 
 class TagSuggester:
     """Suggests tags based on document content analysis"""
@@ -39,9 +116,54 @@ class TagSuggester:
         'benchmark': ['benchmark', 'evaluation', 'comparison', 'baseline'],
     }
 
+    # (keyword -> [(kind, category)], automaton or None), built on first use
+    _keyword_index = None
+
     def __init__(self, workspace):
         self.workspace = workspace
 
+    @classmethod
+    def _get_keyword_index(cls):
+        """Keyword owners over DOMAIN_KEYWORDS + METHOD_KEYWORDS, plus an Aho-Corasick automaton"""
+        if cls._keyword_index is None:
+            owners: Dict[str, List[Tuple[str, str]]] = {}
+            for kind, categories in (('domain', cls.DOMAIN_KEYWORDS), ('method', cls.METHOD_KEYWORDS)):
+                for category, keywords in categories.items():
+                    for keyword in keywords:
+                        owners.setdefault(keyword, []).append((kind, category))
+
+            automaton = None
+            if ahocorasick is not None:
+                automaton = ahocorasick.Automaton()
+                for keyword in owners:
+                    automaton.add_word(keyword, keyword)
+                automaton.make_automaton()
+
+            cls._keyword_index = (owners, automaton)
+
+        return cls._keyword_index
+
+    def _count_keyword_matches(self, lowered_text: str) -> Counter:
+        """
+        (kind, category) -> number of distinct category keywords found in the (lowercased) text
+
+        One automaton pass over the text when pyahocorasick is available,
+        otherwise a substring test per keyword (C-level str scans beat a
+        pure-Python trie walk for this small keyword set).
+        """
+        owners, automaton = self._get_keyword_index()
+
+        if automaton is not None:
+            found = {keyword for _, keyword in automaton.iter(lowered_text)}
+        else:
+            found = {keyword for keyword in owners if keyword in lowered_text}
+
+        counts = Counter()
+        for keyword in found:
+            for owner in owners[keyword]:
+                counts[owner] += 1
+        return counts
+
     def suggest_tags(self, doc_id: int, file_path: str = None, limit: int = 10) -> List[Dict]:
         """
         Suggest tags for a document.
@@ -58,7 +180,10 @@ class TagSuggester:
             cursor = conn.cursor()
 
             # Get document metadata
-            doc = cursor.execute("SELECT * FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+            doc = cursor.execute("""
+                SELECT title, abstract, authors, year, journal, file_path
+                FROM documents WHERE doc_id = ?
+            """, (doc_id,)).fetchone()
 
             if not doc:
                 logger.error(f"Document {doc_id} not found")
@@ -67,103 +192,178 @@ class TagSuggester:
             doc = dict(doc)
 
             # Extract text content
-            text_content = self._extract_text_sample(file_path or doc['file_path'])
+            text_content = self._extract_text_sample(
+                file_path or self.workspace.get_absolute_path(doc['file_path'])
+            )
 
-            # Combine metadata and content
-            full_text = ' '.join(filter(None, [
-                doc.get('title', ''),
-                doc.get('abstract', ''),
-                doc.get('authors', ''),
-                text_content
-            ])).lower()
+            unique_suggestions = self._rank_suggestions(doc, text_content, limit)
 
-            # Generate suggestions from multiple sources
-            suggestions = []
+            # Check which tags already exist
+            existing_tag_names = self._existing_tag_names(conn)
 
-            # 1. Domain-based suggestions
-            domain_tags = self._suggest_domain_tags(full_text)
-            suggestions.extend(domain_tags)
+            for suggestion in unique_suggestions:
+                suggestion['exists'] = suggestion['tag_name'].lower() in existing_tag_names
 
-            # 2. Method-based suggestions
-            method_tags = self._suggest_method_tags(full_text)
-            suggestions.extend(method_tags)
+            logger.info(f"Generated {len(unique_suggestions)} tag suggestions for doc {doc_id}")
 
-            # 3. Keyword extraction
-            keyword_tags = self._extract_keyword_tags(full_text, doc.get('title', ''))
-            suggestions.extend(keyword_tags)
+            return unique_suggestions
 
-            # 4. Year tag
-            if doc.get('year'):
-                suggestions.append({
-                    'tag_name': str(doc['year']),
-                    'confidence': 1.0,
-                    'reason': 'Publication year'
-                })
+        except Exception as e:
+            logger.error(f"Failed to suggest tags: {e}", exc_info=True)
+            return []
 
-            # 5. Journal/venue tag
-            if doc.get('journal'):
-                journal_tag = self._clean_tag_name(doc['journal'])
-                if journal_tag:
-                    suggestions.append({
-                        'tag_name': journal_tag,
-                        'confidence': 0.9,
-                        'reason': 'Journal/venue'
-                    })
-
-            # Remove duplicates and sort by confidence
-            seen = set()
-            unique_suggestions = []
-
-            for suggestion in sorted(suggestions, key=lambda x: x['confidence'], reverse=True):
-                tag_name_lower = suggestion['tag_name'].lower()
-                if tag_name_lower not in seen:
-                    seen.add(tag_name_lower)
-                    unique_suggestions.append(suggestion)
+    def suggest_tags_batch(self, doc_ids: List[int], limit: int = 10) -> Dict[int, List[Dict]]:
+        """
+        Suggest tags for many documents, extracting PDF text across CPU cores.
 
-            # Check which tags already exist
-            existing_tags = cursor.execute("SELECT tag_name FROM tags").fetchall()
-            existing_tag_names = {tag['tag_name'].lower() for tag in existing_tags}
+        Args:
+            doc_ids: document IDs
+            limit: maximum number of suggestions per document
 
-            for suggestion in unique_suggestions:
-                suggestion['exists'] = suggestion['tag_name'].lower() in existing_tag_names
+        Returns:
+            doc_id -> suggestions (same format as suggest_tags; [] for missing documents)
+        """
+        results = {doc_id: [] for doc_id in doc_ids}
 
-            # Limit results
-            unique_suggestions = unique_suggestions[:limit]
+        try:
+            db = self.workspace.get_database()
 
-            logger.info(f"Generated {len(unique_suggestions)} tag suggestions for doc {doc_id}")
+            with db.acquire_reader() as conn:
+                docs = [dict(row) for row in conn.execute("""
+                    SELECT doc_id, title, abstract, authors, year, journal, file_path
+                    FROM documents
+                    WHERE doc_id IN (SELECT value FROM json_each(?))
+                """, (json.dumps(list(results)),))]
 
-            return unique_suggestions
+                existing_tag_names = self._existing_tag_names(conn)
 
         except Exception as e:
             logger.error(f"Failed to suggest tags: {e}", exc_info=True)
-            return []
+            return results
+
+        # documents.file_path is workspace-relative; workers only see the row
+        for doc in docs:
+            doc['file_path'] = str(self.workspace.get_absolute_path(doc['file_path']))
+
+        if len(docs) >= _PARALLEL_MIN_DOCS:
+            ranked = self._suggest_parallel(docs, limit)
+        else:
+            ranked = [_suggest_for_document(doc, limit) for doc in docs]
+
+        for doc, suggestions in zip(docs, ranked):
+            for suggestion in suggestions:
+                suggestion['exists'] = suggestion['tag_name'].lower() in existing_tag_names
+            results[doc['doc_id']] = suggestions
+
+        logger.info(f"Generated tag suggestions for {len(docs)} documents")
+        return results
+
+    @staticmethod
+    def _suggest_parallel(docs: List[Dict], limit: int) -> List[List[Dict]]:
+        """Rank suggestions for each document in worker processes (PDF parsing and scoring hold the GIL)"""
+        workers = min(os.cpu_count() or 1, len(docs))
+        if workers < 2:
+            return [_suggest_for_document(doc, limit) for doc in docs]
 
-    def _extract_text_sample(self, file_path: str, max_pages: int = 3) -> str:
-        """Extract text sample from first few pages"""
         try:
-            doc = fitz.open(file_path)
-            text = ""
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(_suggest_for_document, docs, [limit] * len(docs)))
+        except Exception as e:
+            logger.warning(f"Parallel tag suggestion failed, falling back to a single process: {e}")
+            return [_suggest_for_document(doc, limit) for doc in docs]
+
+    @staticmethod
+    def _existing_tag_names(conn) -> Set[str]:
+        """Lowercased names of all tags (lowercased in Python: SQLite's LOWER() only folds ASCII)"""
+        return {row[0].lower() for row in conn.execute("SELECT tag_name FROM tags")}
+
+    def _rank_suggestions(self, doc: Dict, text_content: str, limit: int) -> List[Dict]:
+        """
+        Deduplicated suggestions for one document, most confident first
+
+        Args:
+            doc: documents row (title, abstract, authors, year, journal)
+            text_content: text sample of the PDF
+            limit: maximum number of suggestions
+
+        Returns:
+            Suggestion dicts without the 'exists' flag
+        """
+        # Combine metadata and content
+        full_text = ' '.join(filter(None, [
+            doc.get('title', ''),
+            doc.get('abstract', ''),
+            doc.get('authors', ''),
+            text_content
+        ])).lower()
+
+        # Generate suggestions from multiple sources
+        suggestions = []
+
+        # Domain and method keywords are matched in a single pass
+        keyword_counts = self._count_keyword_matches(full_text)
+
+        # 1. Domain-based suggestions
+        domain_tags = self._suggest_domain_tags(full_text, keyword_counts)
+        suggestions.extend(domain_tags)
 
-            for page_num in range(min(max_pages, len(doc))):
-                page = doc[page_num]
-                text += page.get_text()
+        # 2. Method-based suggestions
+        method_tags = self._suggest_method_tags(full_text, keyword_counts)
+        suggestions.extend(method_tags)
 
-            doc.close()
+        # 3. Keyword extraction
+        keyword_tags = self._extract_keyword_tags(full_text, (doc.get('title') or '').lower())
+        suggestions.extend(keyword_tags)
 
-            # Limit length
-            return text[:5000]
+        # 4. Year tag
+        if doc.get('year'):
+            suggestions.append({
+                'tag_name': str(doc['year']),
+                'confidence': 1.0,
+                'reason': 'Publication year'
+            })
+
+        # 5. Journal/venue tag
+        if doc.get('journal'):
+            journal_tag = self._clean_tag_name(doc['journal'])
+            if journal_tag:
+                suggestions.append({
+                    'tag_name': journal_tag,
+                    'confidence': 0.9,
+                    'reason': 'Journal/venue'
+                })
+
+        # Remove duplicates, keeping the most confident suggestion per name
+        best = {}
+        for suggestion in suggestions:
+            tag_name_lower = suggestion['tag_name'].lower()
+            current = best.get(tag_name_lower)
+            if current is None or suggestion['confidence'] > current['confidence']:
+                best[tag_name_lower] = suggestion
+
+        # Limit results, most confident first
+        return heapq.nlargest(limit, best.values(), key=lambda x: x['confidence'])
+
+    def _extract_text_sample(self, file_path: str, max_pages: int = 3) -> str:
+        """Extract text sample from first few pages (cached until the file changes)"""
+        try:
+            mtime_ns = os.stat(file_path).st_mtime_ns
+            return _cached_text_sample(str(file_path), mtime_ns, max_pages)
 
         except Exception as e:
             logger.warning(f"Failed to extract text from {file_path}: {e}")
             return ""
 
-    def _suggest_domain_tags(self, text: str) -> List[Dict]:
+    def _suggest_domain_tags(self, lowered_text: str, keyword_counts: Optional[Counter] = None) -> List[Dict]:
         """Suggest domain tags based on keyword matching"""
         suggestions = []
 
-        for domain, keywords in self.DOMAIN_KEYWORDS.items():
+        if keyword_counts is None:
+            keyword_counts = self._count_keyword_matches(lowered_text)
+
+        for domain in self.DOMAIN_KEYWORDS:
             # Count keyword matches
-            matches = sum(1 for keyword in keywords if keyword in text)
+            matches = keyword_counts[('domain', domain)]
 
             if matches > 0:
                 # Calculate confidence based on match count
@@ -177,12 +377,15 @@ class TagSuggester:
 
         return suggestions
 
-    def _suggest_method_tags(self, text: str) -> List[Dict]:
+    def _suggest_method_tags(self, lowered_text: str, keyword_counts: Optional[Counter] = None) -> List[Dict]:
         """Suggest methodology tags"""
         suggestions = []
 
-        for method, keywords in self.METHOD_KEYWORDS.items():
-            matches = sum(1 for keyword in keywords if keyword in text)
+        if keyword_counts is None:
+            keyword_counts = self._count_keyword_matches(lowered_text)
+
+        for method in self.METHOD_KEYWORDS:
+            matches = keyword_counts[('method', method)]
 
             if matches > 0:
                 confidence = min(0.4 + (matches * 0.15), 1.0)
@@ -195,13 +398,13 @@ class TagSuggester:
 
         return suggestions
 
-    def _extract_keyword_tags(self, text: str, title: str = '') -> List[Dict]:
-        """Extract important keywords as tags"""
+    def _extract_keyword_tags(self, lowered_text: str, lowered_title: str = '') -> List[Dict]:
+        """Extract important keywords as tags (text and title must already be lowercased)"""
         suggestions = []
 
         # Extract title keywords (higher weight)
-        if title:
-            title_words = self._extract_important_words(title)
+        if lowered_title:
+            title_words = self._extract_important_words(lowered_title)
 
             for word in title_words[:3]:  # Top 3 from title
                 suggestions.append({
@@ -211,7 +414,7 @@ class TagSuggester:
                 })
 
         # Extract content keywords
-        content_words = self._extract_important_words(text, limit=5)
+        content_words = self._extract_important_words(lowered_text, limit=5)
 
         for word in content_words:
             suggestions.append({
@@ -222,41 +425,13 @@ class TagSuggester:
 
         return suggestions
 
-    def _extract_important_words(self, text: str, limit: int = 10) -> List[str]:
-        """Extract important words using simple frequency analysis"""
-        # Remove common stop words
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'with', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has',
-            'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may',
-            'might', 'can', 'this', 'that', 'these', 'those', 'we', 'our', 'they',
-            'their', 'it', 'its', 'from', 'by', 'as', 'which', 'who', 'when',
-            'where', 'how', 'why', 'what', 'such', 'both', 'each', 'few', 'more',
-            'most', 'other', 'some', 'also', 'than', 'then', 'so', 'if', 'about',
-            'into', 'through', 'during', 'before', 'after', 'above', 'below', 'up',
-            'down', 'out', 'over', 'under', 'again', 'further', 'once', 'here',
-            'there', 'all', 'any', 'both', 'each', 'more', 'most', 'other', 'some',
-            'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'than', 'too', 'very'
-        }
-
-        # Tokenize and filter
-        words = re.findall(r'\b[a-z]{4,}\b', text.lower())  # At least 4 characters
-        words = [w for w in words if w not in stop_words]
-
-        # Count frequencies
-        word_counts = Counter(words)
+    def _extract_important_words(self, lowered_text: str, limit: int = 10) -> List[str]:
+        """Extract important words using simple frequency analysis (text must already be lowercased)"""
+        # Tokenize and drop stop words and generic terms
+        word_counts = Counter(w for w in _WORD_RE.findall(lowered_text) if w not in _EXCLUDED_WORDS)
 
         # Get most common
-        common_words = [word for word, count in word_counts.most_common(limit * 3)]
-
-        # Filter out generic terms
-        generic_terms = {'paper', 'study', 'research', 'method', 'result', 'conclusion',
-                        'introduction', 'abstract', 'figure', 'table', 'show', 'propose',
-                        'present', 'approach', 'problem', 'solution', 'system', 'based'}
-
-        filtered_words = [w for w in common_words if w not in generic_terms]
-
-        return filtered_words[:limit]
+        return [word for word, count in word_counts.most_common(limit)]
 
     @staticmethod
     def _clean_tag_name(name: str) -> str:
@@ -269,6 +444,12 @@ class TagSuggester:
             return None
 
         # Remove special characters except hyphen and underscore
-        name = re.sub(r'[^\w\s-]', '', name)
+        name = _TAG_CLEAN_RE.sub('', name)
 
         return name.strip()
+
+
+def _suggest_for_document(doc: Dict, limit: int) -> List[Dict]:
+    """Worker: ranked suggestions for one documents row (module-level so it can be pickled)"""
+    suggester = TagSuggester(None)
+    return suggester._rank_suggestions(doc, suggester._extract_text_sample(doc['file_path']), limit)
@@ -3,18 +3,47 @@ Cloud Sync Manager
 Handles conflict detection and resolution for cloud-synced workspaces
 """
 import logging
+import re
 import sqlite3
-import shutil
+import sys
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
-from data.database import Database
+from data.database import Database, build_update_sql
 
 logger = logging.getLogger(__name__)
 
+# Path fragments of known cloud sync folders (Google Drive, OneDrive, Dropbox, iCloud)
+_CLOUD_FOLDER_RE = re.compile(r'google ?drive|onedrive|dropbox|icloud', re.IGNORECASE)
+
+# Conflicts carry no per-instance __dict__ where supported (dataclass slots need 3.10+)
+_CONFLICT_DATACLASS_OPTIONS = {}
+if sys.version_info >= (3, 10):
+    _CONFLICT_DATACLASS_OPTIONS['slots'] = True
+
+
+def _parse_timestamp(value: Optional[str]) -> datetime:
+    """
+    Parse an ISO-8601 / SQLite timestamp for ordering.
+    Offset-aware values are converted to naive UTC (SQLite's CURRENT_TIMESTAMP
+    is naive UTC); missing or unparseable values sort first.
+    """
+    if not value:
+        return datetime.min
+
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        logger.warning(f"Unparseable timestamp: {value!r}")
+        return datetime.min
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
 
 class ConflictStrategy(Enum):
     """Conflict resolution strategies"""
@@ -24,17 +53,28 @@ class ConflictStrategy(Enum):
     MANUAL = "manual"  # User decides
 
 
-@dataclass
+@dataclass(**_CONFLICT_DATACLASS_OPTIONS)
 class SyncConflict:
     """Represents a sync conflict"""
     table_name: str
     record_id: int
     local_modified: str
     remote_modified: str
-    local_data: Dict
-    remote_data: Dict
+    columns: Tuple[str, ...]  # Column names for local_data/remote_data
+    local_data: Tuple  # Local row values, aligned with columns
+    remote_data: Tuple  # Remote row values, aligned with columns
     conflict_type: str  # 'update', 'delete', 'insert'
 
+    @property
+    def local_dict(self) -> Dict:
+        """Local row as a column -> value dict"""
+        return dict(zip(self.columns, self.local_data))
+
+    @property
+    def remote_dict(self) -> Dict:
+        """Remote row as a column -> value dict"""
+        return dict(zip(self.columns, self.remote_data))
+
 
 class SyncManager:
     """Manages cloud sync and conflict resolution"""
@@ -42,6 +82,7 @@ class SyncManager:
     def __init__(self, workspace):
         self.workspace = workspace
         self.conflicts: List[SyncConflict] = []
+        self._table_columns: Dict[str, frozenset] = {}
 
     def detect_conflicts(self) -> List[SyncConflict]:
         """
@@ -148,20 +189,38 @@ class SyncManager:
             conn.rollback()
             return False
 
-    def _apply_remote_changes(self, cursor: sqlite3.Cursor, conflict: SyncConflict):
-        """Apply remote changes to local database"""
+    def _apply_remote_changes(self, cursor: sqlite3.Cursor, conflict: SyncConflict,
+                              values: Optional[Tuple] = None):
+        """Apply remote changes (or values aligned with conflict.columns) to local database"""
         # Build UPDATE query
         table = conflict.table_name
         id_col = self._get_id_column(table)
 
-        set_clause = ", ".join([f"{k} = ?" for k in conflict.remote_data.keys()])
-        values = list(conflict.remote_data.values()) + [conflict.record_id]
+        self._check_columns(cursor, table, conflict.columns)
 
-        query = f"UPDATE {table} SET {set_clause} WHERE {id_col} = ?"
-        cursor.execute(query, values)
+        if values is None:
+            values = conflict.remote_data
+
+        cursor.execute(build_update_sql(table, conflict.columns, id_col), (*values, conflict.record_id))
 
         logger.debug(f"Applied remote changes to {table}")
 
+    def _check_columns(self, cursor: sqlite3.Cursor, table: str, columns: Tuple[str, ...]):
+        """Reject remote data whose keys are not columns of the table (they end up in SQL text)"""
+        if not columns:
+            raise ValueError(f"No remote columns for {table}")
+
+        known = self._table_columns.get(table)
+        if known is None:
+            known = frozenset(row[0] for row in cursor.execute("SELECT name FROM pragma_table_info(?)", (table,)))
+            if not known:
+                raise ValueError(f"Unknown table: {table}")
+            self._table_columns[table] = known
+
+        unknown = [c for c in columns if c not in known]
+        if unknown:
+            raise ValueError(f"Unknown columns for {table}: {unknown}")
+
     def _merge_changes(self, cursor: sqlite3.Cursor, conflict: SyncConflict):
         """
         Merge local and remote changes.
@@ -171,29 +230,30 @@ class SyncManager:
 
         if table == "annotations":
             # For annotations, keep both if different content
-            local_content = conflict.local_data.get("content", "")
-            remote_content = conflict.remote_data.get("content", "")
+            local_content = conflict.local_dict.get("content", "")
+            remote_content = conflict.remote_dict.get("content", "")
 
             if local_content != remote_content:
                 # Merge by appending
                 merged_content = f"{local_content}\n\n[Merged from other device]\n{remote_content}"
-                conflict.local_data["content"] = merged_content
+                merged = conflict.remote_dict
+                merged["content"] = merged_content
 
                 # Update with merged content
-                self._apply_remote_changes(cursor, conflict)
+                self._apply_remote_changes(cursor, conflict, tuple(merged[c] for c in conflict.columns))
 
         elif table == "tags":
             # Tags are usually simple, prefer most recent
-            local_time = conflict.local_data.get("created_at", "")
-            remote_time = conflict.remote_data.get("created_at", "")
+            local_time = _parse_timestamp(conflict.local_dict.get("created_at"))
+            remote_time = _parse_timestamp(conflict.remote_dict.get("created_at"))
 
             if remote_time > local_time:
                 self._apply_remote_changes(cursor, conflict)
 
         else:
             # Default: prefer most recent modification
-            local_time = conflict.local_modified
-            remote_time = conflict.remote_modified
+            local_time = _parse_timestamp(conflict.local_modified)
+            remote_time = _parse_timestamp(conflict.remote_modified)
 
             if remote_time > local_time:
                 self._apply_remote_changes(cursor, conflict)
@@ -205,15 +265,55 @@ class SyncManager:
         Resolve all detected conflicts with the same strategy.
         Returns number of conflicts resolved.
         """
-        resolved = 0
+        if strategy == ConflictStrategy.KEEP_REMOTE:
+            resolved = self._apply_all_remote_changes()
+        else:
+            resolved = 0
 
-        for conflict in self.conflicts:
-            if self.resolve_conflict(conflict, strategy):
-                resolved += 1
+            for conflict in self.conflicts:
+                if self.resolve_conflict(conflict, strategy):
+                    resolved += 1
 
         logger.info(f"Resolved {resolved}/{len(self.conflicts)} conflicts")
         return resolved
 
+    def _apply_all_remote_changes(self) -> int:
+        """
+        Overwrite local rows with remote data for every conflict.
+        Conflicts with the same table and columns share one executemany;
+        everything is committed once.
+        """
+        db = self.workspace.get_database()
+        conn = db.connect()
+        cursor = conn.cursor()
+
+        groups: Dict[Tuple[str, Tuple[str, ...]], List[Tuple]] = {}
+        for conflict in self.conflicts:
+            key = (conflict.table_name, conflict.columns)
+            groups.setdefault(key, []).append((*conflict.remote_data, conflict.record_id))
+
+        resolved = 0
+
+        try:
+            for (table, columns), rows in groups.items():
+                try:
+                    self._check_columns(cursor, table, columns)
+                except ValueError as e:
+                    logger.error(f"Failed to resolve {len(rows)} conflicts: {e}")
+                    continue
+
+                cursor.executemany(build_update_sql(table, columns, self._get_id_column(table)), rows)
+                resolved += len(rows)
+
+            conn.commit()
+
+        except Exception as e:
+            logger.error(f"Failed to resolve conflicts: {e}")
+            conn.rollback()
+            return 0
+
+        return resolved
+
     def create_backup(self) -> Path:
         """
         Create a backup of the current database before resolving conflicts.
@@ -223,7 +323,14 @@ class SyncManager:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_path = db_path.parent / f"{db_path.stem}_backup_{timestamp}{db_path.suffix}"
 
-        shutil.copy2(db_path, backup_path)
+        # Online backup API: a consistent snapshot that includes pages still in the WAL
+        db = self.workspace.get_database()
+        backup_conn = sqlite3.connect(str(backup_path))
+        try:
+            with db.acquire_reader() as conn:
+                conn.backup(backup_conn)
+        finally:
+            backup_conn.close()
 
         logger.info(f"Created backup: {backup_path}")
         return backup_path
@@ -254,21 +361,7 @@ class SyncManager:
         """
         Check if workspace is in a known cloud sync folder.
         """
-        ws_path = str(self.workspace.workspace_path).lower()
-
-        cloud_indicators = [
-            "google drive",
-            "googledrive",
-            "onedrive",
-            "dropbox",
-            "icloud",
-        ]
-
-        for indicator in cloud_indicators:
-            if indicator in ws_path:
-                return True
-
-        return False
+        return _CLOUD_FOLDER_RE.search(str(self.workspace.workspace_path)) is not None
 
     @staticmethod
     def _get_id_column(table_name: str) -> str:
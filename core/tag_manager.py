@@ -9,13 +9,39 @@ from data.dao.tag_dao import TagDAO
 logger = logging.getLogger(__name__)
 
 
+# Per-tag document/annotation counts, most used first. Links are counted per
+# side before joining (primary keys make them distinct), so a tag's document
+# and annotation links are not multiplied against each other.
+_TAG_USAGE_QUERY = """
+    SELECT
+        t.tag_id,
+        t.tag_name,
+        t.color,
+        COALESCE(dt.doc_count, 0) as doc_count,
+        COALESCE(at.annotation_count, 0) as annotation_count
+    FROM tags t
+    LEFT JOIN (
+        SELECT tag_id, COUNT(*) as doc_count FROM document_tags GROUP BY tag_id
+    ) dt ON t.tag_id = dt.tag_id
+    LEFT JOIN (
+        SELECT tag_id, COUNT(*) as annotation_count FROM annotation_tags GROUP BY tag_id
+    ) at ON t.tag_id = at.tag_id
+    ORDER BY doc_count DESC, t.tag_name
+"""
+
+
+def _escape_like(text: str) -> str:
+    """Escape LIKE wildcards (used with ESCAPE '\\')"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
 class TagManager:
     """태그 관리 클래스"""
 
     def __init__(self, workspace):
         self.workspace = workspace
-        db = workspace.get_database()
-        self.tag_dao = TagDAO(db)
+        self.db = workspace.get_database()
+        self.tag_dao = TagDAO(self.db)
 
     def create_tag(self, tag_name: str, parent_id: int = None, color: str = None) -> int:
         """
@@ -104,6 +130,10 @@ class TagManager:
         """문서의 태그 목록"""
         return self.tag_dao.get_document_tags(doc_id)
 
+    def get_tags_for_documents(self, doc_ids: List[int]) -> Dict[int, List[Dict]]:
+        """여러 문서의 태그 목록 (doc_id -> 태그 목록)"""
+        return self.tag_dao.get_tags_for_docs(doc_ids)
+
     def get_documents_by_tag(self, tag_id: int) -> List[int]:
         """특정 태그가 붙은 문서 ID 목록"""
         return self.tag_dao.get_documents_by_tag(tag_id)
@@ -112,11 +142,20 @@ class TagManager:
         """여러 문서에 한 번에 태그 추가"""
         tag_id = self.get_or_create_tag(tag_name)
 
-        for doc_id in doc_ids:
-            self.tag_dao.tag_document(doc_id, tag_id)
-            self._add_tag_to_search_index(doc_id, tag_name, tag_id)
+        # Only index documents that did not already carry the tag
+        already_tagged = set(self.tag_dao.get_documents_by_tag(tag_id))
+        new_doc_ids = [doc_id for doc_id in dict.fromkeys(doc_ids) if doc_id not in already_tagged]
 
-        logger.info(f"Tagged {len(doc_ids)} documents with '{tag_name}'")
+        # Links and FTS rows are written in one transaction
+        with self.db.transaction() as conn:
+            self.tag_dao.tag_documents_bulk([(doc_id, tag_id) for doc_id in new_doc_ids], commit=False)
+            conn.executemany("""
+                INSERT INTO search_index (content_type, content, doc_id, annotation_id, tag_id)
+                VALUES ('tag', ?, ?, NULL, ?)
+            """, [(tag_name, doc_id, tag_id) for doc_id in new_doc_ids])
+            self.db.bump_library_version(conn)
+
+        logger.info(f"Tagged {len(new_doc_ids)} documents with '{tag_name}'")
 
     # Annotation tagging
 
@@ -151,42 +190,47 @@ class TagManager:
 
     def get_tag_usage_stats(self) -> List[Dict]:
         """태그 사용 통계 (문서 개수 포함)"""
-        db = self.workspace.get_database()
-        conn = db.connect()
+        conn = self.db.connect()
         cursor = conn.cursor()
 
-        results = cursor.execute("""
-            SELECT
-                t.tag_id,
-                t.tag_name,
-                t.color,
-                COUNT(DISTINCT dt.doc_id) as doc_count,
-                COUNT(DISTINCT at.annotation_id) as annotation_count
-            FROM tags t
-            LEFT JOIN document_tags dt ON t.tag_id = dt.tag_id
-            LEFT JOIN annotation_tags at ON t.tag_id = at.tag_id
-            GROUP BY t.tag_id
-            ORDER BY doc_count DESC, t.tag_name
-        """).fetchall()
+        results = cursor.execute(_TAG_USAGE_QUERY).fetchall()
 
         return [dict(row) for row in results]
 
     def get_popular_tags(self, limit: int = 10) -> List[Dict]:
         """가장 많이 사용된 태그"""
-        stats = self.get_tag_usage_stats()
-        return stats[:limit]
+        conn = self.db.connect()
+        cursor = conn.cursor()
+
+        results = cursor.execute(_TAG_USAGE_QUERY + " LIMIT ?", (limit,)).fetchall()
+
+        return [dict(row) for row in results]
 
-    def search_tags(self, query: str) -> List[Dict]:
-        """태그 이름 검색"""
-        db = self.workspace.get_database()
-        conn = db.connect()
+    def search_tags(self, query: str, limit: int = 200) -> List[Dict]:
+        """태그 이름 검색 (앞부분 일치, 대소문자 무시)"""
+        conn = self.db.connect()
         cursor = conn.cursor()
 
+        # Prefix pattern so the NOCASE tag_name index can be used
         results = cursor.execute("""
             SELECT * FROM tags
-            WHERE tag_name LIKE ?
+            WHERE tag_name LIKE ? ESCAPE '\\'
+            ORDER BY tag_name COLLATE NOCASE
+            LIMIT ?
+        """, (f"{_escape_like(query)}%", limit)).fetchall()
+
+        return [dict(row) for row in results]
+
+    def search_tags_contains(self, query: str) -> List[Dict]:
+        """태그 이름 부분 일치 검색 (전체 스캔)"""
+        conn = self.db.connect()
+        cursor = conn.cursor()
+
+        results = cursor.execute("""
+            SELECT * FROM tags
+            WHERE tag_name LIKE ? ESCAPE '\\'
             ORDER BY tag_name
-        """, (f"%{query}%",)).fetchall()
+        """, (f"%{_escape_like(query)}%",)).fetchall()
 
         return [dict(row) for row in results]
 
@@ -194,8 +238,7 @@ class TagManager:
 
     def _add_tag_to_search_index(self, doc_id: int, tag_name: str, tag_id: int):
         """FTS 검색 인덱스에 태그 추가"""
-        db = self.workspace.get_database()
-        conn = db.connect()
+        conn = self.db.connect()
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -203,25 +246,40 @@ class TagManager:
             VALUES ('tag', ?, ?, NULL, ?)
         """, (tag_name, doc_id, tag_id))
 
+        self.db.bump_library_version(conn)
         conn.commit()
         logger.debug(f"Added tag '{tag_name}' to FTS index for doc {doc_id}")
 
     def rebuild_tag_index(self):
         """태그 인덱스 재구축"""
-        db = self.workspace.get_database()
-        conn = db.connect()
+        conn = self.db.connect()
         cursor = conn.cursor()
 
-        # Remove all tag entries
-        cursor.execute("DELETE FROM search_index WHERE content_type = 'tag'")
+        # Delete and re-insert in one write transaction
+        if conn.in_transaction:
+            conn.commit()
+        cursor.execute("BEGIN IMMEDIATE")
+
+        try:
+            # Remove all tag entries
+            cursor.execute("DELETE FROM search_index WHERE content_type = 'tag'")
+
+            # Re-add all document tags
+            cursor.execute("""
+                INSERT INTO search_index (content_type, content, doc_id, annotation_id, tag_id)
+                SELECT 'tag', t.tag_name, dt.doc_id, NULL, t.tag_id
+                FROM document_tags dt
+                JOIN tags t ON dt.tag_id = t.tag_id
+            """)
+            self.db.clear_cached_results(conn)
+            self.db.bump_library_version(conn)
+
+            # Merge the delete tombstones and new segments
+            cursor.execute("INSERT INTO search_index(search_index) VALUES('optimize')")
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
 
-        # Re-add all document tags
-        cursor.execute("""
-            INSERT INTO search_index (content_type, content, doc_id, annotation_id, tag_id)
-            SELECT 'tag', t.tag_name, dt.doc_id, NULL, t.tag_id
-            FROM document_tags dt
-            JOIN tags t ON dt.tag_id = t.tag_id
-        """)
-
-        conn.commit()
         logger.info("Rebuilt tag index")
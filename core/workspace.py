@@ -2,19 +2,113 @@
 Workspace management module
 Handles workspace initialization, path management, and integrity checks
 """
+import functools
 import json
 import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 import hashlib
+import mmap
+import os
+import shutil
 import uuid
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 
-from config import DIR_DATABASE, DIR_PDFS, DIR_EXPORTS, SYNC_FILE, DB_NAME, APP_VERSION
+from config import (
+    DIR_DATABASE, DIR_PDFS, DIR_EXPORTS, DIR_CACHE, LOCAL_CACHE_DIR, SYNC_FILE, DB_NAME, APP_VERSION
+)
 from data.database import Database, create_database
 
 logger = logging.getLogger(__name__)
 
+# Files at least this large are hashed through mmap
+_MMAP_HASH_THRESHOLD = 8 * 1024 * 1024
+# Read size for hashing smaller files (few, large update() calls)
+_HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Fewest files worth hashing on a thread pool in validate_integrity
+_PARALLEL_HASH_MIN_FILES = 5
+
+# OpenSSL's SHA-256 uses the CPU's SHA extensions where available
+if getattr(hashlib.sha256, "__name__", "") != "openssl_sha256":
+    logger.warning("hashlib.sha256 is not backed by OpenSSL; file hashing will be slower")
+
+
+def compute_file_hash(file_path: Path) -> str:
+    """
+    SHA256 hex digest of a file.
+    SHA256 stays the library's content hash: file_hash is the duplicate key
+    compared across devices, so a faster non-cryptographic hash would need a
+    second stored column computed at every import.
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        # Large files: hash a memory map in one update, without copying
+        # the file through Python bytes objects
+        if os.fstat(f.fileno()).st_size >= _MMAP_HASH_THRESHOLD:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    sha256.update(mm)
+                return sha256.hexdigest()
+            except (ValueError, OSError):
+                # File shrank or cannot be mapped; read it instead
+                sha256 = hashlib.sha256()
+                f.seek(0)
+
+        if hasattr(hashlib, "file_digest"):
+            # Python 3.11+: reads into one reusable buffer, hashing without the GIL
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def _load_device_id() -> str:
+    """Device identifier from ~/.pdf_research_device_id, created on first use (read once per process)"""
+    device_file = Path.home() / ".pdf_research_device_id"
+    if device_file.exists():
+        return device_file.read_text().strip()
+    else:
+        device_id = str(uuid.uuid4())
+        device_file.write_text(device_id)
+        return device_id
+
+
+def _rename_no_replace(src: Path, dest: Path) -> None:
+    """Rename src to dest, raising FileExistsError instead of replacing dest"""
+    if os.name == "nt":
+        # Windows rename already refuses to replace
+        os.rename(src, dest)
+        return
+
+    try:
+        # link() fails atomically if dest exists, where rename() would replace it
+        os.link(src, dest)
+    except FileExistsError:
+        raise
+    except OSError:
+        # Filesystem without hard links
+        if dest.exists():
+            raise FileExistsError(dest)
+        os.rename(src, dest)
+        return
+    os.unlink(src)
+
+
+def _dump_indented(value, level: int) -> str:
+    """json.dumps with indent=2, for a value nested `level` spaces deep"""
+    return json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n" + " " * level)
+
+
+def _group_by_doc(rows):
+    """Yield (doc_id, rows) for rows ordered by doc_id"""
+    for doc_id, group in itertools.groupby(rows, key=lambda row: row["doc_id"]):
+        yield doc_id, list(group)
+
 
 class Workspace:
     """
@@ -27,20 +121,23 @@ class Workspace:
         self.db_path = self.workspace_path / DIR_DATABASE / DB_NAME
         self.pdf_dir = self.workspace_path / DIR_PDFS
         self.export_dir = self.workspace_path / DIR_EXPORTS
+        self.cache_dir = self.workspace_path / DIR_CACHE
+        # Device-local cache: anything under workspace_path may be cloud-synced
+        # to (and loaded on) other devices
+        workspace_key = hashlib.blake2b(
+            str(self.workspace_path.resolve()).encode("utf-8"), digest_size=8
+        ).hexdigest()
+        self.local_cache_dir = LOCAL_CACHE_DIR / workspace_key
         self.sync_file = self.workspace_path / SYNC_FILE
+        # Workspace prefix with forward slashes, for get_relative_path's string fast path
+        self._workspace_posix = str(self.workspace_path).replace("\\", "/").rstrip("/") + "/"
 
         self._database: Optional[Database] = None
         self._device_id = self._get_or_create_device_id()
 
     def _get_or_create_device_id(self) -> str:
         """Get or create unique device identifier"""
-        device_file = Path.home() / ".pdf_research_device_id"
-        if device_file.exists():
-            return device_file.read_text().strip()
-        else:
-            device_id = str(uuid.uuid4())
-            device_file.write_text(device_id)
-            return device_id
+        return _load_device_id()
 
     def initialize(self) -> None:
         """
@@ -75,6 +172,13 @@ class Workspace:
         Convert absolute path to workspace-relative path.
         Used for storing paths in database.
         """
+        # Fast path: plain prefix strip, when the remainder needs no normalization
+        path_str = str(absolute_path).replace("\\", "/")
+        if path_str.startswith(self._workspace_posix):
+            relative = path_str[len(self._workspace_posix):]
+            if relative and "//" not in relative and "/." not in "/" + relative and not relative.endswith("/"):
+                return relative
+
         absolute_path = Path(absolute_path)
         try:
             relative = absolute_path.relative_to(self.workspace_path)
@@ -88,6 +192,52 @@ class Workspace:
         """Convert workspace-relative path to absolute path"""
         return self.workspace_path / relative_path
 
+    def stage_pdf(self, src: Path) -> Tuple[Path, str]:
+        """
+        Copy a PDF into pdf_dir under a hidden .partial name and SHA256 it in
+        the same pass, so the source is read only once.
+        Returns (staged path, file hash). The caller either publishes the copy
+        with place_staged_pdf or unlinks it (e.g. for a duplicate hash), so a
+        rejected import never shows up as a .pdf in the synced folder.
+        """
+        src = Path(src)
+        staged_path = self.pdf_dir / f".{uuid.uuid4().hex}.partial"
+
+        # Opened outside the try: a name clash is another file, not ours to delete
+        fdst = open(staged_path, "xb")
+        sha256 = hashlib.sha256()
+        try:
+            with fdst, open(src, "rb") as fsrc:
+                for chunk in iter(lambda: fsrc.read(_HASH_CHUNK_SIZE), b""):
+                    sha256.update(chunk)
+                    fdst.write(chunk)
+            shutil.copystat(src, staged_path)
+        except BaseException:
+            # Do not leave a partial copy behind
+            staged_path.unlink(missing_ok=True)
+            raise
+
+        return staged_path, sha256.hexdigest()
+
+    def place_staged_pdf(self, staged_path: Path, name: str) -> Path:
+        """
+        Rename a stage_pdf copy to pdf_dir/name (suffixing _1, _2, ... on name
+        clashes, never replacing an existing file). Returns the final path.
+        """
+        name = Path(name)
+        dest_path = self.pdf_dir / name.name
+        counter = 1
+        while True:
+            try:
+                _rename_no_replace(Path(staged_path), dest_path)
+                break
+            except FileExistsError:
+                dest_path = self.pdf_dir / f"{name.stem}_{counter}{name.suffix}"
+                counter += 1
+
+        logger.debug(f"Copied PDF to: {dest_path}")
+        return dest_path
+
     def validate_integrity(self) -> Dict:
         """
         Validate integrity between database records and file system.
@@ -98,6 +248,7 @@ class Workspace:
         results = {
             "missing_files": [],
             "orphaned_files": [],
+            "size_mismatches": [],
             "hash_mismatches": [],
             "total_documents": 0,
             "total_files": 0,
@@ -108,49 +259,105 @@ class Workspace:
 
         # Get all documents from database
         docs = cursor.execute(
-            "SELECT doc_id, file_path, file_hash FROM documents"
+            "SELECT doc_id, file_path, file_hash, file_size FROM documents"
         ).fetchall()
 
         results["total_documents"] = len(docs)
 
-        # Check if files exist and hashes match
+        # Hashes from earlier checks, reused while a file's mtime and size are unchanged
+        hash_cache = {
+            row["doc_id"]: row
+            for row in cursor.execute("SELECT doc_id, mtime_ns, size, file_hash FROM hash_cache")
+        }
+
+        # Check if files exist; a size change already proves the file changed, without hashing
+        present = []
         for doc in docs:
             file_path = self.get_absolute_path(doc["file_path"])
-            if not file_path.exists():
+            try:
+                stat = os.stat(file_path)
+            except OSError:
                 results["missing_files"].append({
                     "doc_id": doc["doc_id"],
                     "path": doc["file_path"]
                 })
+                continue
+
+            if doc["file_size"] is not None and stat.st_size != doc["file_size"]:
+                results["size_mismatches"].append({
+                    "doc_id": doc["doc_id"],
+                    "path": doc["file_path"],
+                    "expected": doc["file_size"],
+                    "actual": stat.st_size
+                })
             else:
-                # Verify hash
-                actual_hash = self._compute_file_hash(file_path)
-                if actual_hash != doc["file_hash"]:
-                    results["hash_mismatches"].append({
-                        "doc_id": doc["doc_id"],
-                        "path": doc["file_path"],
-                        "expected": doc["file_hash"],
-                        "actual": actual_hash
-                    })
+                present.append((doc, file_path, stat))
+
+        # Verify hashes (hashlib releases the GIL, so threads hash in parallel)
+        def hash_document(item):
+            doc, file_path, stat = item
+            return self._compute_file_hash_cached(doc["doc_id"], file_path, hash_cache.get(doc["doc_id"]), stat)
+
+        if len(present) >= _PARALLEL_HASH_MIN_FILES:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                hashed = list(executor.map(hash_document, present))
+        else:
+            hashed = [hash_document(item) for item in present]
+
+        fresh = [row for _, row in hashed if row is not None]
+        if fresh:
+            with db.transaction() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO hash_cache (doc_id, mtime_ns, size, file_hash) VALUES (?, ?, ?, ?)",
+                    fresh
+                )
+
+        for (doc, _, _), (actual_hash, _) in zip(present, hashed):
+            if actual_hash != doc["file_hash"]:
+                results["hash_mismatches"].append({
+                    "doc_id": doc["doc_id"],
+                    "path": doc["file_path"],
+                    "expected": doc["file_hash"],
+                    "actual": actual_hash
+                })
 
         # Find orphaned PDF files
+        # (scandir entries carry their type, so there is no stat per file or Path per entry)
         if self.pdf_dir.exists():
-            db_files = {self.get_absolute_path(doc["file_path"]) for doc in docs}
-            for pdf_file in self.pdf_dir.glob("*.pdf"):
-                results["total_files"] += 1
-                if pdf_file not in db_files:
-                    results["orphaned_files"].append(str(pdf_file.name))
+            db_files = {doc["file_path"] for doc in docs}
+            pdf_prefix = self.get_relative_path(self.pdf_dir) + "/"
+            with os.scandir(self.pdf_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith(".") or not name.lower().endswith(".pdf") or not entry.is_file():
+                        continue
+                    results["total_files"] += 1
+                    if pdf_prefix + name not in db_files:
+                        results["orphaned_files"].append(name)
 
         logger.info(f"Integrity check complete: {results}")
         return results
 
+    def _compute_file_hash_cached(self, doc_id: int, file_path: Path, cached: Optional[Dict] = None,
+                                  stat: Optional[os.stat_result] = None) -> Tuple[str, Optional[Tuple]]:
+        """
+        SHA256 of file_path, taken from cached (a hash_cache row) without
+        opening the file if its mtime and size still match.
+        stat: the file's os.stat result, if the caller already has it.
+        Returns (hash, hash_cache row to store, or None when the cache was used).
+        """
+        if stat is None:
+            stat = os.stat(file_path)
+        if cached is not None and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            return cached["file_hash"], None
+
+        file_hash = self._compute_file_hash(file_path)
+        return file_hash, (doc_id, stat.st_mtime_ns, stat.st_size, file_hash)
+
     @staticmethod
     def _compute_file_hash(file_path: Path) -> str:
         """Compute SHA256 hash of file"""
-        sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+        return compute_file_hash(file_path)
 
     def _update_sync_file(self) -> None:
         """Update .pdfsync metadata file"""
@@ -195,55 +402,72 @@ class Workspace:
         """
         Export all metadata to JSON for backup/migration.
         Does not include PDF files.
+        Documents are written one at a time, so memory is bounded by the
+        largest document rather than the whole library.
         """
         db = self.get_database()
-        cursor = db.connect().cursor()
 
-        export_data = {
-            "version": APP_VERSION,
-            "exported_at": datetime.now().isoformat(),
-            "documents": [],
-            "tags": [],
-        }
+        with db.acquire_reader() as conn, open(output_path, "w", encoding="utf-8") as f:
+            # Same layout json.dump(..., indent=2) produces for the whole export
+            f.write("{\n")
+            f.write(f'  "version": {_dump_indented(APP_VERSION, 2)},\n')
+            f.write(f'  "exported_at": {_dump_indented(datetime.now().isoformat(), 2)},\n')
+            f.write('  "documents": [')
 
-        # Export documents
-        docs = cursor.execute(
-            "SELECT * FROM documents ORDER BY doc_id"
-        ).fetchall()
+            count = 0
+            for doc_data in self._iter_export_documents(conn):
+                f.write(",\n    " if count else "\n    ")
+                f.write(_dump_indented(doc_data, 4))
+                count += 1
+            f.write("\n  ],\n" if count else "],\n")
 
-        for doc in docs:
+            # Export all tags
+            tags = [dict(t) for t in conn.execute("SELECT * FROM tags ORDER BY tag_id")]
+            f.write(f'  "tags": {_dump_indented(tags, 2)}\n}}')
+
+        logger.info(f"Metadata exported to: {output_path}")
+
+    @staticmethod
+    def _iter_export_documents(conn):
+        """
+        Yield each document dict with its tags and annotations, merging three
+        queries ordered by doc_id instead of loading them all into memory.
+        """
+        tag_groups = _group_by_doc(conn.execute(
+            """
+            SELECT dt.doc_id, t.tag_name
+            FROM document_tags dt
+            JOIN tags t ON t.tag_id = dt.tag_id
+            ORDER BY dt.doc_id, dt.tag_id
+            """
+        ))
+        annotation_groups = _group_by_doc(conn.execute(
+            "SELECT * FROM annotations ORDER BY doc_id, page_number, annotation_id"
+        ))
+        tag_group = next(tag_groups, None)
+        annotation_group = next(annotation_groups, None)
+
+        for doc in conn.execute("SELECT * FROM documents ORDER BY doc_id"):
+            doc_id = doc["doc_id"]
             doc_data = dict(doc)
 
-            # Get tags for this document
-            tags = cursor.execute(
-                """
-                SELECT t.tag_name
-                FROM tags t
-                JOIN document_tags dt ON t.tag_id = dt.tag_id
-                WHERE dt.doc_id = ?
-                """,
-                (doc["doc_id"],)
-            ).fetchall()
-            doc_data["tags"] = [t["tag_name"] for t in tags]
-
-            # Get annotations
-            annotations = cursor.execute(
-                "SELECT * FROM annotations WHERE doc_id = ?",
-                (doc["doc_id"],)
-            ).fetchall()
-            doc_data["annotations"] = [dict(a) for a in annotations]
-
-            export_data["documents"].append(doc_data)
-
-        # Export all tags
-        tags = cursor.execute("SELECT * FROM tags ORDER BY tag_id").fetchall()
-        export_data["tags"] = [dict(t) for t in tags]
-
-        # Write to file
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
+            while tag_group is not None and tag_group[0] < doc_id:
+                tag_group = next(tag_groups, None)
+            if tag_group is not None and tag_group[0] == doc_id:
+                doc_data["tags"] = [row["tag_name"] for row in tag_group[1]]
+                tag_group = next(tag_groups, None)
+            else:
+                doc_data["tags"] = []
 
-        logger.info(f"Metadata exported to: {output_path}")
+            while annotation_group is not None and annotation_group[0] < doc_id:
+                annotation_group = next(annotation_groups, None)
+            if annotation_group is not None and annotation_group[0] == doc_id:
+                doc_data["annotations"] = [dict(row) for row in annotation_group[1]]
+                annotation_group = next(annotation_groups, None)
+            else:
+                doc_data["annotations"] = []
+
+            yield doc_data
 
     def close(self):
         """Close workspace and database connection"""
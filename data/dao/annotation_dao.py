@@ -1,12 +1,20 @@
 """
 Data Access Object for annotations table
 """
+import json
 import logging
 from typing import Optional, List, Dict
 from datetime import datetime
 
+from data.database import build_update_sql
+
 logger = logging.getLogger(__name__)
 
+# Columns update() may set
+_UPDATABLE_COLUMNS = frozenset({
+    'page_number', 'content', 'position_data', 'color', 'annotation_type', 'modified_at'
+})
+
 
 class AnnotationDAO:
     """Handle database operations for annotations"""
@@ -20,9 +28,8 @@ class AnnotationDAO:
         Returns: annotation_id
         """
         conn = self.db.connect()
-        cursor = conn.cursor()
 
-        cursor.execute("""
+        cursor = conn.execute("""
             INSERT INTO annotations (doc_id, page_number, content, position_data, color, annotation_type)
             VALUES (?, ?, ?, ?, ?, ?)
         """, (
@@ -40,55 +47,108 @@ class AnnotationDAO:
         logger.info(f"Created annotation: {annotation_id} for doc {doc_id}, page {page_number}")
         return annotation_id
 
-    def get_by_id(self, annotation_id: int) -> Optional[Dict]:
-        """Get annotation by ID"""
+    def create_many(self, annotations: List[Dict]) -> int:
+        """
+        Create many annotations with one executemany and one commit.
+        Each dict needs doc_id, page_number and content; the optional keys are as in create().
+        Returns: number of annotations created
+        """
+        if not annotations:
+            return 0
+
         conn = self.db.connect()
-        cursor = conn.cursor()
 
-        result = cursor.execute(
-            "SELECT * FROM annotations WHERE annotation_id = ?",
-            (annotation_id,)
-        ).fetchone()
+        try:
+            conn.executemany("""
+                INSERT INTO annotations (doc_id, page_number, content, position_data, color, annotation_type)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(
+                ann['doc_id'],
+                ann['page_number'],
+                ann['content'],
+                ann.get('position_data'),
+                ann.get('color', '#FFFF00'),
+                ann.get('annotation_type', 'note')
+            ) for ann in annotations])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        logger.info(f"Created {len(annotations)} annotations")
+        return len(annotations)
+
+    def get_by_id(self, annotation_id: int) -> Optional[Dict]:
+        """Get annotation by ID"""
+        with self.db.read_connection() as conn:
+            result = conn.execute(
+                "SELECT * FROM annotations WHERE annotation_id = ?",
+                (annotation_id,)
+            ).fetchone()
 
         return dict(result) if result else None
 
-    def get_by_document(self, doc_id: int) -> List[Dict]:
-        """Get all annotations for a document"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
+    def get_by_document(self, doc_id: int, as_dict: bool = True) -> List[Dict]:
+        """
+        Get all annotations for a document.
+        as_dict=False returns the sqlite3.Row objects themselves (indexable by
+        column name, no .get()), skipping a dict per row for read-only callers.
+        """
+        with self.db.read_connection() as conn:
+            results = conn.execute(
+                "SELECT * FROM annotations WHERE doc_id = ? ORDER BY page_number, created_at",
+                (doc_id,)
+            ).fetchall()
+
+        if not as_dict:
+            return results
+        return [dict(row) for row in results]
+
+    def get_by_documents(self, doc_ids: List[int]) -> Dict[int, List[Dict]]:
+        """
+        Get the annotations of many documents in one query.
+        Returns: doc_id -> annotations (ordered as get_by_document); [] for documents without any
+        """
+        annotations_by_doc = {doc_id: [] for doc_id in doc_ids}
+        if not annotations_by_doc:
+            return annotations_by_doc
 
-        results = cursor.execute(
-            "SELECT * FROM annotations WHERE doc_id = ? ORDER BY page_number, created_at",
-            (doc_id,)
-        ).fetchall()
+        with self.db.read_connection() as conn:
+            results = conn.execute("""
+                SELECT * FROM annotations
+                WHERE doc_id IN (SELECT value FROM json_each(?))
+                ORDER BY doc_id, page_number, created_at
+            """, (json.dumps(list(annotations_by_doc)),)).fetchall()
 
-        return [dict(row) for row in results]
+        for row in results:
+            annotations_by_doc[row['doc_id']].append(dict(row))
+
+        return annotations_by_doc
 
     def get_by_page(self, doc_id: int, page_number: int) -> List[Dict]:
         """Get annotations for a specific page"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        results = cursor.execute(
-            "SELECT * FROM annotations WHERE doc_id = ? AND page_number = ? ORDER BY created_at",
-            (doc_id, page_number)
-        ).fetchall()
+        with self.db.read_connection() as conn:
+            results = conn.execute(
+                "SELECT * FROM annotations WHERE doc_id = ? AND page_number = ? ORDER BY created_at",
+                (doc_id, page_number)
+            ).fetchall()
 
         return [dict(row) for row in results]
 
     def update(self, annotation_id: int, **kwargs) -> None:
         """Update annotation"""
         conn = self.db.connect()
-        cursor = conn.cursor()
 
         kwargs['modified_at'] = datetime.now().isoformat()
 
-        set_clause = ', '.join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [annotation_id]
+        unknown = kwargs.keys() - _UPDATABLE_COLUMNS
+        if unknown:
+            raise ValueError(f"Cannot update annotation columns: {sorted(unknown)}")
 
-        query = f"UPDATE annotations SET {set_clause} WHERE annotation_id = ?"
+        columns = tuple(sorted(kwargs))
+        values = [kwargs[c] for c in columns] + [annotation_id]
 
-        cursor.execute(query, values)
+        conn.execute(build_update_sql('annotations', columns, 'annotation_id'), values)
         conn.commit()
 
         logger.info(f"Updated annotation: {annotation_id}")
@@ -96,21 +156,18 @@ class AnnotationDAO:
     def delete(self, annotation_id: int) -> None:
         """Delete annotation"""
         conn = self.db.connect()
-        cursor = conn.cursor()
 
-        cursor.execute("DELETE FROM annotations WHERE annotation_id = ?", (annotation_id,))
+        conn.execute("DELETE FROM annotations WHERE annotation_id = ?", (annotation_id,))
         conn.commit()
 
         logger.info(f"Deleted annotation: {annotation_id}")
 
     def count_by_document(self, doc_id: int) -> int:
         """Get annotation count for document"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        result = cursor.execute(
-            "SELECT COUNT(*) FROM annotations WHERE doc_id = ?",
-            (doc_id,)
-        ).fetchone()
+        with self.db.read_connection() as conn:
+            result = conn.execute(
+                "SELECT COUNT(*) FROM annotations WHERE doc_id = ?",
+                (doc_id,)
+            ).fetchone()
 
         return result[0] if result else 0
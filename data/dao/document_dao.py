@@ -1,12 +1,27 @@
 """
 Data Access Object for documents table
 """
+import json
 import logging
 from typing import Optional, List, Dict
 from datetime import datetime
 
+from data.database import DOCUMENTS_FTS_ENABLED, build_update_sql
+
 logger = logging.getLogger(__name__)
 
+# Columns callers may set when creating a document
+_DOCUMENT_FIELDS = (
+    'file_path', 'file_hash', 'title', 'authors', 'abstract',
+    'year', 'journal', 'doi', 'page_count', 'file_size', 'metadata'
+)
+
+# Shortest substring the trigram documents_fts index can match
+_FTS_MIN_TERM_CHARS = 3
+
+# Columns update() may set
+_UPDATABLE_COLUMNS = frozenset(_DOCUMENT_FIELDS) | {'modified_at'}
+
 
 class DocumentDAO:
     """Handle database operations for documents"""
@@ -20,15 +35,9 @@ class DocumentDAO:
         Returns: doc_id
         """
         conn = self.db.connect()
-        cursor = conn.cursor()
-
-        fields = [
-            'file_path', 'file_hash', 'title', 'authors', 'abstract',
-            'year', 'journal', 'doi', 'page_count', 'file_size', 'metadata'
-        ]
 
         # Filter only provided fields
-        data = {k: v for k, v in kwargs.items() if k in fields}
+        data = {k: v for k, v in kwargs.items() if k in _DOCUMENT_FIELDS}
 
         columns = ', '.join(data.keys())
         placeholders = ', '.join('?' for _ in data)
@@ -38,76 +47,116 @@ class DocumentDAO:
             VALUES ({placeholders})
         """
 
-        cursor.execute(query, list(data.values()))
+        cursor = conn.execute(query, list(data.values()))
         conn.commit()
 
         doc_id = cursor.lastrowid
         logger.info(f"Created document: {doc_id}")
         return doc_id
 
-    def get_by_id(self, doc_id: int) -> Optional[Dict]:
-        """Get document by ID"""
+    def create_many(self, documents: List[Dict]) -> int:
+        """
+        Create many document records with one executemany and one commit.
+        Fields missing from a dict are stored as NULL (none of them has a default).
+        Returns: number of documents created
+        """
+        if not documents:
+            return 0
+
         conn = self.db.connect()
-        cursor = conn.cursor()
 
-        result = cursor.execute(
-            "SELECT * FROM documents WHERE doc_id = ?",
-            (doc_id,)
-        ).fetchone()
+        columns = ', '.join(_DOCUMENT_FIELDS)
+        placeholders = ', '.join('?' for _ in _DOCUMENT_FIELDS)
+
+        try:
+            conn.executemany(f"""
+                INSERT INTO documents ({columns})
+                VALUES ({placeholders})
+            """, [tuple(doc.get(k) for k in _DOCUMENT_FIELDS) for doc in documents])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        logger.info(f"Created {len(documents)} documents")
+        return len(documents)
+
+    def get_by_id(self, doc_id: int) -> Optional[Dict]:
+        """Get document by ID"""
+        with self.db.read_connection() as conn:
+            result = conn.execute(
+                "SELECT * FROM documents WHERE doc_id = ?",
+                (doc_id,)
+            ).fetchone()
 
         return dict(result) if result else None
 
+    def get_many(self, doc_ids: List[int]) -> List[Dict]:
+        """Get documents by ID in one query (input order; missing IDs are skipped)"""
+        if not doc_ids:
+            return []
+
+        with self.db.read_connection() as conn:
+            results = conn.execute("""
+                SELECT d.*
+                FROM json_each(?) ids
+                JOIN documents d ON d.doc_id = ids.value
+                ORDER BY ids.key
+            """, (json.dumps(list(doc_ids)),)).fetchall()
+
+        return [dict(row) for row in results]
+
     def get_by_path(self, file_path: str) -> Optional[Dict]:
         """Get document by file path"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        result = cursor.execute(
-            "SELECT * FROM documents WHERE file_path = ?",
-            (file_path,)
-        ).fetchone()
+        with self.db.read_connection() as conn:
+            result = conn.execute(
+                "SELECT * FROM documents WHERE file_path = ?",
+                (file_path,)
+            ).fetchone()
 
         return dict(result) if result else None
 
     def get_by_hash(self, file_hash: str) -> Optional[Dict]:
         """Get document by file hash (check for duplicates)"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        result = cursor.execute(
-            "SELECT * FROM documents WHERE file_hash = ?",
-            (file_hash,)
-        ).fetchone()
+        with self.db.read_connection() as conn:
+            result = conn.execute(
+                "SELECT * FROM documents WHERE file_hash = ?",
+                (file_hash,)
+            ).fetchone()
 
         return dict(result) if result else None
 
-    def get_all(self, limit: int = None, offset: int = 0) -> List[Dict]:
-        """Get all documents with optional pagination"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        query = "SELECT * FROM documents ORDER BY added_at DESC"
-
-        if limit:
-            query += f" LIMIT {limit} OFFSET {offset}"
-
-        results = cursor.execute(query).fetchall()
+    def get_all(self, limit: int = None, offset: int = 0, as_dict: bool = True) -> List[Dict]:
+        """
+        Get all documents with optional pagination.
+        as_dict=False returns the sqlite3.Row objects themselves (indexable by
+        column name, no .get()), skipping a dict per row for read-only callers.
+        """
+        with self.db.read_connection() as conn:
+            # Always bound (LIMIT -1 = no limit) so every page reuses one prepared statement
+            results = conn.execute(
+                "SELECT * FROM documents ORDER BY added_at DESC LIMIT ? OFFSET ?",
+                (limit or -1, offset)
+            ).fetchall()
+        if not as_dict:
+            return results
         return [dict(row) for row in results]
 
     def update(self, doc_id: int, **kwargs) -> None:
         """Update document fields"""
         conn = self.db.connect()
-        cursor = conn.cursor()
 
         # Add modified timestamp
         kwargs['modified_at'] = datetime.now().isoformat()
 
-        set_clause = ', '.join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [doc_id]
+        unknown = kwargs.keys() - _UPDATABLE_COLUMNS
+        if unknown:
+            raise ValueError(f"Cannot update document columns: {sorted(unknown)}")
 
-        query = f"UPDATE documents SET {set_clause} WHERE doc_id = ?"
+        columns = tuple(sorted(kwargs))
+        values = [kwargs[c] for c in columns] + [doc_id]
 
-        cursor.execute(query, values)
+        conn.execute(build_update_sql('documents', columns, 'doc_id'), values)
         conn.commit()
 
         logger.info(f"Updated document: {doc_id}")
@@ -115,9 +164,8 @@ class DocumentDAO:
     def delete(self, doc_id: int) -> None:
         """Delete document (cascades to annotations and tags)"""
         conn = self.db.connect()
-        cursor = conn.cursor()
 
-        cursor.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+        conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
         conn.commit()
 
         logger.info(f"Deleted document: {doc_id}")
@@ -127,35 +175,40 @@ class DocumentDAO:
         Search documents with filters.
         Supported filters: title, year, journal, tags
         """
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
         conditions = []
         values = []
-
-        if 'title' in filters:
-            conditions.append("title LIKE ?")
-            values.append(f"%{filters['title']}%")
+        match_terms = []
+
+        # Substring filters go through documents_fts where the trigram index can answer them
+        for column in ('title', 'journal'):
+            if column not in filters:
+                continue
+            text = str(filters[column])
+            if DOCUMENTS_FTS_ENABLED and len(text) >= _FTS_MIN_TERM_CHARS:
+                phrase = text.replace('"', '""')
+                match_terms.append(f'{column} : "{phrase}"')
+            else:
+                conditions.append(f"{column} LIKE ?")
+                values.append(f"%{text}%")
+
+        if match_terms:
+            conditions.append("doc_id IN (SELECT rowid FROM documents_fts WHERE documents_fts MATCH ?)")
+            values.append(" AND ".join(match_terms))
 
         if 'year' in filters:
             conditions.append("year = ?")
             values.append(filters['year'])
 
-        if 'journal' in filters:
-            conditions.append("journal LIKE ?")
-            values.append(f"%{filters['journal']}%")
-
         where_clause = " AND ".join(conditions) if conditions else "1=1"
 
         query = f"SELECT * FROM documents WHERE {where_clause} ORDER BY added_at DESC"
 
-        results = cursor.execute(query, values).fetchall()
+        with self.db.read_connection() as conn:
+            results = conn.execute(query, values).fetchall()
         return [dict(row) for row in results]
 
     def count(self) -> int:
         """Get total document count"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        result = cursor.execute("SELECT COUNT(*) FROM documents").fetchone()
+        with self.db.read_connection() as conn:
+            result = conn.execute("SELECT COUNT(*) FROM documents").fetchone()
         return result[0] if result else 0
@@ -1,17 +1,25 @@
 """
 Data Access Object for tags and tag relationships
 """
+import json
 import logging
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
+
+from data.database import build_update_sql
 
 logger = logging.getLogger(__name__)
 
+# Columns update() may set
+_UPDATABLE_COLUMNS = frozenset({'tag_name', 'parent_tag_id', 'color'})
+
 
 class TagDAO:
     """Handle database operations for tags"""
 
     def __init__(self, database):
         self.db = database
+        # (library_version, roots) from the last get_tag_hierarchy call
+        self._hierarchy_cache: Optional[Tuple[int, List[Dict]]] = None
 
     def create(self, tag_name: str, parent_tag_id: int = None, color: str = '#3498db') -> int:
         """
@@ -19,16 +27,16 @@ class TagDAO:
         Returns: tag_id
         """
         conn = self.db.connect()
-        cursor = conn.cursor()
 
         try:
-            cursor.execute("""
+            cursor = conn.execute("""
                 INSERT INTO tags (tag_name, parent_tag_id, color)
                 VALUES (?, ?, ?)
             """, (tag_name, parent_tag_id, color))
 
             conn.commit()
             tag_id = cursor.lastrowid
+            self._hierarchy_cache = None
 
             logger.info(f"Created tag: {tag_id} - {tag_name}")
             return tag_id
@@ -39,28 +47,39 @@ class TagDAO:
 
     def get_by_id(self, tag_id: int) -> Optional[Dict]:
         """Get tag by ID"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        result = cursor.execute(
-            "SELECT * FROM tags WHERE tag_id = ?",
-            (tag_id,)
-        ).fetchone()
+        with self.db.read_connection() as conn:
+            result = conn.execute(
+                "SELECT * FROM tags WHERE tag_id = ?",
+                (tag_id,)
+            ).fetchone()
 
         return dict(result) if result else None
 
     def get_by_name(self, tag_name: str) -> Optional[Dict]:
         """Get tag by name"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        result = cursor.execute(
-            "SELECT * FROM tags WHERE tag_name = ?",
-            (tag_name,)
-        ).fetchone()
+        with self.db.read_connection() as conn:
+            result = conn.execute(
+                "SELECT * FROM tags WHERE tag_name = ?",
+                (tag_name,)
+            ).fetchone()
 
         return dict(result) if result else None
 
+    def get_many(self, tag_ids: List[int]) -> List[Dict]:
+        """Get tags by ID in one query (input order; missing IDs are skipped)"""
+        if not tag_ids:
+            return []
+
+        with self.db.read_connection() as conn:
+            results = conn.execute("""
+                SELECT t.*
+                FROM json_each(?) ids
+                JOIN tags t ON t.tag_id = ids.value
+                ORDER BY ids.key
+            """, (json.dumps(list(tag_ids)),)).fetchall()
+
+        return [dict(row) for row in results]
+
     def get_or_create(self, tag_name: str, **kwargs) -> int:
         """Get tag ID if exists, otherwise create it"""
         existing = self.get_by_name(tag_name)
@@ -69,39 +88,47 @@ class TagDAO:
         else:
             return self.create(tag_name, **kwargs)
 
-    def get_all(self) -> List[Dict]:
-        """Get all tags"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        results = cursor.execute(
-            "SELECT * FROM tags ORDER BY tag_name"
-        ).fetchall()
+    def get_all(self, as_dict: bool = True) -> List[Dict]:
+        """
+        Get all tags.
+        as_dict=False returns the sqlite3.Row objects themselves (indexable by
+        column name, no .get()), skipping a dict per row for read-only callers.
+        """
+        with self.db.read_connection() as conn:
+            results = conn.execute(
+                "SELECT * FROM tags ORDER BY tag_name"
+            ).fetchall()
 
+        if not as_dict:
+            return results
         return [dict(row) for row in results]
 
     def update(self, tag_id: int, **kwargs) -> None:
         """Update tag"""
         conn = self.db.connect()
-        cursor = conn.cursor()
 
-        set_clause = ', '.join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [tag_id]
+        unknown = kwargs.keys() - _UPDATABLE_COLUMNS
+        if unknown:
+            raise ValueError(f"Cannot update tag columns: {sorted(unknown)}")
+        if not kwargs:
+            return
 
-        query = f"UPDATE tags SET {set_clause} WHERE tag_id = ?"
+        columns = tuple(sorted(kwargs))
+        values = [kwargs[c] for c in columns] + [tag_id]
 
-        cursor.execute(query, values)
+        conn.execute(build_update_sql('tags', columns, 'tag_id'), values)
         conn.commit()
+        self._hierarchy_cache = None
 
         logger.info(f"Updated tag: {tag_id}")
 
     def delete(self, tag_id: int) -> None:
         """Delete tag (cascades to document_tags and annotation_tags)"""
         conn = self.db.connect()
-        cursor = conn.cursor()
 
-        cursor.execute("DELETE FROM tags WHERE tag_id = ?", (tag_id,))
+        conn.execute("DELETE FROM tags WHERE tag_id = ?", (tag_id,))
         conn.commit()
+        self._hierarchy_cache = None
 
         logger.info(f"Deleted tag: {tag_id}")
 
@@ -110,29 +137,46 @@ class TagDAO:
     def tag_document(self, doc_id: int, tag_id: int) -> None:
         """Add tag to document"""
         conn = self.db.connect()
-        cursor = conn.cursor()
 
-        try:
-            cursor.execute("""
-                INSERT INTO document_tags (doc_id, tag_id)
-                VALUES (?, ?)
-            """, (doc_id, tag_id))
+        # Already-tagged documents are skipped
+        conn.execute("""
+            INSERT OR IGNORE INTO document_tags (doc_id, tag_id)
+            VALUES (?, ?)
+        """, (doc_id, tag_id))
+
+        conn.commit()
+        logger.info(f"Tagged document {doc_id} with tag {tag_id}")
+
+    def tag_documents_bulk(self, doc_tag_pairs: List[Tuple[int, int]], commit: bool = True) -> int:
+        """
+        Add many (doc_id, tag_id) links in one statement; existing links are skipped.
+        Batches commit once instead of once per link as tag_document does.
+
+        Args:
+            doc_tag_pairs: (doc_id, tag_id) pairs
+            commit: False to leave committing to the caller's transaction
+
+        Returns:
+            Number of links inserted
+        """
+        conn = self.db.connect()
 
+        cursor = conn.executemany("""
+            INSERT OR IGNORE INTO document_tags (doc_id, tag_id)
+            VALUES (?, ?)
+        """, doc_tag_pairs)
+
+        if commit:
             conn.commit()
-            logger.info(f"Tagged document {doc_id} with tag {tag_id}")
 
-        except Exception as e:
-            # Ignore duplicate constraint errors
-            if "UNIQUE constraint" not in str(e):
-                logger.error(f"Failed to tag document: {e}")
-                raise
+        logger.info(f"Tagged {cursor.rowcount} document links in bulk")
+        return cursor.rowcount
 
     def untag_document(self, doc_id: int, tag_id: int) -> None:
         """Remove tag from document"""
         conn = self.db.connect()
-        cursor = conn.cursor()
 
-        cursor.execute("""
+        conn.execute("""
             DELETE FROM document_tags
             WHERE doc_id = ? AND tag_id = ?
         """, (doc_id, tag_id))
@@ -142,29 +186,49 @@ class TagDAO:
 
     def get_document_tags(self, doc_id: int) -> List[Dict]:
         """Get all tags for a document"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        results = cursor.execute("""
-            SELECT t.*
-            FROM tags t
-            JOIN document_tags dt ON t.tag_id = dt.tag_id
-            WHERE dt.doc_id = ?
-            ORDER BY t.tag_name
-        """, (doc_id,)).fetchall()
+        with self.db.read_connection() as conn:
+            results = conn.execute("""
+                SELECT t.*
+                FROM tags t
+                JOIN document_tags dt ON t.tag_id = dt.tag_id
+                WHERE dt.doc_id = ?
+                ORDER BY t.tag_name
+            """, (doc_id,)).fetchall()
 
         return [dict(row) for row in results]
 
+    def get_tags_for_docs(self, doc_ids: List[int]) -> Dict[int, List[Dict]]:
+        """
+        Get the tags of many documents in one query.
+        Returns: doc_id -> tags (ordered by name, as get_document_tags); [] for untagged documents
+        """
+        tags_by_doc = {doc_id: [] for doc_id in doc_ids}
+        if not tags_by_doc:
+            return tags_by_doc
+
+        with self.db.read_connection() as conn:
+            results = conn.execute("""
+                SELECT dt.doc_id, t.*
+                FROM document_tags dt
+                JOIN tags t ON t.tag_id = dt.tag_id
+                WHERE dt.doc_id IN (SELECT value FROM json_each(?))
+                ORDER BY dt.doc_id, t.tag_name
+            """, (json.dumps(list(tags_by_doc)),)).fetchall()
+
+        for row in results:
+            tag = dict(row)
+            tags_by_doc[tag.pop('doc_id')].append(tag)
+
+        return tags_by_doc
+
     def get_documents_by_tag(self, tag_id: int) -> List[int]:
         """Get all document IDs with this tag"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        results = cursor.execute("""
-            SELECT doc_id
-            FROM document_tags
-            WHERE tag_id = ?
-        """, (tag_id,)).fetchall()
+        with self.db.read_connection() as conn:
+            results = conn.execute("""
+                SELECT doc_id
+                FROM document_tags
+                WHERE tag_id = ?
+            """, (tag_id,)).fetchall()
 
         return [row[0] for row in results]
 
@@ -173,28 +237,21 @@ class TagDAO:
     def tag_annotation(self, annotation_id: int, tag_id: int) -> None:
         """Add tag to annotation"""
         conn = self.db.connect()
-        cursor = conn.cursor()
 
-        try:
-            cursor.execute("""
-                INSERT INTO annotation_tags (annotation_id, tag_id)
-                VALUES (?, ?)
-            """, (annotation_id, tag_id))
-
-            conn.commit()
-            logger.info(f"Tagged annotation {annotation_id} with tag {tag_id}")
+        # Already-tagged annotations are skipped
+        conn.execute("""
+            INSERT OR IGNORE INTO annotation_tags (annotation_id, tag_id)
+            VALUES (?, ?)
+        """, (annotation_id, tag_id))
 
-        except Exception as e:
-            if "UNIQUE constraint" not in str(e):
-                logger.error(f"Failed to tag annotation: {e}")
-                raise
+        conn.commit()
+        logger.info(f"Tagged annotation {annotation_id} with tag {tag_id}")
 
     def untag_annotation(self, annotation_id: int, tag_id: int) -> None:
         """Remove tag from annotation"""
         conn = self.db.connect()
-        cursor = conn.cursor()
 
-        cursor.execute("""
+        conn.execute("""
             DELETE FROM annotation_tags
             WHERE annotation_id = ? AND tag_id = ?
         """, (annotation_id, tag_id))
@@ -204,16 +261,14 @@ class TagDAO:
 
     def get_annotation_tags(self, annotation_id: int) -> List[Dict]:
         """Get all tags for an annotation"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        results = cursor.execute("""
-            SELECT t.*
-            FROM tags t
-            JOIN annotation_tags at ON t.tag_id = at.tag_id
-            WHERE at.annotation_id = ?
-            ORDER BY t.tag_name
-        """, (annotation_id,)).fetchall()
+        with self.db.read_connection() as conn:
+            results = conn.execute("""
+                SELECT t.*
+                FROM tags t
+                JOIN annotation_tags at ON t.tag_id = at.tag_id
+                WHERE at.annotation_id = ?
+                ORDER BY t.tag_name
+            """, (annotation_id,)).fetchall()
 
         return [dict(row) for row in results]
 
@@ -221,14 +276,12 @@ class TagDAO:
 
     def get_children(self, parent_tag_id: int) -> List[Dict]:
         """Get child tags"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-
-        results = cursor.execute("""
-            SELECT * FROM tags
-            WHERE parent_tag_id = ?
-            ORDER BY tag_name
-        """, (parent_tag_id,)).fetchall()
+        with self.db.read_connection() as conn:
+            results = conn.execute("""
+                SELECT * FROM tags
+                WHERE parent_tag_id = ?
+                ORDER BY tag_name
+            """, (parent_tag_id,)).fetchall()
 
         return [dict(row) for row in results]
 
@@ -236,8 +289,15 @@ class TagDAO:
         """
         Get all tags organized in hierarchy.
         Returns root tags with nested children.
+        The tree is reused until the library version changes (any tag write,
+        from any connection, bumps it), so treat it as read-only.
         """
-        all_tags = self.get_all()
+        version = self.db.get_library_version()
+        cached = self._hierarchy_cache
+        if version is not None and cached is not None and cached[0] == version:
+            return cached[1]
+
+        all_tags = self.get_all(as_dict=False)
 
         # Build tree structure
         tag_dict = {tag['tag_id']: {**tag, 'children': []} for tag in all_tags}
@@ -251,4 +311,6 @@ class TagDAO:
                 if parent:
                     parent['children'].append(tag_dict[tag['tag_id']])
 
+        if version is not None:
+            self._hierarchy_cache = (version, roots)
         return roots
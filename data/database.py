@@ -1,24 +1,93 @@
 """
 Database connection and schema management
 """
+import functools
+import hashlib
+import json
 import sqlite3
 import logging
+import queue
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List, Tuple
 from contextlib import contextmanager
 
-from config import DB_JOURNAL_MODE, DB_SYNCHRONOUS, DB_CACHE_SIZE, DB_TEMP_STORE
+from config import (
+    DB_JOURNAL_MODE, DB_SYNCHRONOUS, DB_CACHE_SIZE, DB_TEMP_STORE, DB_MMAP_SIZE, DB_READ_POOL_SIZE,
+    DB_READ_POOL_TIMEOUT, DB_BUSY_TIMEOUT_MS, DB_WAL_AUTOCHECKPOINT
+)
 
 logger = logging.getLogger(__name__)
 
+# FTS5 search index definition, shared by initialize_schema and SearchEngine.rebuild_index
+SEARCH_INDEX_SCHEMA = """
+    CREATE VIRTUAL TABLE {if_not_exists}search_index USING fts5(
+        content_type UNINDEXED,
+        content,
+        doc_id UNINDEXED,
+        annotation_id UNINDEXED,
+        tag_id UNINDEXED,
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+"""
+
+# Per-connection tuning shared by the RW connection and the read-only pool
+_CONNECTION_PRAGMAS = f"""
+    PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS};
+    PRAGMA cache_size = {DB_CACHE_SIZE};
+    PRAGMA temp_store = {DB_TEMP_STORE};
+    PRAGMA mmap_size = {DB_MMAP_SIZE};
+"""
+
+# Cache writes are best effort: give up quickly instead of queueing behind
+# a long write transaction (possibly held by the calling thread itself)
+_CACHE_WRITE_TIMEOUT = 0.5
+
+# documents_fts uses the trigram tokenizer (SQLite 3.34+), whose MATCH is a
+# case-insensitive substring test like the LIKE '%...%' filters it replaces
+DOCUMENTS_FTS_ENABLED = sqlite3.sqlite_version_info >= (3, 34, 0)
+DOCUMENTS_FTS_COLUMNS = ('title', 'authors', 'abstract', 'journal')
+
+# Columns added to recommendation_cache after its first release
+_RECOMMENDATION_CACHE_MIGRATIONS = (
+    ('category', "TEXT DEFAULT 'general'"),
+    ('common_keywords', 'TEXT'),
+    ('status', "TEXT DEFAULT 'unread'"),
+    ('reviewed_at', 'TIMESTAMP'),
+)
+
+# Tables whose changes invalidate cached search / duplicate results
+# (search_index is FTS5 and cannot carry triggers: its writers call bump_library_version)
+LIBRARY_VERSION_TABLES = (
+    'documents', 'annotations', 'tags', 'document_tags', 'annotation_tags'
+)
+
+
+@functools.lru_cache(maxsize=64)
+def build_update_sql(table: str, columns: Tuple[str, ...], id_column: str) -> str:
+    """
+    UPDATE statement setting the given columns of one row.
+    Cached so each update shape yields identical SQL text, which sqlite3's
+    statement cache then reuses instead of re-preparing.
+    Identifiers are interpolated: callers must validate them first.
+    """
+    set_clause = ", ".join(f"{c} = ?" for c in columns)
+    return f"UPDATE {table} SET {set_clause} WHERE {id_column} = ?"
+
 
 class Database:
     """SQLite database manager"""
 
-    def __init__(self, db_path: Path):
+    def __init__(self, db_path: Path, read_pool_size: int = DB_READ_POOL_SIZE):
         self.db_path = Path(db_path)
         self._connection: Optional[sqlite3.Connection] = None
 
+        # Read-only connections, opened lazily up to read_pool_size
+        self.read_pool_size = read_pool_size
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
     def connect(self) -> sqlite3.Connection:
         """Create or get database connection"""
         if self._connection is None:
@@ -28,17 +97,18 @@ class Database:
             self._connection = sqlite3.connect(
                 str(self.db_path),
                 check_same_thread=False,  # Allow multi-threaded access
-                timeout=30.0  # Wait up to 30 seconds for locks
+                timeout=DB_BUSY_TIMEOUT_MS / 1000
             )
 
-            # Enable foreign keys
-            self._connection.execute("PRAGMA foreign_keys = ON")
-
-            # Configure for performance and concurrency
-            self._connection.execute(f"PRAGMA journal_mode = {DB_JOURNAL_MODE}")
-            self._connection.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
-            self._connection.execute(f"PRAGMA cache_size = {DB_CACHE_SIZE}")
-            self._connection.execute(f"PRAGMA temp_store = {DB_TEMP_STORE}")
+            # Configure for performance and concurrency in one round trip;
+            # foreign keys are per connection, so they are (re)enabled last
+            self._connection.executescript(f"""
+                PRAGMA journal_mode = {DB_JOURNAL_MODE};
+                PRAGMA synchronous = {DB_SYNCHRONOUS};
+                PRAGMA wal_autocheckpoint = {DB_WAL_AUTOCHECKPOINT};
+                {_CONNECTION_PRAGMAS}
+                PRAGMA foreign_keys = ON;
+            """)
 
             # Row factory for dict-like access
             self._connection.row_factory = sqlite3.Row
@@ -47,9 +117,113 @@ class Database:
 
         return self._connection
 
+    def _open_reader(self) -> sqlite3.Connection:
+        """Open a read-only connection to the database file"""
+        # The RW connection creates the file and switches it to WAL first
+        self.connect()
+
+        conn = sqlite3.connect(
+            f"{self.db_path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,  # Handed between threads by the pool
+            timeout=DB_BUSY_TIMEOUT_MS / 1000
+        )
+        conn.executescript(f"""
+            PRAGMA query_only = ON;
+            {_CONNECTION_PRAGMAS}
+        """)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _checkout_reader(self) -> sqlite3.Connection:
+        """Take a reader from the pool, opening one if the pool is not full yet"""
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._readers_lock:
+            if len(self._all_readers) < self.read_pool_size:
+                conn = self._open_reader()
+                self._all_readers.append(conn)
+                return conn
+
+        try:
+            return self._readers.get(timeout=DB_READ_POOL_TIMEOUT)
+        except queue.Empty:
+            logger.warning(
+                f"Read connection pool exhausted: all {self.read_pool_size} readers "
+                f"busy for {DB_READ_POOL_TIMEOUT}s"
+            )
+            raise sqlite3.OperationalError("read connection pool exhausted")
+
+    def _return_reader(self, conn: sqlite3.Connection):
+        """Hand a reader back to the pool (or close it if the pool was closed)"""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._readers_lock:
+            pooled = any(conn is reader for reader in self._all_readers)
+        if pooled:
+            self._readers.put(conn)
+        else:
+            # Pool was closed while this connection was lent out
+            conn.close()
+
+    @contextmanager
+    def acquire_reader(self):
+        """
+        Context manager lending a pooled read-only connection
+
+        Under WAL, readers run concurrently with each other and with the
+        single RW connection, so queries do not queue behind writes.
+        They see only committed data. Raises sqlite3.OperationalError if no
+        reader frees up within DB_READ_POOL_TIMEOUT.
+        """
+        conn = self._checkout_reader()
+        try:
+            yield conn
+        finally:
+            self._return_reader(conn)
+
+    @contextmanager
+    def read_connection(self):
+        """
+        Context manager lending a connection for a read: a pooled reader,
+        unless the RW connection has an open transaction (whose uncommitted
+        changes the read must see), the pool is disabled, or every reader
+        stays busy past DB_READ_POOL_TIMEOUT.
+        """
+        conn = self.connect()
+        if conn.in_transaction or self.read_pool_size <= 0:
+            yield conn
+            return
+
+        try:
+            reader = self._checkout_reader()
+        except sqlite3.OperationalError:
+            logger.debug("Falling back to the RW connection for a read")
+            yield conn
+            return
+
+        try:
+            yield reader
+        finally:
+            self._return_reader(reader)
+
     def close(self):
         """Close database connection"""
+        with self._readers_lock:
+            for reader in self._all_readers:
+                reader.close()
+            self._all_readers.clear()
+            self._readers = queue.Queue()
+
         if self._connection:
+            try:
+                # Let the query planner refresh statistics it found missing/stale
+                self._connection.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logger.debug(f"PRAGMA optimize skipped: {e}")
             self._connection.close()
             self._connection = None
             logger.info("Database connection closed")
@@ -69,8 +243,23 @@ class Database:
     def initialize_schema(self):
         """Create all tables and indexes"""
         conn = self.connect()
+        if conn.in_transaction:
+            conn.commit()
+
+        # One transaction for the whole schema: a single commit (and fsync)
+        # instead of an autocommit per DDL statement
         cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            self._create_schema(cursor)
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        logger.info("Database schema initialized successfully")
 
+    def _create_schema(self, cursor: sqlite3.Cursor):
+        """Create tables, triggers and indexes, and migrate old columns (caller commits)"""
         # Documents table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS documents (
@@ -175,16 +364,7 @@ class Database:
         """)
 
         # FTS5 virtual table for search
-        cursor.execute("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
-                content_type,
-                content,
-                doc_id UNINDEXED,
-                annotation_id UNINDEXED,
-                tag_id UNINDEXED,
-                tokenize='porter unicode61'
-            )
-        """)
+        cursor.execute(SEARCH_INDEX_SCHEMA.format(if_not_exists="IF NOT EXISTS "))
 
         # Favorite journals table
         cursor.execute("""
@@ -222,25 +402,12 @@ class Database:
         """)
 
         # Add missing columns to existing table (migration)
-        try:
-            cursor.execute("ALTER TABLE recommendation_cache ADD COLUMN category TEXT DEFAULT 'general'")
-        except:
-            pass  # Column already exists
-
-        try:
-            cursor.execute("ALTER TABLE recommendation_cache ADD COLUMN common_keywords TEXT")
-        except:
-            pass
-
-        try:
-            cursor.execute("ALTER TABLE recommendation_cache ADD COLUMN status TEXT DEFAULT 'unread'")
-        except:
-            pass
-
-        try:
-            cursor.execute("ALTER TABLE recommendation_cache ADD COLUMN reviewed_at TIMESTAMP")
-        except:
-            pass
+        existing_columns = {
+            row[0] for row in cursor.execute("SELECT name FROM pragma_table_info('recommendation_cache')")
+        }
+        for column, definition in _RECOMMENDATION_CACHE_MIGRATIONS:
+            if column not in existing_columns:
+                cursor.execute(f"ALTER TABLE recommendation_cache ADD COLUMN {column} {definition}")
 
         # References table (extracted from PDFs)
         cursor.execute("""
@@ -311,21 +478,122 @@ class Database:
             )
         """)
 
+        # Cached duplicate scans, valid for one library version (searches are cached in memory)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS result_cache (
+                cache_key TEXT PRIMARY KEY,
+                library_version INTEGER NOT NULL,
+                value TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # File hashes keyed by the stat they were computed from (integrity check)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS hash_cache (
+                doc_id INTEGER PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                file_hash TEXT NOT NULL,
+                FOREIGN KEY (doc_id) REFERENCES documents(doc_id) ON DELETE CASCADE
+            )
+        """)
+
+        # Library version: bumped by triggers on every change to searchable data
+        cursor.execute(
+            "INSERT OR IGNORE INTO app_settings (key, value) VALUES ('library_version', '0')"
+        )
+        for table in LIBRARY_VERSION_TABLES:
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE app_settings SET value = CAST(value AS INTEGER) + 1
+                        WHERE key = 'library_version';
+                    END
+                """)
+
+        # Full-text index over document metadata, kept in sync by triggers
+        if DOCUMENTS_FTS_ENABLED:
+            self._create_documents_fts(cursor)
+
         # Create indexes
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_title ON documents(title)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_year ON documents(year)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_journal ON documents(journal)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents(file_hash)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_doi ON documents(doi) WHERE doi IS NOT NULL")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_annotations_doc ON annotations(doc_id, page_number)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_highlights_doc ON highlights(doc_id, page_number)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_doc ON bookmarks(doc_id, page_number)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_tags_name ON tags(tag_name)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tags_name_nocase ON tags(tag_name COLLATE NOCASE)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_document_tags_tag ON document_tags(tag_id, doc_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_annotation_tags_tag ON annotation_tags(tag_id, annotation_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_recommendation_journal ON recommendation_cache(journal_id, fetched_at)")
+        # One recommendation per DOI per journal; drop legacy duplicates before enforcing it
+        cursor.execute("""
+            DELETE FROM recommendation_cache
+            WHERE article_doi <> '' AND cache_id NOT IN (
+                SELECT MIN(cache_id) FROM recommendation_cache
+                WHERE article_doi <> ''
+                GROUP BY journal_id, article_doi
+            )
+        """)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_reccache_journal_doi
+            ON recommendation_cache(journal_id, article_doi) WHERE article_doi <> ''
+        """)
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_references_doc ON document_references(doc_id, order_index)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_collections_parent ON collections(parent_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_collections_order ON collections(order_index)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_watched_folders_active ON watched_folders(is_active)")
 
-        conn.commit()
-        logger.info("Database schema initialized successfully")
+    @staticmethod
+    def _create_documents_fts(cursor: sqlite3.Cursor):
+        """Create documents_fts (external content on documents) and its sync triggers"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'documents_fts'"
+        ).fetchone()
+
+        columns = ", ".join(DOCUMENTS_FTS_COLUMNS)
+        new_values = ", ".join(f"new.{c}" for c in DOCUMENTS_FTS_COLUMNS)
+        old_values = ", ".join(f"old.{c}" for c in DOCUMENTS_FTS_COLUMNS)
+
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                {columns},
+                content='documents',
+                content_rowid='doc_id',
+                tokenize='trigram'
+            )
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_documents_fts_insert AFTER INSERT ON documents
+            BEGIN
+                INSERT INTO documents_fts(rowid, {columns}) VALUES (new.doc_id, {new_values});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_documents_fts_delete AFTER DELETE ON documents
+            BEGIN
+                INSERT INTO documents_fts(documents_fts, rowid, {columns})
+                VALUES ('delete', old.doc_id, {old_values});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_documents_fts_update AFTER UPDATE OF {columns} ON documents
+            BEGIN
+                INSERT INTO documents_fts(documents_fts, rowid, {columns})
+                VALUES ('delete', old.doc_id, {old_values});
+                INSERT INTO documents_fts(rowid, {columns}) VALUES (new.doc_id, {new_values});
+            END
+        """)
+
+        if not exists:
+            # Index documents added before the table existed
+            cursor.execute("INSERT INTO documents_fts(documents_fts) VALUES ('rebuild')")
 
     def vacuum(self):
         """Optimize database"""
@@ -333,6 +601,76 @@ class Database:
         conn.execute("VACUUM")
         logger.info("Database vacuumed")
 
+    def get_library_version(self, conn: Optional[sqlite3.Connection] = None) -> Optional[int]:
+        """Current library version (None if the schema predates it)"""
+        conn = conn or self.connect()
+        try:
+            result = conn.execute(
+                "SELECT value FROM app_settings WHERE key = 'library_version'"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return int(result[0]) if result else None
+
+    def bump_library_version(self, conn: Optional[sqlite3.Connection] = None):
+        """Advance the library version for writes no trigger sees (caller commits)"""
+        conn = conn or self.connect()
+        conn.execute(
+            "UPDATE app_settings SET value = CAST(value AS INTEGER) + 1 "
+            "WHERE key = 'library_version'"
+        )
+
+    @staticmethod
+    def make_cache_key(*parts) -> str:
+        """Stable result_cache key for JSON-serializable key parts"""
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get_cached_result(self, cache_key: str, library_version: int,
+                          conn: Optional[sqlite3.Connection] = None) -> Optional[str]:
+        """Cached value for cache_key, if it was stored for library_version"""
+        conn = conn or self.connect()
+        try:
+            result = conn.execute(
+                "SELECT value FROM result_cache WHERE cache_key = ? AND library_version = ?",
+                (cache_key, library_version)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return result[0] if result else None
+
+    def put_cached_result(self, cache_key: str, library_version: int, value: str):
+        """Store a cached value and drop entries from older library versions
+
+        Written through its own short-lived connection, so it never commits
+        (or rolls back) work pending on the shared RW connection.
+        """
+        try:
+            conn = sqlite3.connect(str(self.db_path), timeout=_CACHE_WRITE_TIMEOUT)
+        except sqlite3.Error as e:
+            logger.debug(f"Skipping result cache write: {e}")
+            return
+
+        try:
+            with conn:
+                conn.execute("DELETE FROM result_cache WHERE library_version < ?", (library_version,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO result_cache (cache_key, library_version, value) VALUES (?, ?, ?)",
+                    (cache_key, library_version, value)
+                )
+        except sqlite3.Error as e:
+            logger.debug(f"Skipping result cache write: {e}")
+        finally:
+            conn.close()
+
+    def clear_cached_results(self, conn: Optional[sqlite3.Connection] = None):
+        """Drop all cached results (caller commits)"""
+        conn = conn or self.connect()
+        try:
+            conn.execute("DELETE FROM result_cache")
+        except sqlite3.OperationalError:
+            pass
+
     def get_schema_version(self) -> int:
         """Get current schema version"""
         cursor = self.connect().cursor()
@@ -2,6 +2,9 @@
 PDF file handling and processing using PyMuPDF
 """
 import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 from io import BytesIO
@@ -13,30 +16,70 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Open documents kept across all handlers (least recently used are closed first)
+_DOCUMENT_CACHE_SIZE = 8
+
+# One cache for every PDFHandler, so the viewers and managers share handles
+# and close_pdf() releases a file for the whole application:
+# path -> (document, st_mtime_ns, st_size), in LRU order
+_DOCUMENT_CACHE: "OrderedDict[str, Tuple[fitz.Document, int, int]]" = OrderedDict()
+# MuPDF documents are not thread-safe: one caller at a time across handlers
+_CACHE_LOCK = threading.RLock()
+
 
 class PDFHandler:
     """Wrapper for PyMuPDF operations"""
 
     def __init__(self):
-        self._cache = {}  # Simple document cache
+        self._cache = _DOCUMENT_CACHE
+        self._lock = _CACHE_LOCK
 
     def open_pdf(self, pdf_path: Path) -> fitz.Document:
-        """Open PDF document"""
+        """
+        Open PDF document, reusing the cached handle while the file's
+        mtime and size are unchanged. The document is shared: do not close it
+        (close_all() does), and use it under _document() from other threads.
+        """
         pdf_path = Path(pdf_path)
-        if not pdf_path.exists():
+        try:
+            stat = pdf_path.stat()
+        except FileNotFoundError:
             raise FileNotFoundError(f"PDF not found: {pdf_path}")
 
-        try:
-            doc = fitz.open(str(pdf_path))
-            logger.debug(f"Opened PDF: {pdf_path} ({doc.page_count} pages)")
+        key = str(pdf_path.resolve())
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                doc, mtime_ns, size = cached
+                if mtime_ns == stat.st_mtime_ns and size == stat.st_size:
+                    self._cache.move_to_end(key)
+                    return doc
+                # File changed on disk since it was opened
+                del self._cache[key]
+                doc.close()
+
+            try:
+                doc = fitz.open(str(pdf_path))
+                logger.debug(f"Opened PDF: {pdf_path} ({doc.page_count} pages)")
+            except Exception as e:
+                logger.error(f"Failed to open PDF {pdf_path}: {e}")
+                raise
+
+            self._cache[key] = (doc, stat.st_mtime_ns, stat.st_size)
+            while len(self._cache) > _DOCUMENT_CACHE_SIZE:
+                _, (evicted, _, _) = self._cache.popitem(last=False)
+                evicted.close()
             return doc
-        except Exception as e:
-            logger.error(f"Failed to open PDF {pdf_path}: {e}")
-            raise
+
+    @contextmanager
+    def _document(self, pdf_path: Path):
+        """Cached document for pdf_path, held under the cache lock while in use"""
+        with self._lock:
+            yield self.open_pdf(pdf_path)
 
     def get_page_count(self, pdf_path: Path) -> int:
         """Get number of pages in PDF"""
-        with self.open_pdf(pdf_path) as doc:
+        with self._document(pdf_path) as doc:
             return doc.page_count
 
     def extract_text(self, pdf_path: Path, page_number: Optional[int] = None) -> str:
@@ -44,9 +87,7 @@ class PDFHandler:
         Extract text from PDF.
         If page_number is None, extract from all pages.
         """
-        doc = self.open_pdf(pdf_path)
-
-        try:
+        with self._document(pdf_path) as doc:
             if page_number is not None:
                 # Extract from specific page
                 if 0 <= page_number < doc.page_count:
@@ -60,17 +101,13 @@ class PDFHandler:
                 for page in doc:
                     text_parts.append(page.get_text())
                 return "\n\n".join(text_parts)
-        finally:
-            doc.close()
 
     def render_page(self, pdf_path: Path, page_number: int, zoom: float = 1.0) -> bytes:
         """
         Render PDF page to image (PNG format).
         Returns image data as bytes.
         """
-        doc = self.open_pdf(pdf_path)
-
-        try:
+        with self._document(pdf_path) as doc:
             if not (0 <= page_number < doc.page_count):
                 raise ValueError(f"Invalid page number: {page_number}")
 
@@ -88,14 +125,9 @@ class PDFHandler:
             logger.debug(f"Rendered page {page_number} at {zoom}x zoom")
             return img_data
 
-        finally:
-            doc.close()
-
     def get_page_size(self, pdf_path: Path, page_number: int) -> Tuple[float, float]:
         """Get page dimensions (width, height) in points"""
-        doc = self.open_pdf(pdf_path)
-
-        try:
+        with self._document(pdf_path) as doc:
             if not (0 <= page_number < doc.page_count):
                 raise ValueError(f"Invalid page number: {page_number}")
 
@@ -103,14 +135,9 @@ class PDFHandler:
             rect = page.rect
             return (rect.width, rect.height)
 
-        finally:
-            doc.close()
-
     def extract_metadata(self, pdf_path: Path) -> Dict:
         """Extract PDF metadata (title, author, etc.)"""
-        doc = self.open_pdf(pdf_path)
-
-        try:
+        with self._document(pdf_path) as doc:
             metadata = doc.metadata
 
             # Clean up metadata
@@ -127,14 +154,9 @@ class PDFHandler:
 
             return cleaned
 
-        finally:
-            doc.close()
-
     def create_thumbnail(self, pdf_path: Path, max_size: int = 200) -> bytes:
         """Create thumbnail of first page"""
-        doc = self.open_pdf(pdf_path)
-
-        try:
+        with self._document(pdf_path) as doc:
             if doc.page_count == 0:
                 raise ValueError("PDF has no pages")
 
@@ -149,18 +171,14 @@ class PDFHandler:
 
             return pix.tobytes("png")
 
-        finally:
-            doc.close()
-
     def search_text(self, pdf_path: Path, query: str, page_number: Optional[int] = None) -> List[Dict]:
         """
         Search for text in PDF.
         Returns list of matches with page number and bounding box.
         """
-        doc = self.open_pdf(pdf_path)
         results = []
 
-        try:
+        with self._document(pdf_path) as doc:
             pages = [doc[page_number]] if page_number is not None else doc
 
             for page in pages:
@@ -177,17 +195,12 @@ class PDFHandler:
             logger.debug(f"Found {len(results)} matches for '{query}'")
             return results
 
-        finally:
-            doc.close()
-
     def get_toc(self, pdf_path: Path) -> List[Dict]:
         """
         Extract table of contents (outline/bookmarks).
         Returns list of TOC entries with level, title, and page.
         """
-        doc = self.open_pdf(pdf_path)
-
-        try:
+        with self._document(pdf_path) as doc:
             toc = doc.get_toc()  # Returns list of [level, title, page]
 
             formatted_toc = []
@@ -200,9 +213,16 @@ class PDFHandler:
 
             return formatted_toc
 
-        finally:
-            doc.close()
+    def close_pdf(self, pdf_path: Path) -> None:
+        """Close the cached document for pdf_path, if any (e.g. before deleting the file)"""
+        with self._lock:
+            cached = self._cache.pop(str(Path(pdf_path).resolve()), None)
+            if cached is not None:
+                cached[0].close()
 
     def close_all(self):
-        """Close all cached documents"""
-        self._cache.clear()
+        """Close all cached documents (shared by every handler)"""
+        with self._lock:
+            while self._cache:
+                _, (doc, _, _) = self._cache.popitem()
+                doc.close()
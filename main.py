@@ -3,9 +3,8 @@ PDF Research Assistant - Main Entry Point
 """
 import sys
 import logging
+import multiprocessing
 from pathlib import Path
-import hashlib
-import shutil
 
 from qt_compat import QtWidgets, QtCore
 from qt_compat import QT_API
@@ -335,26 +334,20 @@ class PDFResearchApp:
 
             self.main_window.show_status_message("Adding PDF...")
 
-            # Compute file hash
-            file_hash = self._compute_file_hash(file_path)
+            # Copy PDF to workspace, hashing it in the same pass
+            staged_path, file_hash = self.workspace.stage_pdf(file_path)
 
-            # Check for duplicates
+            # Check for duplicates before the copy gets its real name
             existing = self.document_dao.get_by_hash(file_hash)
             if existing:
+                staged_path.unlink()
                 self.main_window.show_info(
                     "Duplicate",
                     f"This PDF is already in your library:\n{existing['title'] or 'Untitled'}"
                 )
                 return
 
-            # Copy PDF to workspace
-            dest_path = self.workspace.pdf_dir / file_path.name
-            counter = 1
-            while dest_path.exists():
-                dest_path = self.workspace.pdf_dir / f"{file_path.stem}_{counter}{file_path.suffix}"
-                counter += 1
-
-            shutil.copy2(file_path, dest_path)
+            dest_path = self.workspace.place_staged_pdf(staged_path, file_path.name)
 
             # Get relative path
             relative_path = self.workspace.get_relative_path(dest_path)
@@ -723,17 +716,9 @@ class PDFResearchApp:
                 VALUES ('abstract', ?, ?, NULL, NULL)
             """, (metadata['abstract'], doc_id))
 
+        db.bump_library_version(conn)
         conn.commit()
 
-    @staticmethod
-    def _compute_file_hash(file_path: Path) -> str:
-        """Compute SHA256 hash of file"""
-        sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
-
     def run(self):
         """Run the application"""
         # Initialize workspace
@@ -791,4 +776,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Required for process pools in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+Shared pytest fixtures
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Modules import each other from the repository root (e.g. `from config import ...`)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data.database import create_database  # noqa: E402
+
+
+class _Workspace:
+    """Minimal stand-in for core.workspace.Workspace: just the database"""
+
+    def __init__(self, db):
+        self._db = db
+
+    def get_database(self):
+        return self._db
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = create_database(tmp_path / "test.db")
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def workspace(db):
+    return _Workspace(db)
@@ -0,0 +1,62 @@
+"""
+Tests for core.smart.duplicate_detector
+"""
+from core.smart.duplicate_detector import DuplicateDetector, _UnionFind
+
+
+def test_union_find_is_transitive():
+    components = _UnionFind()
+    components.union(1, 2)
+    components.union(3, 4)
+    assert not components.connected(1, 4)
+
+    components.union(2, 3)
+    assert components.connected(1, 4)
+    assert components.find(1) == components.find(3)
+    assert not components.connected(1, 5)
+    assert 5 not in components
+
+
+def test_find_duplicates_groups_transitively(workspace, db):
+    """
+    1-2 share a file and 2-3 a DOI; 4-5 and 5-6 have similar titles while
+    4-6 alone fall below the threshold. Each chain is one group; 7 stays out.
+    """
+    conn = db.connect()
+    conn.executemany(
+        "INSERT INTO documents (doc_id, file_path, file_hash, title, doi) VALUES (?, ?, ?, ?, ?)",
+        [
+            (1, "pdfs/1.pdf", "same-hash", "Amine scrubbing for flue gas", None),
+            (2, "pdfs/2.pdf", "same-hash", "Amine scrubbing (copy)", "10.1000/xyz"),
+            (3, "pdfs/3.pdf", "hash-3", "Unrelated preprint title", "https://doi.org/10.1000/XYZ"),
+            (4, "pdfs/4.pdf", "hash-4", "Membrane separation of carbon dioxide", None),
+            (5, "pdfs/5.pdf", "hash-5", "Membrane separation of carbon dioxide gas", None),
+            (6, "pdfs/6.pdf", "hash-6", "Membrane separation of carbon dioxide gas flow", None),
+            (7, "pdfs/7.pdf", "hash-7", "Hydrogen storage in metal hydrides", None),
+        ]
+    )
+    conn.commit()
+
+    groups = DuplicateDetector(workspace).find_duplicates()
+
+    assert [[doc["doc_id"] for doc in group["docs"]] for group in groups] == [[1, 2, 3], [4, 5, 6]]
+    assert groups[0]["confidence"] == 1.0
+    assert DuplicateDetector._similarity_at_least(
+        DuplicateDetector._normalize_title(groups[1]["docs"][0]["title"]),
+        DuplicateDetector._normalize_title(groups[1]["docs"][2]["title"]),
+        0.9
+    ) < 0.9
+
+
+def test_similar_pairs_matches_pairwise_scan():
+    strings = ["carbon capture", "carbon captures", "capture of carbon", "", "co2", "co2 capture", "x" * 40]
+    threshold = 0.8
+
+    expected = []
+    for i in range(len(strings)):
+        for j in range(i + 1, len(strings)):
+            similarity = DuplicateDetector._similarity_at_least(strings[i], strings[j], threshold)
+            if similarity >= threshold:
+                expected.append((i, j, similarity))
+
+    assert DuplicateDetector._similar_pairs(strings, threshold) == expected
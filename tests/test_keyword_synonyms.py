@@ -0,0 +1,50 @@
+"""
+Tests for core.recommendation.keyword_synonyms
+"""
+from core.recommendation.keyword_synonyms import KEYWORD_SYNONYMS, match_keywords_batch
+
+
+def _match_one(text, keywords):
+    """Straightforward per-text matching: the first form (keyword, then synonyms) found wins"""
+    text_lower = text.lower()
+    matched_keywords = set()
+    matched_terms = []
+    for keyword in keywords:
+        keyword_lower = keyword.strip().lower()
+        forms = [keyword_lower] + [synonym.lower() for synonym in KEYWORD_SYNONYMS.get(keyword_lower, [])]
+        for form in forms:
+            if form in text_lower:
+                matched_keywords.add(keyword_lower)
+                matched_terms.append((keyword, form))
+                break
+    return {
+        'matched_keywords': matched_keywords,
+        'match_count': len(matched_keywords),
+        'matched_terms': matched_terms,
+        'total_keywords': len(keywords)
+    }
+
+
+def test_batch_matches_per_text_matching():
+    keywords = ["CO2 capture", " process modeling", "process simulation", "membrane", "CO2 capture"]
+    texts = [
+        "Carbon capture by amine scrubbing",
+        "A PROCESS MODELLING study with dynamic simulation",
+        "",
+        "membrane",
+        "co2",
+        "capture",  # with the previous text would spell "co2 capture" if texts ran together
+        "Net zero via CCS and membrane separation; carbon dioxide capture",
+    ]
+
+    assert match_keywords_batch(texts, keywords) == [_match_one(text, keywords) for text in texts]
+
+
+def test_batch_with_lowered_texts():
+    texts = ["direct air capture (dac) plants", "calcium looping"]
+    keywords = ["direct air capture", "calcium looping", "solar"]
+    assert match_keywords_batch(texts, keywords, lowered=True) == [_match_one(text, keywords) for text in texts]
+
+
+def test_batch_of_no_texts():
+    assert match_keywords_batch([], ["membrane"]) == []
@@ -0,0 +1,56 @@
+"""
+Tests for core.search_engine
+"""
+import pytest
+
+from core.search_engine import EMPTY_FTS_QUERY, SearchEngine, sanitize_fts_query
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("carbon capture", '"carbon" "capture"*'),
+    ("CO2-capture: (amine*) OR NOT", '"co2" "capture" "amine" "or" "not"*'),
+    ('"carbon capture"', '"carbon capture"'),
+    ('"say "hi""', '"say ""hi"""'),
+    ("a b carbon", '"carbon"*'),
+    ("탄 소", '"탄" "소"*'),
+])
+def test_sanitize_fts_query(query, expected):
+    assert sanitize_fts_query(query) == expected
+
+
+@pytest.mark.parametrize("query", ["", "   ", '""', '" "', "a", "- : ( ) *"])
+def test_sanitize_fts_query_empty(query):
+    assert sanitize_fts_query(query) == EMPTY_FTS_QUERY
+
+
+def test_sanitized_queries_are_valid_match_expressions(db):
+    conn = db.connect()
+    for query in ['"unbalanced', "NEAR(a b)", "title:x", "^start", "a AND", "x'y"]:
+        conn.execute(
+            "SELECT COUNT(*) FROM search_index WHERE search_index MATCH ?",
+            (sanitize_fts_query(query),)
+        ).fetchone()
+
+
+def test_type_filter_keeps_lower_ranked_types(workspace, db):
+    """An annotation must not be crowded out by many better-ranked title hits"""
+    conn = db.connect()
+    conn.executemany(
+        "INSERT INTO documents (file_path, file_hash, title) VALUES (?, ?, ?)",
+        [(f"pdfs/{i}.pdf", f"hash{i}", f"Catalyst {i}") for i in range(1200)]
+    )
+    conn.execute(
+        "INSERT INTO annotations (doc_id, page_number, content) VALUES (1, 1, ?)",
+        ("a long note on many unrelated things that mentions catalyst only once in passing",)
+    )
+    conn.commit()
+
+    engine = SearchEngine(workspace)
+    engine.rebuild_index()
+
+    annotations = engine.search_annotations("catalyst")
+    assert [a["annotation_id"] for a in annotations] == [1]
+
+    titles = engine.search("catalyst", content_types=["title"], limit=5)
+    assert titles.total_count == 5
+    assert set(titles.results_by_type) == {"title"}
@@ -242,6 +242,8 @@ class PDFViewer(QWidget):
 
     def close_pdf(self):
         """Close current PDF"""
+        if self.current_pdf_path is not None:
+            self.pdf_handler.close_pdf(self.current_pdf_path)
         self.current_pdf_path = None
         self.current_page = 0
         self.total_pages = 0
@@ -316,6 +316,9 @@ class SyncDialog(QDialog):
             else:
                 message += "✓ No orphaned files\n"
 
+            if results['size_mismatches']:
+                message += f"⚠ Size mismatches: {len(results['size_mismatches'])}\n"
+
             if results['hash_mismatches']:
                 message += f"⚠ Hash mismatches: {len(results['hash_mismatches'])}\n"
             else:
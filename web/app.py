@@ -47,12 +47,7 @@ def get_journals():
             ORDER BY journal_name
         """)
 
-        columns = [desc[0] for desc in cursor.description]
-        journals = []
-
-        for row in cursor.fetchall():
-            journal = dict(zip(columns, row))
-            journals.append(journal)
+        journals = [dict(row) for row in cursor.fetchall()]
 
         return jsonify({
             'success': True,
@@ -157,12 +152,7 @@ def get_papers():
 
         cursor.execute(query, params)
 
-        columns = [desc[0] for desc in cursor.description]
-        papers = []
-
-        for row in cursor.fetchall():
-            paper = dict(zip(columns, row))
-            papers.append(paper)
+        papers = [dict(row) for row in cursor.fetchall()]
 
         # Get total count
         count_query = """